@@ -16,14 +16,24 @@
 
 from oslo_config import cfg
 
+from ironic_oneviewd.conf import coordination
 from ironic_oneviewd.conf import default
+from ironic_oneviewd.conf import instrumentation
 from ironic_oneviewd.conf import inventory
+from ironic_oneviewd.conf import metrics
+from ironic_oneviewd.conf import notifications
 from ironic_oneviewd.conf import oneview
 from ironic_oneviewd.conf import openstack
 
 CONF = cfg.CONF
 
+DEFAULT_CONFIG_FILE = '/etc/ironic-oneviewd/ironic-oneviewd.conf'
+
+coordination.register_opts(CONF)
 default.register_opts(CONF)
+instrumentation.register_opts(CONF)
 inventory.register_opts(CONF)
+metrics.register_opts(CONF)
+notifications.register_opts(CONF)
 oneview.register_opts(CONF)
 openstack.register_opts(CONF)
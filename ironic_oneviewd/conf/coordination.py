@@ -0,0 +1,50 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from oslo_config import cfg
+
+CONF = cfg.CONF
+
+opts = [
+    cfg.StrOpt('backend_url',
+               help='URL of the tooz coordination backend shared by the '
+                    'daemon instances, such as file:///var/lib/'
+                    'ironic-oneviewd/coordination, ipc:// or a ZooKeeper, '
+                    'etcd or Redis URL. When set, the Ironic nodes are '
+                    'split among the instances joined to the group. '
+                    'Requires tooz.'),
+    cfg.StrOpt('group_id',
+               default='ironic-oneviewd',
+               help='Coordination group joined by the daemon instances.'),
+    cfg.StrOpt('member_id',
+               help='Unique identifier of this daemon instance in the '
+                    'coordination group. Defaults to the host name, so '
+                    'instances sharing a host must set it.'),
+    cfg.IntOpt('hash_ring_partitions',
+               default=64,
+               min=1,
+               help='Number of partitions of the hash ring assigned to '
+                    'each daemon instance. More partitions split the '
+                    'nodes more evenly.'),
+    cfg.IntOpt('leader_retry_interval',
+               default=10,
+               min=1,
+               help='Interval in seconds the instances not elected to run '
+                    'the inventory checks try to take over the leader.')
+]
+
+
+def register_opts(conf):
+    conf.register_opts(opts, group='coordination')
@@ -23,9 +23,114 @@ opts = [
                default=300,
                help='Polling interval in seconds for daemon to manage the '
                     'nodes.'),
+    cfg.BoolOpt('adaptive_polling',
+                default=False,
+                help='Poll every min_polling_interval seconds while there '
+                     'are nodes to manage or hardware to enroll, backing '
+                     'off exponentially up to retry_interval and '
+                     '[inventory]check_interval while idle.'),
+    cfg.IntOpt('min_polling_interval',
+               default=10,
+               min=1,
+               help='Polling interval in seconds when adaptive polling '
+                    'finds activity. Raised to node_cache_ttl while the '
+                    'node cache is enabled, since Ironic is not polled '
+                    'again before the cached snapshot expires.'),
+    cfg.FloatOpt('polling_backoff_factor',
+                 default=2.0,
+                 min=1.0,
+                 help='Factor the adaptive polling interval is multiplied '
+                      'by after each idle cycle.'),
+    cfg.FloatOpt('polling_jitter',
+                 default=0.1,
+                 min=0.0,
+                 max=1.0,
+                 help='Fraction of the adaptive polling interval randomly '
+                      'added or subtracted, so several daemons do not poll '
+                      'at the same time.'),
     cfg.IntOpt('rpc_thread_pool_size',
                default=20,
-               help='Size the of the RPC thread pool.')
+               help='Size the of the RPC thread pool.'),
+    cfg.IntOpt('dispatch_queue_size',
+               default=100,
+               min=0,
+               help='Maximum number of node actions waiting for a free '
+                    'thread of the RPC thread pool. Dispatching more '
+                    'actions blocks until the queue has room.'),
+    cfg.StrOpt('engine',
+               default='thread',
+               choices=['thread', 'asyncio'],
+               help='Concurrency engine used to manage the nodes. The '
+                    'asyncio engine sets provision states through an '
+                    'asynchronous HTTP client and requires Python 3 and '
+                    'aiohttp.'),
+    cfg.IntOpt('ironic_max_concurrency',
+               default=100,
+               min=1,
+               help='Maximum number of concurrent requests to Ironic with '
+                    'the asyncio engine.'),
+    cfg.IntOpt('oneview_max_concurrency',
+               default=20,
+               min=1,
+               help='Maximum number of concurrent requests to OneView with '
+                    'the asyncio engine.'),
+    cfg.IntOpt('batch_max_concurrency',
+               default=20,
+               min=1,
+               help='Maximum number of nodes handled concurrently by the '
+                    'batch maintenance and provision state operations.'),
+    cfg.IntOpt('node_cache_ttl',
+               default=0,
+               min=0,
+               help='Time in seconds an Ironic node snapshot is shared '
+                    'between the node and inventory managers before Ironic '
+                    'is polled again. The shared snapshot holds every node '
+                    'out of maintenance, so the node manager then reads '
+                    'all of them instead of only the nodes in the '
+                    'provision states it acts on. It pays off when the '
+                    'inventory is checked about as often as the nodes are '
+                    'polled. Set to 0 to disable the cache.'),
+    cfg.IntOpt('transition_deadline',
+               default=120,
+               min=0,
+               help='Time in seconds a provision state change refused by '
+                    'Ironic with a conflict or unavailable error is retried '
+                    'before it counts as a failure. Retries are requested '
+                    'by later cycles, at least min_polling_interval '
+                    'seconds apart, without holding a worker meanwhile.'),
+    cfg.FloatOpt('transition_backoff',
+                 default=1.0,
+                 min=0.0,
+                 help='Delay in seconds before the first retry of a '
+                      'provision state change. It doubles on each retry.'),
+    cfg.FloatOpt('transition_max_backoff',
+                 default=30.0,
+                 min=0.0,
+                 help='Maximum delay in seconds between retries of a '
+                      'provision state change.'),
+    cfg.IntOpt('quarantine_threshold',
+               default=3,
+               min=1,
+               help='Number of provision state changes of a node failing '
+                    'in a row before the node is quarantined.'),
+    cfg.IntOpt('quarantine_time',
+               default=1800,
+               min=0,
+               help='Time in seconds a quarantined node is left alone by '
+                    'the daemon.'),
+    cfg.IntOpt('circuit_breaker_threshold',
+               default=5,
+               min=0,
+               help='Number of requests to Ironic or OneView failing in a '
+                    'row, with a server error or no response, after which '
+                    'requests to that backend are paused. Set to 0 to '
+                    'disable the circuit breaker.'),
+    cfg.IntOpt('circuit_breaker_reset_timeout',
+               default=30,
+               min=1,
+               help='Time in seconds requests to a backend are paused once '
+                    'its circuit breaker opens, before a single request is '
+                    'tried again.')
 ]
 
 
@@ -0,0 +1,39 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from oslo_config import cfg
+
+CONF = cfg.CONF
+
+opts = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help='Instrument the calls to Ironic, Keystone and OneView, '
+                     'recording their duration, size and errors.'),
+    cfg.BoolOpt('opentelemetry',
+                default=False,
+                help='Export the instrumented calls as OpenTelemetry spans, '
+                     'through the tracer provider configured for the '
+                     'process. Requires opentelemetry-api.'),
+    cfg.FloatOpt('slow_call_threshold',
+                 default=5.0,
+                 min=0.0,
+                 help='Duration, in seconds, above which an instrumented '
+                      'call is logged as slow.')
+]
+
+
+def register_opts(conf):
+    conf.register_opts(opts, group='instrumentation')
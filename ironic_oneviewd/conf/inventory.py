@@ -24,7 +24,41 @@ opts = [
                help='Interval in seconds for daemon to check for '
                     'not enrolled Server Hardware.'),
     cfg.ListOpt('server_profile_templates',
-                help='List of Server Profile Templates UUIDs')
+                help='List of Server Profile Templates UUIDs'),
+    cfg.IntOpt('scan_workers',
+               default=8,
+               min=1,
+               help='Number of Server Profile Templates and Server '
+                    'Hardware queries sent to OneView in parallel.'),
+    cfg.BoolOpt('auto_enroll',
+                default=False,
+                help='Enroll the Server Hardware not enrolled as Ironic '
+                     'nodes found on each inventory check.'),
+    cfg.IntOpt('enroll_batch_size',
+               default=20,
+               min=1,
+               help='Number of Ironic nodes created in parallel on each '
+                    'enrollment batch.'),
+    cfg.FloatOpt('enroll_rate_limit',
+                 default=10.0,
+                 min=0.1,
+                 help='Maximum number of Ironic nodes created per second '
+                      'by an enrollment.'),
+    cfg.IntOpt('validation_interval',
+               default=3600,
+               min=0,
+               help='Interval in seconds for daemon to validate the OneView '
+                    'data of every Ironic node using OneView drivers, '
+                    'reporting missing Server Hardware URIs, malformed '
+                    'capabilities, missing hardware properties and Server '
+                    'Profile Template mismatches. Set to 0 to disable.'),
+    cfg.StrOpt('results_file',
+               help='File the inventory results, such as the Server '
+                    'Hardware not enrolled, are published to after each '
+                    'check. With several coordinated daemon instances, '
+                    'only the leader checks the inventory and the others '
+                    'read its results from this file, which must then be '
+                    'on shared storage.')
 ]
 
 
@@ -0,0 +1,40 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_config import cfg
+
+CONF = cfg.CONF
+
+opts = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help='Export Prometheus metrics of the node and inventory '
+                     'managers. Requires prometheus_client.'),
+    cfg.StrOpt('host',
+               default='0.0.0.0',
+               help='Address the metrics endpoint listens on.'),
+    cfg.PortOpt('port',
+                default=9612,
+                help='Port the metrics endpoint listens on.'),
+    cfg.StrOpt('multiprocess_dir',
+               help='Directory where the manager processes write their '
+                    'metrics. Its metric files are removed when the daemon '
+                    'starts. Defaults to a new private temporary directory.')
+]
+
+
+def register_opts(conf):
+    conf.register_opts(opts, group='metrics')
@@ -0,0 +1,47 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_config import cfg
+
+CONF = cfg.CONF
+
+opts = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help='Manage nodes as soon as Ironic versioned '
+                     'notifications about their creation, update, '
+                     'provision state or maintenance changes are '
+                     'received. The messaging transport is set by the '
+                     'oslo.messaging [oslo_messaging_notifications]'
+                     'transport_url option. Requires the oslo.messaging '
+                     'package.'),
+    cfg.ListOpt('topics',
+                default=['ironic_versioned_notifications'],
+                help='Topics where Ironic versioned notifications are '
+                     'published.'),
+    cfg.StrOpt('pool',
+               help='Name of the notification listener pool, so the daemon '
+                    'does not steal notifications from other consumers.'),
+    cfg.IntOpt('reconciliation_interval',
+               default=300,
+               help='Polling interval in seconds for daemon to manage the '
+                    'nodes when notifications are enabled, catching the '
+                    'nodes whose notifications were lost.')
+]
+
+
+def register_opts(conf):
+    conf.register_opts(opts, group='notifications')
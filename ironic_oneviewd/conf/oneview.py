@@ -30,7 +30,39 @@ opts = [
                 default=False,
                 help='Option to allow insecure connection with OneView.'),
     cfg.StrOpt('tls_cacert_file',
-               help='Path to OneView CA certificate file.')
+               help='Path to OneView CA certificate file.'),
+    cfg.IntOpt('cache_ttl',
+               default=600,
+               min=0,
+               help='Time in seconds Server Profile Templates are cached '
+                    'before being revalidated with OneView. Set to 0 to '
+                    'disable the cache.'),
+    cfg.IntOpt('cache_size',
+               default=1000,
+               min=1,
+               help='Maximum number of OneView resources cached.'),
+    cfg.IntOpt('page_size',
+               default=256,
+               min=1,
+               help='Number of Server Hardware fetched from OneView per '
+                    'request when scanning for not enrolled hardware.'),
+    cfg.IntOpt('connection_pool_size',
+               default=10,
+               min=1,
+               help='Maximum number of idle HTTPS connections to OneView '
+                    'kept open to be reused by each process.'),
+    cfg.FloatOpt('rate_limit',
+                 default=0.0,
+                 min=0.0,
+                 help='Maximum number of requests per second sent to '
+                      'OneView by each daemon process. Set to 0 to disable '
+                      'the limit.'),
+    cfg.IntOpt('rate_burst',
+               default=0,
+               min=0,
+               help='Number of requests that may be sent to OneView at '
+                    'once, above rate_limit. Defaults to one second worth '
+                    'of requests.')
 ]
 
 
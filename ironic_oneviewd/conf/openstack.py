@@ -63,10 +63,26 @@ opts = [
                help='ID of a domain the project belongs to.'),
     cfg.StrOpt('project_domain_name',
                help='ID of a domain the project belongs to.'),
+    cfg.StrOpt('token_cache_file',
+               help='(Optional) Path to a file where the Keystone token is '
+                    'cached, so it is reused when the daemon restarts. The '
+                    'file is only readable by the daemon user.'),
     cfg.BoolOpt('inspection_enabled',
                 default=False,
                 help='Run inspection on nodes when any hardware property is '
-                     'missing.')
+                     'missing.'),
+    cfg.FloatOpt('ironic_rate_limit',
+                 default=0.0,
+                 min=0.0,
+                 help='Maximum number of requests per second sent to the '
+                      'Ironic API by each daemon process. Set to 0 to '
+                      'disable the limit.'),
+    cfg.IntOpt('ironic_rate_burst',
+               default=0,
+               min=0,
+               help='Number of requests that may be sent to the Ironic API '
+                    'at once, above ironic_rate_limit. Defaults to one '
+                    'second worth of requests.')
 ]
 
 
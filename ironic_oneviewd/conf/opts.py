@@ -18,7 +18,11 @@ import ironic_oneviewd.conf
 
 _opts = [
     ('DEFAULT', ironic_oneviewd.conf.default.opts),
+    ('coordination', ironic_oneviewd.conf.coordination.opts),
+    ('instrumentation', ironic_oneviewd.conf.instrumentation.opts),
     ('inventory', ironic_oneviewd.conf.inventory.opts),
+    ('metrics', ironic_oneviewd.conf.metrics.opts),
+    ('notifications', ironic_oneviewd.conf.notifications.opts),
     ('oneview', ironic_oneviewd.conf.oneview.opts),
     ('openstack', ironic_oneviewd.conf.openstack.opts)
 ]
@@ -0,0 +1,171 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Consistency of the Ironic nodes with the Server Hardware in OneView.
+
+The capabilities of a node claim the Server Hardware Type and Enclosure
+Group of its Server Hardware, and drift from OneView when the hardware is
+moved, replaced or removed. All the Server Hardware is fetched once into
+an index keyed by URI, against which every node is compared, instead of
+looking up the Server Hardware of each node.
+"""
+
+import time
+
+from oslo_log import log as logging
+
+from ironic_oneviewd import exceptions
+from ironic_oneviewd import utils
+
+LOG = logging.getLogger(__name__)
+
+SERVER_HARDWARE_NOT_FOUND = 'server_hardware_not_found'
+SERVER_HARDWARE_TYPE_DRIFT = 'server_hardware_type_drift'
+ENCLOSURE_GROUP_DRIFT = 'enclosure_group_drift'
+
+DRIFTS = (SERVER_HARDWARE_NOT_FOUND, SERVER_HARDWARE_TYPE_DRIFT,
+          ENCLOSURE_GROUP_DRIFT)
+
+CONSISTENCY_FIELDS = ['uuid', 'maintenance', 'properties', 'driver_info']
+SERVER_HARDWARE_FIELDS = ['uri', 'serverHardwareTypeUri', 'serverGroupUri']
+
+MAINTENANCE_REASON = 'Drifted from OneView: %s'
+
+
+class ConsistencyReport(object):
+    """Drifts found on each node by a consistency check."""
+
+    def __init__(self):
+        self.nodes = 0
+        self.server_hardware = 0
+        self.unchecked_nodes = []
+        self.drifted_nodes = {}
+        self.counts = dict.fromkeys(DRIFTS, 0)
+        self.maintenance_set = []
+        self.maintenance_failed = {}
+        self.duration = 0.0
+
+    def add(self, node, drifts):
+        self.nodes += 1
+        if drifts is None:
+            self.unchecked_nodes.append(node.uuid)
+        elif drifts:
+            self.drifted_nodes[node.uuid] = drifts
+            for drift in drifts:
+                self.counts[drift] += 1
+
+    def to_dict(self):
+        return {'nodes': self.nodes,
+                'server_hardware': self.server_hardware,
+                'consistent': (self.nodes - len(self.drifted_nodes) -
+                               len(self.unchecked_nodes)),
+                'drifted': len(self.drifted_nodes),
+                'unchecked_nodes': sorted(self.unchecked_nodes),
+                'drifts': dict(self.counts),
+                'drifted_nodes': self.drifted_nodes,
+                'maintenance_set': sorted(self.maintenance_set),
+                'maintenance_failed': self.maintenance_failed,
+                'duration': round(self.duration, 3)}
+
+
+def index_server_hardware(server_hardware_list):
+    """Index the Server Hardware by URI.
+
+    :param server_hardware_list: Iterable of Server Hardware with at least
+                                 the SERVER_HARDWARE_FIELDS.
+    :returns: Dict of Server Hardware URIs to their Server Hardware Type
+              and Enclosure Group URIs.
+    """
+    return dict((server_hardware['uri'],
+                 (server_hardware.get('serverHardwareTypeUri') or None,
+                  server_hardware.get('serverGroupUri') or None))
+                for server_hardware in server_hardware_list)
+
+
+def check_node(node, hardware_index):
+    """Compare the OneView data claimed by a node against OneView.
+
+    :param node: Ironic node, or NodeRecord, with the CONSISTENCY_FIELDS.
+    :param hardware_index: Server Hardware index, from
+                           index_server_hardware.
+    :returns: Dict of the drifts found to the claimed and actual URIs,
+              empty if the node is consistent, or None if the node does
+              not claim a Server Hardware to be checked against.
+    """
+    try:
+        node_info = utils.get_node_info_from_node(node)
+    except exceptions.InvalidParameterValue:
+        return None
+    server_hardware_uri = node_info['server_hardware_uri']
+    if not server_hardware_uri:
+        return None
+
+    if server_hardware_uri not in hardware_index:
+        return {SERVER_HARDWARE_NOT_FOUND: {'claimed': server_hardware_uri,
+                                            'actual': None}}
+    drifts = {}
+    claims = ((SERVER_HARDWARE_TYPE_DRIFT,
+               node_info['server_hardware_type_uri']),
+              (ENCLOSURE_GROUP_DRIFT, node_info['enclosure_group_uri']))
+    for (drift, claimed), actual in zip(claims,
+                                        hardware_index[server_hardware_uri]):
+        if (claimed or None) != actual:
+            drifts[drift] = {'claimed': claimed, 'actual': actual}
+    return drifts
+
+
+def check_nodes(facade, nodes, set_maintenance=False):
+    """Compare every node against the Server Hardware in OneView.
+
+    :param facade: Facade listing the Server Hardware and setting nodes
+                   in maintenance.
+    :param nodes: Iterable of Ironic nodes with the CONSISTENCY_FIELDS.
+    :param set_maintenance: Whether to put the drifted nodes not yet in
+                            maintenance in maintenance.
+    :returns: A ConsistencyReport.
+    """
+    started_at = time.time()
+    report = ConsistencyReport()
+    hardware_index = index_server_hardware(
+        facade.iter_server_hardware_available(
+            fields=SERVER_HARDWARE_FIELDS))
+    report.server_hardware = len(hardware_index)
+
+    drifted_nodes = []
+    for node in nodes:
+        drifts = check_node(node, hardware_index)
+        report.add(node, drifts)
+        if drifts:
+            drifted_nodes.append(node)
+
+    if set_maintenance:
+        for node in drifted_nodes:
+            if node.maintenance:
+                continue
+            reason = MAINTENANCE_REASON % ', '.join(
+                sorted(report.drifted_nodes[node.uuid]))
+            try:
+                facade.node_set_maintenance(node.uuid, True, reason)
+            except Exception as exc:
+                LOG.error("Failed to set node %(node)s in maintenance: "
+                          "%(error)s" % {'node': node.uuid, 'error': exc})
+                report.maintenance_failed[node.uuid] = str(exc)
+            else:
+                LOG.info("Node %(node)s set in maintenance: %(reason)s" %
+                         {'node': node.uuid, 'reason': reason})
+                report.maintenance_set.append(node.uuid)
+    report.duration = time.time() - started_at
+    return report
@@ -0,0 +1,260 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Coordination of several daemon instances. Requires tooz.
+
+The instances join a tooz group and split the Ironic nodes among its
+members with a consistent hash ring over the node UUIDs, so an instance
+joining or leaving the group only moves its share of the nodes. Work that
+must run on a single instance, such as the inventory checks, is run by the
+instance elected leader through a tooz lock.
+"""
+
+import bisect
+import hashlib
+import socket
+
+from oslo_log import log as logging
+from oslo_utils import importutils
+
+from ironic_oneviewd.conf import CONF
+
+tooz_coordination = importutils.try_import('tooz.coordination')
+
+LOG = logging.getLogger(__name__)
+
+
+def _hash(key):
+    return int(hashlib.md5(key.encode('utf-8')).hexdigest()[:16], 16)
+
+
+def _to_text(member_id):
+    if isinstance(member_id, bytes):
+        return member_id.decode('utf-8')
+    return member_id
+
+
+class HashRing(object):
+    """Consistent hash ring mapping keys to the members owning them.
+
+    Each member is placed on the ring partitions times, so the keys are
+    split evenly and a member joining or leaving only moves about 1/n of
+    the keys.
+    """
+
+    def __init__(self, members, partitions):
+        self.members = frozenset(members)
+        ring = sorted((_hash('%s-%d' % (member, partition)), member)
+                      for member in self.members
+                      for partition in range(partitions))
+        self._hashes = [key_hash for key_hash, member in ring]
+        self._members = [member for key_hash, member in ring]
+
+    def get_owner(self, key):
+        """Get the member owning a key, or None if the ring is empty."""
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._members[index]
+
+
+class ShardCoordinator(object):
+    """Membership of a daemon instance in a group sharing the nodes.
+
+    The hash ring is rebuilt whenever refresh finds that members joined
+    or left the group, which rebalances the node ownership. The file and
+    ipc backends are meant for local testing: they only drop members
+    leaving the group cleanly, while backends such as ZooKeeper, etcd or
+    Redis also expire members that stop heartbeating.
+    """
+
+    def __init__(self, backend_url, group_id, member_id, partitions):
+        self.group_id = group_id.encode('utf-8')
+        self.member_id = member_id
+        self.partitions = partitions
+        self.ring = HashRing([member_id], partitions)
+        self.rebalances = 0
+        self._coordinator = tooz_coordination.get_coordinator(
+            backend_url, member_id.encode('utf-8'))
+
+    def start(self):
+        self._coordinator.start(start_heart=True)
+        try:
+            self._coordinator.create_group(self.group_id).get()
+        except tooz_coordination.GroupAlreadyExist:
+            pass
+        self._join()
+        self.refresh()
+
+    def stop(self):
+        try:
+            self._coordinator.leave_group(self.group_id).get()
+        except tooz_coordination.ToozError as exc:
+            LOG.warning("Failed to leave coordination group %(group)s: "
+                        "%(error)s" % {'group': _to_text(self.group_id),
+                                       'error': exc})
+        self._coordinator.stop()
+
+    def _join(self):
+        try:
+            self._coordinator.join_group(self.group_id).get()
+        except tooz_coordination.MemberAlreadyExist:
+            pass
+
+    def refresh(self):
+        """Rebuild the hash ring if members joined or left the group.
+
+        The previous ring is kept while the backend is unreachable.
+
+        :returns: True if the node ownership changed.
+        """
+        try:
+            self._coordinator.run_watchers()
+            members = set(_to_text(member) for member in
+                          self._coordinator.get_members(self.group_id).get())
+            # NOTE: The backend may have expired this member after missed
+            # heartbeats, in which case it joins the group again.
+            if self.member_id not in members:
+                self._join()
+                members.add(self.member_id)
+        except tooz_coordination.ToozError as exc:
+            LOG.warning("Failed to refresh the members of coordination "
+                        "group %(group)s: %(error)s" %
+                        {'group': _to_text(self.group_id), 'error': exc})
+            return False
+
+        if members == self.ring.members:
+            return False
+        LOG.info("Coordination group %(group)s has %(count)s members, "
+                 "rebalancing the nodes: %(members)s" %
+                 {'group': _to_text(self.group_id), 'count': len(members),
+                  'members': sorted(members)})
+        self.ring = HashRing(members, self.partitions)
+        self.rebalances += 1
+        return True
+
+    def owns(self, node_uuid):
+        """Tell whether this instance manages a node."""
+        return self.ring.get_owner(node_uuid) == self.member_id
+
+    def stats(self):
+        return {'members': len(self.ring.members),
+                'rebalances': self.rebalances}
+
+
+class LeaderElection(object):
+    """Election of the instance running a task, through a tooz lock.
+
+    The instance holding the lock is the leader. Its lease is kept alive
+    by the coordinator heartbeat and ends when the instance releases the
+    lock, stops heartbeating or dies, after which the first instance
+    trying again takes over. File locks end as soon as the process dies.
+    """
+
+    def __init__(self, backend_url, lock_name, member_id):
+        self.lock_name = lock_name
+        self.member_id = member_id
+        self.leader = False
+        self.elections = 0
+        self._coordinator = tooz_coordination.get_coordinator(
+            backend_url, member_id.encode('utf-8'))
+        self._lock = self._coordinator.get_lock(lock_name.encode('utf-8'))
+
+    def start(self):
+        self._coordinator.start(start_heart=True)
+
+    def stop(self):
+        if self.leader:
+            try:
+                self._lock.release()
+            except tooz_coordination.ToozError as exc:
+                LOG.warning("Failed to release lock %(lock)s: %(error)s" %
+                            {'lock': self.lock_name, 'error': exc})
+            self.leader = False
+        self._coordinator.stop()
+
+    def is_leader(self):
+        """Tell whether this instance leads, trying to become the leader.
+
+        A leader checks it still holds the lock on every call, since its
+        lease may have expired, as after missed heartbeats or a network
+        partition, and another instance may have taken over.
+
+        :returns: True if this instance holds the lock.
+        """
+        try:
+            self._coordinator.run_watchers()
+            if self.leader and not self._holds_lock():
+                self.leader = False
+                LOG.warning("%(member)s lost the lock of %(lock)s and is "
+                            "no longer the leader." %
+                            {'member': self.member_id,
+                             'lock': self.lock_name})
+            if not self.leader and self._lock.acquire(blocking=False):
+                self.leader = True
+                self.elections += 1
+                LOG.info("%(member)s is now the leader of %(lock)s." %
+                         {'member': self.member_id, 'lock': self.lock_name})
+        except tooz_coordination.ToozError as exc:
+            LOG.warning("Failed to check the leader of %(lock)s: "
+                        "%(error)s" % {'lock': self.lock_name,
+                                       'error': exc})
+            self.leader = False
+        return self.leader
+
+    def _holds_lock(self):
+        # NOTE: Drivers not able to tell whether the lock is still owned,
+        # such as the file driver, only lose it along with the process.
+        try:
+            return self._lock.is_still_owner()
+        except NotImplementedError:
+            return getattr(self._lock, 'acquired', True)
+
+
+def get_member_id():
+    return CONF.coordination.member_id or socket.gethostname()
+
+
+def get_shard_coordinator():
+    """Get the shard coordinator of this instance, if sharding is enabled.
+
+    :returns: A ShardCoordinator not yet started, or None when no
+              coordination backend is set.
+    :raises: ImportError if tooz is not installed.
+    """
+    if not CONF.coordination.backend_url:
+        return None
+    if tooz_coordination is None:
+        raise ImportError("tooz is required by the sharded mode.")
+    return ShardCoordinator(
+        CONF.coordination.backend_url, CONF.coordination.group_id,
+        get_member_id(), CONF.coordination.hash_ring_partitions)
+
+
+def get_leader_election(task):
+    """Get the election of the instance running a task, if coordinated.
+
+    :param task: Name of the task, such as 'inventory'.
+    :returns: A LeaderElection not yet started, or None when no
+              coordination backend is set.
+    :raises: ImportError if tooz is not installed.
+    """
+    if not CONF.coordination.backend_url:
+        return None
+    if tooz_coordination is None:
+        raise ImportError("tooz is required by the leader election.")
+    return LeaderElection(
+        CONF.coordination.backend_url,
+        '%s-%s' % (CONF.coordination.group_id, task), get_member_id())
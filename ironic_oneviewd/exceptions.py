@@ -26,3 +26,19 @@ class MissingParameterValue(Exception):
 class OneViewNotAuthorizedException(Exception):
     message = ("Secure access to OneView. Check CA certificate path in "
                "Ironic OneView Daemon configuration file.")
+
+
+class IronicAPIError(Exception):
+    def __init__(self, status_code, message):
+        self.status_code = status_code
+        self.message = ("Ironic API request failed with HTTP status %s: %s"
+                        % (status_code, message))
+        super(IronicAPIError, self).__init__(self.message)
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, backend):
+        self.backend = backend
+        self.message = ("Requests to %s are paused while its circuit "
+                        "breaker is open." % backend)
+        super(CircuitOpenError, self).__init__(self.message)
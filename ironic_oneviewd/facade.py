@@ -14,28 +14,140 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import functools
+import itertools
+
+from concurrent import futures
+from oslo_log import log as logging
+from oslo_utils import importutils
+import six
+from six.moves.urllib import parse
+
+from ironic_oneviewd.conf import CONF
+from ironic_oneviewd import instrumentation
+from ironic_oneviewd import node_snapshot
+from ironic_oneviewd import oneview_cache
+from ironic_oneviewd import oneview_session
 from ironic_oneviewd import utils
 
+client_exception = importutils.try_import('hpOneView.exceptions')
+
+LOG = logging.getLogger(__name__)
+
+IRONIC_NODES_PATH = '/v1/nodes'
+SERVER_HARDWARE_URI = '/rest/server-hardware'
+SERVER_HARDWARE_FIELDS = ['uri', 'name', 'state']
+
+NodeResult = collections.namedtuple('NodeResult', ['node_uuid', 'error'])
+
 
 class Facade(object):
 
     def __init__(self):
-        self.ironicclient = utils.get_ironic_client()
+        self.keystone_session = utils.get_keystone_session()
+        self.ironicclient = utils.get_ironic_client(self.keystone_session)
         self.oneview_client = utils.get_hponeview_client()
+        self.oneview_session = oneview_session.OneViewSession(
+            self.oneview_client.connection, CONF.oneview.connection_pool_size,
+            utils.get_oneview_credentials())
+        self.oneview_cache = oneview_cache.OneViewResourceCache(
+            CONF.oneview.cache_ttl, CONF.oneview.cache_size)
 
     # =========================================================================
     # Ironic actions
     # =========================================================================
 
-    def get_ironic_node_list(self):
-        return self.ironicclient.node.list(detail=True)
+    @instrumentation.instrumented('ironic')
+    def get_ironic_node_list(self, drivers=None, provision_states=None,
+                             maintenance=None, fields=None):
+        """Get the Ironic nodes, filtered by the Ironic API when asked to.
+
+        Without arguments every node is returned with all its details. The
+        filters are pushed down to the Ironic API, one request per
+        combination of driver and provision state, so only the matching
+        nodes are transferred.
+
+        :param drivers: List of driver names to filter by.
+        :param provision_states: List of provision states to filter by.
+        :param maintenance: Filter nodes by maintenance mode if not None.
+        :param fields: List of node fields to be returned instead of the
+                       detailed node.
+        :returns: List of Ironic nodes, without duplicates.
+        """
+        list_kwargs = {'limit': 0}
+        if fields:
+            list_kwargs['fields'] = fields
+        else:
+            list_kwargs['detail'] = True
+        if maintenance is not None:
+            list_kwargs['maintenance'] = maintenance
+
+        if not (drivers or provision_states):
+            return self.ironicclient.node.list(**list_kwargs)
 
+        nodes = []
+        seen_nodes = set()
+        for filters in _get_node_filters(drivers, provision_states):
+            filters.update(list_kwargs)
+            for node in self.ironicclient.node.list(**filters):
+                if node.uuid not in seen_nodes:
+                    seen_nodes.add(node.uuid)
+                    nodes.append(node)
+        return nodes
+
+    @instrumentation.instrumented('ironic')
+    def get_ironic_node_snapshot(self, drivers=None, provision_states=None,
+                                 maintenance=None,
+                                 fields=node_snapshot.SNAPSHOT_FIELDS):
+        """Get compact records of the Ironic nodes read by the managers.
+
+        The records are built straight from the JSON pages of the Ironic
+        API, with only the fields the managers read, and each page is
+        dropped once its records are built. The filters are pushed down as
+        in get_ironic_node_list.
+
+        :param drivers: List of driver names to filter by.
+        :param provision_states: List of provision states to filter by.
+        :param maintenance: Filter nodes by maintenance mode if not None.
+        :param fields: List of node fields to be returned, out of the
+                       NodeRecord fields. The others are left empty.
+        :returns: List of NodeRecord objects, without duplicates.
+        """
+        http_client = self.ironicclient.http_client
+        records = []
+        seen_nodes = set()
+        for filters in _get_node_filters(drivers, provision_states):
+            filters['fields'] = ','.join(fields)
+            if maintenance is not None:
+                filters['maintenance'] = str(maintenance).lower()
+            while True:
+                # NOTE: The next page is requested with the marker rather
+                # than the next link, whose URL may not match the endpoint
+                # of the client, as behind a proxy with a path prefix.
+                url = '%s?%s' % (IRONIC_NODES_PATH,
+                                 parse.urlencode(sorted(filters.items())))
+                resp, body = http_client.json_request('GET', url)
+                nodes = body.get('nodes') or []
+                for node in nodes:
+                    if node['uuid'] not in seen_nodes:
+                        seen_nodes.add(node['uuid'])
+                        records.append(
+                            node_snapshot.NodeRecord.from_dict(node))
+                if not (body.get('next') and nodes):
+                    break
+                filters['marker'] = nodes[-1]['uuid']
+        return records
+
+    @instrumentation.instrumented('ironic')
     def get_ironic_node(self, node_uuid):
         return self.ironicclient.node.get(node_uuid)
 
+    @instrumentation.instrumented('ironic')
     def delete_ironic_node(self, node_uuid):
         return self.ironicclient.node.delete(node_uuid)
 
+    @instrumentation.instrumented('ironic')
     def node_set_maintenance(self, node_uuid, maintenance_mode, maint_reason):
         return self.ironicclient.node.set_maintenance(
             node_uuid,
@@ -43,28 +155,137 @@ class Facade(object):
             maint_reason=maint_reason
         )
 
+    def nodes_set_maintenance(self, node_uuids, maintenance_mode,
+                              maint_reason=None, max_concurrency=None):
+        """Set or unset the maintenance mode of many nodes.
+
+        :param node_uuids: UUIDs of the nodes.
+        :param maintenance_mode: Whether to set or unset the maintenance.
+        :param maint_reason: Reason of the maintenance.
+        :param max_concurrency: Maximum number of nodes handled at once.
+                                Defaults to the batch_max_concurrency option.
+        :returns: List of a NodeResult per node, in the given order.
+        """
+        return self._run_batch(
+            lambda node_uuid: self.node_set_maintenance(
+                node_uuid, maintenance_mode, maint_reason),
+            node_uuids, lambda node_uuid: node_uuid, max_concurrency)
+
+    @instrumentation.instrumented('ironic')
     def create_ironic_node(self, **attrs):
         return self.ironicclient.node.create(**attrs)
 
+    @instrumentation.instrumented('ironic')
     def set_node_provision_state(self, node, state):
         return self.ironicclient.node.set_provision_state(node.uuid, state)
 
+    def set_nodes_provision_state(self, nodes, state, max_concurrency=None):
+        """Move many nodes to a provision state.
+
+        :param nodes: Ironic nodes to be moved.
+        :param state: Provision state target.
+        :param max_concurrency: Maximum number of nodes handled at once.
+                                Defaults to the batch_max_concurrency option.
+        :returns: List of a NodeResult per node, in the given order.
+        """
+        return self._run_batch(
+            lambda node: self.set_node_provision_state(node, state),
+            nodes, lambda node: node.uuid, max_concurrency)
+
+    def _run_batch(self, action, items, get_node_uuid, max_concurrency):
+        # NOTE: The items of a node run one at a time, in their order, and
+        # are skipped once one of them fails. Distinct nodes run
+        # concurrently.
+        node_items = collections.OrderedDict()
+        for index, item in enumerate(items):
+            node_items.setdefault(get_node_uuid(item), []).append(
+                (index, item))
+        results = [None] * sum(len(indexed_items)
+                               for indexed_items in node_items.values())
+
+        def run_node(node_uuid, indexed_items):
+            error = None
+            for index, item in indexed_items:
+                if error is not None:
+                    results[index] = NodeResult(
+                        node_uuid, 'Skipped after a previous failure: %s' %
+                        error)
+                    continue
+                try:
+                    action(item)
+                except Exception as exc:
+                    error = six.text_type(exc)
+                    LOG.error("Batch operation failed for node %(node)s: "
+                              "%(error)s" % {'node': node_uuid,
+                                             'error': error})
+                results[index] = NodeResult(node_uuid, error)
+
+        max_concurrency = (max_concurrency or
+                           CONF.DEFAULT.batch_max_concurrency)
+        executor = futures.ThreadPoolExecutor(
+            max_workers=max(min(max_concurrency, len(node_items)), 1))
+        try:
+            for _ in executor.map(lambda args: run_node(*args),
+                                  node_items.items()):
+                pass
+        finally:
+            executor.shutdown()
+        return results
+
+    @instrumentation.instrumented('ironic')
+    def get_ironic_endpoint_and_token(self):
+        """Get the Ironic API endpoint and a valid authentication token.
+
+        :returns: A tuple with the Ironic API endpoint URL and the token.
+        """
+        http_client = self.ironicclient.http_client
+        return http_client.get_endpoint(), http_client.get_token()
+
     # =========================================================================
     # OneView actions
     # =========================================================================
 
+    @instrumentation.instrumented('oneview')
     def get_server_profile_template(self, spt_uuid):
         """Get HPE OneView Server Profile Template by UUID.
 
         :param spt_uuid: UUID of the Server Profile Template.
         :returns: Server Profile Template object.
         """
-        return self.oneview_client.server_profile_templates.get(spt_uuid)
+        return self.oneview_cache.get(
+            ('server-profile-templates', spt_uuid),
+            functools.partial(
+                self.oneview_client.server_profile_templates.get, spt_uuid),
+            self._is_oneview_resource_unchanged)
+
+    def _is_oneview_resource_unchanged(self, resource):
+        """Check a cached resource against its OneView index entry.
+
+        The index entry is much smaller than the resource itself and
+        carries the same eTag and modified fields.
+
+        :param resource: OneView resource as previously fetched.
+        :returns: True if OneView still has the same version of resource.
+        """
+        version = (resource.get('eTag'), resource.get('modified'))
+        if version == (None, None):
+            return False
+        try:
+            index_entry = self.oneview_client.index_resources.get(
+                resource.get('uri'))
+        except client_exception.HPOneViewException as ex:
+            LOG.debug("Failed to revalidate %(uri)s: %(error)s" %
+                      {'uri': resource.get('uri'), 'error': ex.msg})
+            return False
+        return version == (index_entry.get('eTag'),
+                           index_entry.get('modified'))
 
+    @instrumentation.instrumented('oneview')
     def get_server_hardware(self, node_info):
         server_hardware_uri = node_info.get('server_hardware_uri')
         return self.oneview_client.server_hardware.get(server_hardware_uri)
 
+    @instrumentation.instrumented('oneview')
     def filter_server_hardware_available(self, filters=''):
         """Get all HPE OneView Server Hardware.
 
@@ -74,8 +295,56 @@ class Facade(object):
         """
         return self.oneview_client.server_hardware.get_all(filter=filters)
 
+    @instrumentation.instrumented('oneview')
+    def iter_server_hardware_available(self, filters='', page_size=None,
+                                       fields=SERVER_HARDWARE_FIELDS):
+        """Iterate over HPE OneView Server Hardware, one page at a time.
+
+        Only a page of Server Hardware is held in memory at once, and only
+        the requested fields are transferred.
+
+        :param filters: Filter the Server Hardware you want to return.
+                        ex.: serverHardwareTypeUri='rest/111-222-333'
+        :param page_size: Number of Server Hardware fetched per request.
+                          Defaults to the page_size option.
+        :param fields: List of Server Hardware fields to be returned, or
+                       None for the whole Server Hardware.
+        :returns: Generator of the filtered Server Hardware.
+        """
+        page_size = page_size or CONF.oneview.page_size
+        if isinstance(filters, six.string_types):
+            filters = [filters] if filters else []
+        query = ''.join('&filter=%s' % parse.quote(f) for f in filters)
+        if fields:
+            query += '&fields=%s' % parse.quote(','.join(fields))
+
+        start = 0
+        while True:
+            page = self.oneview_client.connection.get(
+                '%s?start=%d&count=%d%s' % (SERVER_HARDWARE_URI, start,
+                                            page_size, query))
+            members = list(page.get('members') or [])
+            for server_hardware in members:
+                yield server_hardware
+            start += len(members)
+            if not members or not page.get('nextPageUri'):
+                break
+
+    @instrumentation.instrumented('oneview')
     def get_server_hardware_remote_console_url(self, node_info):
         server_hardware_uri = node_info.get('server_hardware_uri')
         return self.oneview_client.server_hardware.get_remote_console_url(
             server_hardware_uri
         )
+
+
+def _get_node_filters(drivers, provision_states):
+    """Get the Ironic API filters of each driver and provision state pair."""
+    for driver, provision_state in itertools.product(
+            drivers or [None], provision_states or [None]):
+        filters = {}
+        if driver:
+            filters['driver'] = driver
+        if provision_state:
+            filters['provision_state'] = provision_state
+        yield filters
@@ -0,0 +1,178 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Instrumentation of the calls to Ironic, Keystone and OneView.
+
+Instrumented calls are reported to the registered observers and, when
+enabled, exported as OpenTelemetry spans. While instrumentation is
+disabled an instrumented call costs a single flag check.
+"""
+
+import collections
+import contextlib
+import functools
+import inspect
+import time
+
+from oslo_log import log as logging
+from oslo_utils import importutils
+
+from ironic_oneviewd.conf import CONF
+from ironic_oneviewd import metrics
+
+LOG = logging.getLogger(__name__)
+
+CallRecord = collections.namedtuple(
+    'CallRecord', ['backend', 'method', 'duration', 'size', 'error'])
+
+_enabled = False
+_tracer = None
+_observers = []
+
+
+def setup():
+    """Enable the instrumentation as set in the configuration."""
+    global _enabled, _tracer
+    _enabled = CONF.instrumentation.enabled
+    if not _enabled:
+        return
+
+    if CONF.instrumentation.opentelemetry:
+        trace = importutils.try_import('opentelemetry.trace')
+        if trace is None:
+            LOG.warning("OpenTelemetry spans are enabled but "
+                        "opentelemetry-api is not installed.")
+        else:
+            _tracer = trace.get_tracer('ironic_oneviewd')
+
+    for observer in (log_call, metrics.observe_call):
+        register_observer(observer)
+
+
+def register_observer(observer):
+    """Register a function called with the CallRecord of each call."""
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def unregister_observer(observer):
+    if observer in _observers:
+        _observers.remove(observer)
+
+
+def log_call(record):
+    if record.error is not None:
+        LOG.debug("%(backend)s %(method)s failed in %(duration).3fs: "
+                  "%(error)s" % record._asdict())
+    elif record.duration >= CONF.instrumentation.slow_call_threshold:
+        LOG.warning("%(backend)s %(method)s took %(duration).3fs." %
+                    record._asdict())
+
+
+def _get_size(result):
+    """Get the number of items returned by a call, if it is a list.
+
+    Other results, such as the dict of a single resource, have no size.
+    Generators are counted as they are iterated.
+    """
+    if isinstance(result, list):
+        return len(result)
+    return None
+
+
+def _notify(record):
+    for observer in _observers:
+        try:
+            observer(record)
+        except Exception as exc:
+            LOG.debug("Instrumentation observer %(observer)s failed: "
+                      "%(error)s" % {'observer': observer, 'error': exc})
+
+
+@contextlib.contextmanager
+def _span(backend, method):
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(
+            '%s.%s' % (backend, method),
+            attributes={'ironic_oneviewd.backend': backend}) as span:
+        yield span
+
+
+def _call(backend, method, func, args, kwargs):
+    started_at = time.time()
+    with _span(backend, method) as span:
+        try:
+            result = func(*args, **kwargs)
+        except Exception as exc:
+            _notify(CallRecord(backend, method, time.time() - started_at,
+                               None, exc))
+            raise
+        size = _get_size(result)
+        if span is not None and size is not None:
+            span.set_attribute('ironic_oneviewd.size', size)
+    _notify(CallRecord(backend, method, time.time() - started_at, size, None))
+    return result
+
+
+def _iterate(backend, method, func, args, kwargs):
+    # NOTE: Generators are timed until exhausted, with a span that is not
+    # made current, since the caller runs between the items.
+    span = None
+    if _tracer is not None:
+        span = _tracer.start_span(
+            '%s.%s' % (backend, method),
+            attributes={'ironic_oneviewd.backend': backend})
+    started_at = time.time()
+    size = 0
+    error = None
+    try:
+        for item in func(*args, **kwargs):
+            size += 1
+            yield item
+    except Exception as exc:
+        error = exc
+        if span is not None:
+            span.record_exception(exc)
+        raise
+    finally:
+        if span is not None:
+            span.set_attribute('ironic_oneviewd.size', size)
+            span.end()
+        _notify(CallRecord(backend, method, time.time() - started_at,
+                           size, error))
+
+
+def instrumented(backend):
+    """Decorate a method calling a backend to instrument its calls.
+
+    :param backend: Name of the backend called, such as 'ironic',
+                    'keystone' or 'oneview'.
+    """
+    def decorator(func):
+        method = func.__name__
+        generator = inspect.isgeneratorfunction(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            if generator:
+                return _iterate(backend, method, func, args, kwargs)
+            return _call(backend, method, func, args, kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,158 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+from concurrent import futures
+from ironicclient import exc as ironic_exc
+from oslo_log import log as logging
+import six
+
+from ironic_oneviewd.conf import CONF
+from ironic_oneviewd import utils
+
+LOG = logging.getLogger(__name__)
+
+NODE_FIELDS = ['uuid', 'name', 'driver_info']
+
+
+def node_name_from_server_hardware(server_hardware_uri):
+    """Get the name of the Ironic node enrolling a Server Hardware.
+
+    The name is deterministic, so it is the idempotency key of the
+    enrollment: Ironic refuses a second node with the same name.
+    """
+    return 'oneview-%s' % utils.uuid_from_uri(server_hardware_uri).lower()
+
+
+def get_node_attributes(server_hardware_uri, server_profile_template):
+    """Get the attributes of the Ironic node enrolling a Server Hardware.
+
+    :param server_hardware_uri: URI of the Server Hardware.
+    :param server_profile_template: Server Profile Template object the
+                                    Server Hardware was found with.
+    :returns: Dict of attributes for Facade.create_ironic_node.
+    """
+    capabilities = [
+        ('server_hardware_type_uri',
+         server_profile_template.get('serverHardwareTypeUri')),
+        ('server_profile_template_uri',
+         server_profile_template.get('uri')),
+        ('enclosure_group_uri',
+         server_profile_template.get('enclosureGroupUri'))
+    ]
+    driver_info = {'server_hardware_uri': server_hardware_uri}
+    if CONF.openstack.deploy_kernel_id:
+        driver_info['deploy_kernel'] = CONF.openstack.deploy_kernel_id
+    if CONF.openstack.deploy_ramdisk_id:
+        driver_info['deploy_ramdisk'] = CONF.openstack.deploy_ramdisk_id
+
+    return {
+        'name': node_name_from_server_hardware(server_hardware_uri),
+        'driver': (CONF.openstack.ironic_driver or
+                   utils.SUPPORTED_HARDWARE_TYPES[0]),
+        'driver_info': driver_info,
+        'properties': {'capabilities': ','.join(
+            '%s:%s' % (key, value) for key, value in capabilities if value)}
+    }
+
+
+class BulkEnroller(object):
+    """Enroll Server Hardware as Ironic nodes in rate limited batches.
+
+    Server Hardware already enrolled, by URI or by node name, is skipped,
+    so running the enrollment again never creates duplicated nodes.
+    """
+
+    def __init__(self, facade, batch_size=None, rate_limit=None):
+        self.facade = facade
+        self.batch_size = batch_size or CONF.inventory.enroll_batch_size
+        self.rate_limit = rate_limit or CONF.inventory.enroll_rate_limit
+
+    def enroll(self, server_hardware, dry_run=False):
+        """Enroll Server Hardware as Ironic nodes.
+
+        :param server_hardware: Dict of Server Hardware URIs to the Server
+                                Profile Template objects to enroll them with.
+        :param dry_run: Only report what would be enrolled.
+        :returns: Dict with the lists of Server Hardware URIs 'enrolled' and
+                  'skipped', and a dict of the 'failed' ones to their errors.
+        """
+        result = {'enrolled': [], 'skipped': [], 'failed': {}}
+        existing_names = set()
+        existing_hardware = set()
+        for node in self.facade.get_ironic_node_list(fields=NODE_FIELDS):
+            existing_names.add(node.name)
+            existing_hardware.add(utils.server_hardware_uri_from_node(node))
+
+        pending = []
+        for sh_uri in server_hardware:
+            if (sh_uri in existing_hardware or
+                    node_name_from_server_hardware(sh_uri) in existing_names):
+                result['skipped'].append(sh_uri)
+            else:
+                pending.append(sh_uri)
+        if dry_run:
+            result['enrolled'] = pending
+            return result
+
+        executor = futures.ThreadPoolExecutor(max_workers=self.batch_size)
+        try:
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start:start + self.batch_size]
+                started_at = time.time()
+                outcomes = executor.map(
+                    lambda sh_uri: self._enroll_node(
+                        sh_uri, server_hardware[sh_uri]), batch)
+                for sh_uri, (outcome, error) in zip(batch, outcomes):
+                    if outcome == 'failed':
+                        result['failed'][sh_uri] = error
+                    else:
+                        result[outcome].append(sh_uri)
+                # NOTE: Batches are paced to at most rate_limit nodes
+                # created per second.
+                remaining = (len(batch) / float(self.rate_limit) -
+                             (time.time() - started_at))
+                if remaining > 0 and start + self.batch_size < len(pending):
+                    time.sleep(remaining)
+        finally:
+            executor.shutdown()
+
+        LOG.info("Enrollment finished: %(enrolled)s Ironic nodes created, "
+                 "%(skipped)s Server Hardware already enrolled and "
+                 "%(failed)s failures." %
+                 {'enrolled': len(result['enrolled']),
+                  'skipped': len(result['skipped']),
+                  'failed': len(result['failed'])})
+        return result
+
+    def _enroll_node(self, server_hardware_uri, server_profile_template):
+        attrs = get_node_attributes(
+            server_hardware_uri, server_profile_template)
+        try:
+            node = self.facade.create_ironic_node(**attrs)
+        except ironic_exc.Conflict:
+            LOG.info("Server Hardware %(sh)s is already enrolled as Ironic "
+                     "node %(name)s." %
+                     {'sh': server_hardware_uri, 'name': attrs['name']})
+            return 'skipped', None
+        except Exception as ex:
+            LOG.error("Failed to enroll Server Hardware %(sh)s: %(error)s" %
+                      {'sh': server_hardware_uri, 'error': ex})
+            return 'failed', six.text_type(ex)
+        LOG.info("Server Hardware %(sh)s enrolled as Ironic node %(node)s." %
+                 {'sh': server_hardware_uri, 'node': node.uuid})
+        return 'enrolled', None
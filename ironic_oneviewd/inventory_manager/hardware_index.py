@@ -0,0 +1,115 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from ironic_oneviewd import utils
+
+
+class HardwareIndex(object):
+    """Index of the Server Hardware enrolled as Ironic nodes.
+
+    Maps Server Hardware URIs to the UUIDs of the Ironic nodes using them.
+    The index is kept across inventory cycles and only the nodes added,
+    removed or pointing to another Server Hardware are reindexed. It also
+    records which enrolled Server Hardware was found in OneView, or not, by
+    the current scan.
+    """
+
+    def __init__(self):
+        self.node_hardware = {}
+        self.hardware_nodes = {}
+        self.existing_hardware = set()
+        self.deleted_hardware = set()
+
+    def __contains__(self, server_hardware_uri):
+        return server_hardware_uri in self.hardware_nodes
+
+    def __len__(self):
+        return len(self.hardware_nodes)
+
+    def update(self, nodes):
+        """Update the index with the Ironic nodes of the current cycle.
+
+        :param nodes: Ironic nodes using OneView supported drivers.
+        :returns: Number of nodes reindexed.
+        """
+        current_hardware = dict(
+            (node.uuid, utils.server_hardware_uri_from_node(node))
+            for node in nodes)
+
+        reindexed = 0
+        for node_uuid in set(self.node_hardware) - set(current_hardware):
+            self._remove(node_uuid)
+            reindexed += 1
+        for node_uuid, server_hardware_uri in current_hardware.items():
+            if node_uuid not in self.node_hardware:
+                self._add(node_uuid, server_hardware_uri)
+                reindexed += 1
+            elif self.node_hardware[node_uuid] != server_hardware_uri:
+                self._remove(node_uuid)
+                self._add(node_uuid, server_hardware_uri)
+                reindexed += 1
+        return reindexed
+
+    def get_nodes(self, server_hardware_uri):
+        """Get the UUIDs of the Ironic nodes using a Server Hardware."""
+        return set(self.hardware_nodes.get(server_hardware_uri, ()))
+
+    def duplicated_hardware(self):
+        """Get the Server Hardware enrolled as more than one Ironic node.
+
+        :returns: Dict of Server Hardware URIs to sorted node UUIDs.
+        """
+        return dict((uri, sorted(node_uuids))
+                    for uri, node_uuids in self.hardware_nodes.items()
+                    if len(node_uuids) > 1)
+
+    def start_scan(self):
+        """Forget what the previous scan found in OneView."""
+        self.existing_hardware = set()
+        self.deleted_hardware = set()
+
+    def mark_existing(self, server_hardware_uris):
+        """Record Server Hardware URIs seen in OneView by this scan."""
+        for uri in server_hardware_uris:
+            if uri in self.hardware_nodes:
+                self.existing_hardware.add(uri)
+
+    def mark_deleted(self, server_hardware_uris):
+        """Record Server Hardware URIs not found in OneView by this scan."""
+        self.deleted_hardware.update(
+            uri for uri in server_hardware_uris if uri in self.hardware_nodes)
+
+    def unverified_hardware(self):
+        """Get the enrolled Server Hardware not yet seen by this scan."""
+        return (set(self.hardware_nodes) - self.existing_hardware -
+                self.deleted_hardware)
+
+    def _add(self, node_uuid, server_hardware_uri):
+        self.node_hardware[node_uuid] = server_hardware_uri
+        if server_hardware_uri:
+            self.hardware_nodes.setdefault(
+                server_hardware_uri, set()).add(node_uuid)
+
+    def _remove(self, node_uuid):
+        server_hardware_uri = self.node_hardware.pop(node_uuid)
+        node_uuids = self.hardware_nodes.get(server_hardware_uri)
+        if node_uuids is None:
+            return
+        node_uuids.discard(node_uuid)
+        if not node_uuids:
+            del self.hardware_nodes[server_hardware_uri]
+            self.existing_hardware.discard(server_hardware_uri)
+            self.deleted_hardware.discard(server_hardware_uri)
@@ -16,37 +16,182 @@
 
 import time
 
+from concurrent import futures
 from oslo_log import log as logging
 from oslo_utils import importutils
 
 from ironic_oneviewd.conf import CONF
+from ironic_oneviewd import coordination
+from ironic_oneviewd import exceptions
+from ironic_oneviewd.inventory_manager import enrollment
+from ironic_oneviewd.inventory_manager import hardware_index
+from ironic_oneviewd.inventory_manager import results
+from ironic_oneviewd import metrics
+from ironic_oneviewd import polling
 from ironic_oneviewd import utils
+from ironic_oneviewd import validation
 
 client_exception = importutils.try_import('hpOneView.exceptions')
 
 LOG = logging.getLogger(__name__)
 
+NODE_FIELDS = ['uuid', 'driver', 'maintenance', 'driver_info']
+# NOTE: The nodes are listed with the validation fields too when a
+# validation is due, so they are not listed a second time to validate them.
+VALIDATION_NODE_FIELDS = NODE_FIELDS + [
+    field for field in validation.VALIDATION_FIELDS
+    if field not in NODE_FIELDS]
+
 
 class InventoryManager(object):
-    def __init__(self, facade):
+    def __init__(self, facade, node_cache=None):
         self.facade = facade
+        self.node_cache = node_cache
+        self.hardware_index = hardware_index.HardwareIndex()
+        self.not_enrolled_hardware = {}
+        self.election = None
+        self.next_validation = 0
+        self.executor = futures.ThreadPoolExecutor(
+            max_workers=CONF.inventory.scan_workers
+        )
 
     def run(self):
+        # NOTE: Started in the inventory manager process, since tooz
+        # connections and heartbeats do not survive a fork.
+        self.election = coordination.get_leader_election('inventory')
+        if self.election:
+            self.election.start()
+        try:
+            self._run()
+        finally:
+            if self.election:
+                self.election.stop()
+
+    def is_leader(self):
+        """Tell whether this daemon instance checks the inventory."""
+        return self.election is None or self.election.is_leader()
+
+    def _run(self):
         check_interval = CONF.inventory.check_interval
+        polling_interval = polling.get_polling_interval(check_interval)
+        last_inventory = None
 
         while True:
-            ironic_nodes = self.facade.get_ironic_node_list()
-            profile_templates = CONF.inventory.server_profile_templates
-            oneview_nodes = [node for node in ironic_nodes
-                             if node.driver in utils.SUPPORTED_DRIVERS
-                             if node.maintenance is False]
-            if profile_templates:
-                self.check_not_enrolled_hardware(
-                    oneview_nodes, profile_templates)
-            else:
-                LOG.info("There is no Server Profile Templates to check.")
+            if not self.is_leader():
+                self.follow_leader()
+                time.sleep(CONF.coordination.leader_retry_interval)
+                continue
+
+            started_at = time.time()
+            try:
+                inventory = self.check_inventory()
+            except exceptions.CircuitOpenError as exc:
+                LOG.warning("Skipping the inventory check: %(error)s" %
+                            {'error': exc})
+                time.sleep(polling_interval.next(False))
+                continue
+            metrics.observe_cycle('inventory_manager',
+                                  time.time() - started_at)
+
+            # NOTE: Nodes or Server Hardware coming and going, as during a
+            # bulk enrollment, make the inventory worth checking again soon.
+            active = (last_inventory is not None and
+                      inventory != last_inventory)
+            last_inventory = inventory
+
+            time.sleep(polling_interval.next(active))
+
+    def check_inventory(self):
+        """Check the Server Hardware of OneView against the Ironic nodes.
+
+        :returns: Tuple with the set of UUIDs of the Ironic nodes checked
+                  and the set of URIs of the Server Hardware not enrolled.
+        :raises: CircuitOpenError while Ironic or OneView requests are
+                 paused.
+        """
+        validation_due = self.is_validation_due()
+        ironic_nodes = self._get_ironic_nodes(
+            VALIDATION_NODE_FIELDS if validation_due else NODE_FIELDS)
+        profile_templates = CONF.inventory.server_profile_templates
+        oneview_nodes = [node for node in ironic_nodes
+                         if node.driver in utils.SUPPORTED_DRIVERS
+                         if node.maintenance is False]
+        not_enrolled_hardware = []
+        if profile_templates:
+            not_enrolled_hardware = self.check_not_enrolled_hardware(
+                oneview_nodes, profile_templates)
+            LOG.debug("OneView cache: %(cache)s; OneView session: "
+                      "%(session)s" %
+                      {'cache': self.facade.oneview_cache.stats(),
+                       'session': self.facade.oneview_session.stats()})
+        else:
+            LOG.info("There is no Server Profile Templates to check.")
+
+        if CONF.inventory.auto_enroll and not_enrolled_hardware:
+            enrollment.BulkEnroller(self.facade).enroll(
+                self.not_enrolled_hardware)
+        if CONF.inventory.results_file:
+            results.publish(CONF.inventory.results_file,
+                            coordination.get_member_id(),
+                            not_enrolled_hardware)
+        if validation_due:
+            self.validate_nodes(oneview_nodes)
+        metrics.set_unenrolled_hardware(len(not_enrolled_hardware))
+        return (set(node.uuid for node in oneview_nodes),
+                set(not_enrolled_hardware))
+
+    def is_validation_due(self):
+        """Tell whether the nodes are due to be validated.
+
+        The nodes are validated every validation_interval seconds.
+        """
+        interval = CONF.inventory.validation_interval
+        now = time.time()
+        if not interval or now < self.next_validation:
+            return False
+        self.next_validation = now + interval
+        return True
+
+    def validate_nodes(self, nodes):
+        """Validate the nodes listed by the inventory check.
+
+        :param nodes: Ironic nodes with the VALIDATION_NODE_FIELDS.
+        :returns: The ValidationReport.
+        """
+        report = validation.validate_nodes(nodes)
+        validation.log_report(report)
+        metrics.set_invalid_nodes(report.counts)
+        return report
+
+    def follow_leader(self):
+        """Report the inventory results published by the leader.
+
+        The not enrolled Server Hardware found by the leader is exported
+        as the metric of this instance too.
+
+        :returns: The results, or None if none were published.
+        """
+        if not CONF.inventory.results_file:
+            return None
+        leader_results = results.read(CONF.inventory.results_file)
+        if leader_results:
+            LOG.debug("Inventory checked by %(leader)s %(age)ds ago found "
+                      "%(count)s not enrolled Server Hardware." %
+                      {'leader': leader_results['leader'],
+                       'age': time.time() - leader_results['checked_at'],
+                       'count': len(
+                           leader_results['not_enrolled_hardware'])})
+            metrics.set_unenrolled_hardware(
+                len(leader_results['not_enrolled_hardware']))
+        return leader_results
 
-            time.sleep(check_interval)
+    def _get_ironic_nodes(self, fields=NODE_FIELDS):
+        if self.node_cache:
+            return self.node_cache.get_nodes()
+        return self.facade.get_ironic_node_snapshot(
+            drivers=utils.SUPPORTED_DRIVERS,
+            maintenance=False,
+            fields=fields)
 
     def check_not_enrolled_hardware(self, oneview_nodes, profile_templates):
         """Check the Servers Hardware that is not enrolled in Ironic nodes.
@@ -57,37 +202,123 @@ class InventoryManager(object):
 
         :param oneview_nodes: Ironic nodes using OneView supported drivers.
         :param profile_templates: List of Server Profile Templates.
+        :returns: List of URIs of the Server Hardware not enrolled. They are
+                  also kept in not_enrolled_hardware, mapped to the Server
+                  Profile Template they were found with.
         """
-        enrolled_hardware = []
-        if oneview_nodes:
-            enrolled_hardware = [node.driver_info.get(
-                'server_hardware_uri') for node in oneview_nodes]
+        self.hardware_index.update(oneview_nodes)
+        self.hardware_index.start_scan()
+        self.not_enrolled_hardware = {}
+        not_enrolled_hardware = []
 
+        templates = self._scan(self.facade.get_server_profile_template,
+                               profile_templates)
+
+        # NOTE: Templates with the same Server Hardware Type and Enclosure
+        # Group share the same Server Hardware query.
+        hardware_filters = {}
         for server_profile_template in profile_templates:
-            try:
-                template_object = self.facade.get_server_profile_template(
-                    server_profile_template)
-                server_hardware = self._get_server_hardware_list(
-                    template_object)
-            except client_exception.HPOneViewException as ex:
-                LOG.error(ex.msg)
+            template_object = templates[server_profile_template][0]
+            if isinstance(template_object, Exception):
+                continue
+            hardware_filter = tuple(
+                self._get_server_hardware_filter(template_object))
+            hardware_filters.setdefault(hardware_filter, []).append(
+                server_profile_template)
+        hardware_scans = self._scan(self._check_server_hardware,
+                                    list(hardware_filters))
+
+        for server_profile_template in profile_templates:
+            template_object, template_time = templates[
+                server_profile_template]
+            if isinstance(template_object, Exception):
+                LOG.error(getattr(template_object, 'msg', template_object))
                 continue
+            hardware_filter = tuple(
+                self._get_server_hardware_filter(template_object))
             LOG.info("Checking not enrolled Server Hardware using the "
                      "Server Profile Template: %(spt)s" %
                      {'spt': template_object.get('uri')})
-            for sh in server_hardware:
-                if sh.get('uri') not in enrolled_hardware:
+            not_enrolled, hardware_time = hardware_scans[hardware_filter]
+            if isinstance(not_enrolled, Exception):
+                LOG.error(getattr(not_enrolled, 'msg', not_enrolled))
+                continue
+            # NOTE: Templates sharing a query also share its results, which
+            # are reported once, by the first of them.
+            if hardware_filters[hardware_filter][0] == server_profile_template:
+                for sh_uri in not_enrolled:
                     LOG.info("Server Hardware: %(sh)s is not enrolled "
-                             "as an Ironic node." % {'sh': sh.get('uri')})
+                             "as an Ironic node." % {'sh': sh_uri})
+                    self.not_enrolled_hardware[sh_uri] = template_object
+                not_enrolled_hardware.extend(not_enrolled)
+            LOG.info("Server Profile Template %(spt)s scanned in "
+                     "%(template).3fs fetching the template and "
+                     "%(hardware).3fs fetching the Server Hardware, shared "
+                     "by %(shared)s templates." %
+                     {'spt': server_profile_template,
+                      'template': template_time,
+                      'hardware': hardware_time,
+                      'shared': len(hardware_filters[hardware_filter])})
+
+        self.check_enrolled_hardware()
+        return not_enrolled_hardware
+
+    def check_enrolled_hardware(self):
+        """Check the Server Hardware enrolled as Ironic nodes.
+
+        Log the Server Hardware enrolled as more than one Ironic node, and
+        the nodes pointing to Server Hardware deleted from OneView. The
+        Server Hardware not seen by the Server Profile Template scans of
+        this cycle is looked up in a single listing of every Server
+        Hardware URI, rather than one by one.
+        """
+        duplicated_hardware = self.hardware_index.duplicated_hardware()
+        for sh_uri, node_uuids in sorted(duplicated_hardware.items()):
+            LOG.warning("Server Hardware: %(sh)s is enrolled as more than "
+                        "one Ironic node: %(nodes)s." %
+                        {'sh': sh_uri, 'nodes': ', '.join(node_uuids)})
+
+        if self.hardware_index.unverified_hardware():
+            try:
+                self.hardware_index.mark_existing(
+                    server_hardware.get('uri') for server_hardware in
+                    self.facade.iter_server_hardware_available(
+                        fields=['uri']))
+            except client_exception.HPOneViewException as ex:
+                LOG.error(ex.msg)
+                return
+            self.hardware_index.mark_deleted(
+                self.hardware_index.unverified_hardware())
 
-    def _get_server_hardware_list(self, server_profile_template):
-        """Get a list of Servers Hardware using same Server Profile Template.
+        for sh_uri in sorted(self.hardware_index.deleted_hardware):
+            LOG.warning("Ironic nodes %(nodes)s point to Server Hardware "
+                        "%(sh)s, which does not exist in OneView." %
+                        {'sh': sh_uri, 'nodes': ', '.join(
+                            sorted(self.hardware_index.get_nodes(sh_uri)))})
 
-        This method get all Servers Hardware compatible with the Server
-        Profile Template.
+    def _scan(self, func, items):
+        """Call func for each item over the scan worker pool.
 
-        :param server_profile_template:Server Profile Template object.
-        :returns: A sorted list by name of Servers Hardware.
+        :returns: Dict of each item to a tuple with the result of the call,
+                  or the OneView or CircuitOpenError exception it raised,
+                  and the time spent.
+        """
+        def timed_call(item):
+            start = time.time()
+            try:
+                result = func(item)
+            except (client_exception.HPOneViewException,
+                    exceptions.CircuitOpenError) as ex:
+                result = ex
+            return result, time.time() - start
+
+        return dict(zip(items, self.executor.map(timed_call, items)))
+
+    def _get_server_hardware_filter(self, server_profile_template):
+        """Get the filter of the Servers Hardware compatible with a template.
+
+        :param server_profile_template: Server Profile Template object.
+        :returns: List of OneView filters.
         """
         selected_sht_uri = server_profile_template.get(
             'serverHardwareTypeUri'
@@ -103,11 +334,25 @@ class InventoryManager(object):
             enclosure_group_uri = "serverGroupUri='%s'" % selected_eg_uri
             hardware_filter.append(enclosure_group_uri)
 
-        try:
-            hardware_list = self.facade.filter_server_hardware_available(
-                hardware_filter)
-        except client_exception.HPOneViewException as ex:
-            LOG.error(ex.msg)
+        return hardware_filter
+
+    def _check_server_hardware(self, hardware_filter):
+        """Compare the Servers Hardware matching a filter with the index.
 
-        return sorted(
-            hardware_list, key=lambda x: x.get('name').lower())
+        The Server Hardware is streamed from OneView a page at a time, so
+        the whole listing is never held in memory.
+
+        :param hardware_filter: OneView filters, as returned by
+                                _get_server_hardware_filter.
+        :returns: List of URIs of the Server Hardware not enrolled.
+        :raises: HPOneViewException if OneView fails to list the hardware.
+        """
+        not_enrolled = []
+        for server_hardware in self.facade.iter_server_hardware_available(
+                list(hardware_filter)):
+            sh_uri = server_hardware.get('uri')
+            if sh_uri in self.hardware_index:
+                self.hardware_index.mark_existing([sh_uri])
+            else:
+                not_enrolled.append(sh_uri)
+        return not_enrolled
@@ -0,0 +1,62 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Inventory results published by the daemon instance checking them."""
+
+import json
+import os
+import time
+
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+
+def publish(path, leader, not_enrolled_hardware):
+    """Publish the results of an inventory check.
+
+    The file is replaced at once, so readers never see partial results.
+
+    :param path: Path of the results file.
+    :param leader: Member ID of the instance that checked the inventory.
+    :param not_enrolled_hardware: URIs of the Server Hardware not enrolled.
+    """
+    results = {'leader': leader,
+               'checked_at': time.time(),
+               'not_enrolled_hardware': sorted(not_enrolled_hardware)}
+    temp_path = '%s.%s.tmp' % (path, os.getpid())
+    try:
+        with open(temp_path, 'w') as results_file:
+            json.dump(results, results_file)
+        os.rename(temp_path, path)
+    except (IOError, OSError) as exc:
+        LOG.warning("Failed to publish the inventory results to %(path)s: "
+                    "%(error)s" % {'path': path, 'error': exc})
+
+
+def read(path):
+    """Read the results of the last inventory check.
+
+    :param path: Path of the results file.
+    :returns: A dict with the leader, checked_at and not_enrolled_hardware
+              results, or None if there are no readable results.
+    """
+    try:
+        with open(path) as results_file:
+            return json.load(results_file)
+    except (IOError, OSError, ValueError) as exc:
+        LOG.debug("No inventory results to read from %(path)s: "
+                  "%(error)s" % {'path': path, 'error': exc})
+        return None
@@ -0,0 +1,90 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+
+from keystoneauth1.identity import generic
+from oslo_log import log as logging
+
+from ironic_oneviewd import instrumentation
+
+LOG = logging.getLogger(__name__)
+
+
+class CachedPassword(generic.Password):
+    """Keystone password authentication reusing its token.
+
+    The token is fetched once and only fetched again shortly before it
+    expires. When a token cache file is given, the token is also stored
+    there, readable only by its owner, so a restarted daemon keeps using
+    it instead of authenticating again.
+    """
+
+    def __init__(self, token_cache_file=None, **kwargs):
+        super(CachedPassword, self).__init__(**kwargs)
+        self.token_cache_file = token_cache_file
+        self.token_requests = 0
+        self.keystone_requests = 0
+        if token_cache_file:
+            self._load_token()
+
+    @instrumentation.instrumented('keystone')
+    def get_auth_ref(self, session, **kwargs):
+        auth_ref = super(CachedPassword, self).get_auth_ref(session, **kwargs)
+        self.keystone_requests += 1
+        return auth_ref
+
+    def get_access(self, session, **kwargs):
+        self.token_requests += 1
+        auth_ref = self.auth_ref
+        access = super(CachedPassword, self).get_access(session, **kwargs)
+        if access is not auth_ref and self.token_cache_file:
+            self._save_token()
+        return access
+
+    def stats(self):
+        return {'token_requests': self.token_requests,
+                'keystone_requests': self.keystone_requests,
+                'round_trips_avoided': max(
+                    self.token_requests - self.keystone_requests, 0)}
+
+    def _load_token(self):
+        try:
+            with open(self.token_cache_file) as token_cache:
+                cached = json.load(token_cache)
+        except (IOError, ValueError) as exc:
+            LOG.debug("Keystone token cache %(file)s not loaded: %(error)s" %
+                      {'file': self.token_cache_file, 'error': exc})
+            return
+        # NOTE: A token cached for other credentials is ignored.
+        if cached.get('cache_id') == self.get_cache_id():
+            self.set_auth_state(cached.get('auth_state'))
+
+    def _save_token(self):
+        cached = {'cache_id': self.get_cache_id(),
+                  'auth_state': self.get_auth_state()}
+        temp_file = '%s.%d' % (self.token_cache_file, os.getpid())
+        try:
+            fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                         0o600)
+            with os.fdopen(fd, 'w') as token_cache:
+                json.dump(cached, token_cache)
+            os.rename(temp_file, self.token_cache_file)
+        except (IOError, OSError) as exc:
+            LOG.warning("Failed to write the Keystone token cache "
+                        "%(file)s: %(error)s" %
+                        {'file': self.token_cache_file, 'error': exc})
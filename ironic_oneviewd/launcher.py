@@ -0,0 +1,35 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Entry point of the ironic-oneviewd command."""
+
+import argparse
+import sys
+
+from ironic_oneviewd import conf
+from ironic_oneviewd import metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('-c', '--config-file',
+                        default=conf.DEFAULT_CONFIG_FILE)
+    (options, args) = parser.parse_known_args(sys.argv[1:])
+    metrics.prepare(options.config_file)
+
+    # NOTE: Imported once the metrics directory is set, since the shell
+    # imports ironicclient, which imports prometheus_client.
+    from ironic_oneviewd import shell
+    shell.main()
@@ -14,23 +14,60 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from __future__ import print_function
+
+import json
+import multiprocessing
 from multiprocessing import Process
 from oslo_log import log as logging
+import six
 
+from ironic_oneviewd.conf import CONF
+from ironic_oneviewd import consistency
+from ironic_oneviewd import exceptions
 from ironic_oneviewd.facade import Facade
+from ironic_oneviewd import instrumentation
+from ironic_oneviewd.inventory_manager.enrollment import BulkEnroller
 from ironic_oneviewd.inventory_manager.manage import InventoryManager
+from ironic_oneviewd import metrics
+from ironic_oneviewd.node_cache import NodeSnapshotCache
 from ironic_oneviewd.node_manager.manage import NodeManager
+from ironic_oneviewd import utils
+from ironic_oneviewd import validation
 
 LOG = logging.getLogger(__name__)
 
+BATCH_FIELDS = ['uuid', 'name', 'driver', 'maintenance', 'provision_state',
+                'properties', 'driver_info']
+NODE_FILTER_KEYS = ('uuid', 'name', 'driver', 'provision_state')
+ONEVIEW_FILTER_KEYS = ('server_hardware_uri', 'server_hardware_type_uri',
+                       'enclosure_group_uri', 'server_profile_template_uri')
+FILTER_HELP = ('Only apply to the nodes matching the filter. May be given '
+               'more than once. Keys: %s.' %
+               ', '.join(NODE_FILTER_KEYS + ONEVIEW_FILTER_KEYS))
+ENCLOSURE_HELP = ('Only apply to the nodes of the Server Hardware in this '
+                  'OneView enclosure.')
+
 
-def do_oneview_daemon():
+def do_oneview_daemon(args=None):
     """Ironic OneView Daemon."""
     LOG.info('Starting Ironic OneView Daemon')
 
+    metrics.setup()
+    instrumentation.setup()
     facade = Facade()
-    node_manager = NodeManager(facade)
-    inventory_manager = InventoryManager(facade)
+    node_cache = None
+    if CONF.DEFAULT.node_cache_ttl > 0:
+        node_cache = NodeSnapshotCache(facade, multiprocessing.Manager())
+    if CONF.DEFAULT.engine == 'asyncio':
+        # NOTE: Only imported on Python 3, which can parse it
+        if six.PY2:
+            raise ImportError("Python 3 is required by the asyncio engine.")
+        from ironic_oneviewd.node_manager import async_engine
+        node_manager = async_engine.AsyncNodeManager(facade, node_cache)
+    else:
+        node_manager = NodeManager(facade, node_cache)
+    inventory_manager = InventoryManager(facade, node_cache)
 
     def execute():
         process1 = Process(target=node_manager.run)
@@ -39,7 +76,215 @@ def do_oneview_daemon():
         process2 = Process(target=inventory_manager.run)
         process2.start()
 
+        metrics.start_server()
+
         process1.join()
+        metrics.mark_process_dead(process1.pid)
         process2.join()
+        metrics.mark_process_dead(process2.pid)
 
     execute()
+
+
+@utils.arg('--template', metavar='<uuid>', action='append',
+           dest='templates',
+           help='UUID of a Server Profile Template whose Server Hardware '
+                'is enrolled. May be given more than once. Defaults to the '
+                '[inventory] server_profile_templates option.')
+@utils.arg('--batch-size', metavar='<size>', type=int,
+           help='Number of Ironic nodes created in parallel.')
+@utils.arg('--rate-limit', metavar='<nodes>', type=float,
+           help='Maximum number of Ironic nodes created per second.')
+@utils.arg('--dry-run', action='store_true',
+           help='Only show the Server Hardware that would be enrolled.')
+def do_enroll_bulk(args):
+    """Enroll the Server Hardware not enrolled as Ironic nodes."""
+    profile_templates = (args.templates or
+                         CONF.inventory.server_profile_templates)
+    if not profile_templates:
+        raise Exception("There is no Server Profile Templates to enroll "
+                        "Server Hardware from.")
+
+    instrumentation.setup()
+    facade = Facade()
+    inventory_manager = InventoryManager(facade)
+    oneview_nodes = [node for node in inventory_manager._get_ironic_nodes()
+                     if node.driver in utils.SUPPORTED_DRIVERS]
+    inventory_manager.check_not_enrolled_hardware(
+        oneview_nodes, profile_templates)
+
+    enroller = BulkEnroller(facade, args.batch_size, args.rate_limit)
+    result = enroller.enroll(inventory_manager.not_enrolled_hardware,
+                             dry_run=args.dry_run)
+
+    action = 'Would enroll' if args.dry_run else 'Enrolled'
+    for sh_uri in result['enrolled']:
+        print("%s %s" % (action, sh_uri))
+    for sh_uri, error in sorted(result['failed'].items()):
+        print("Failed %s: %s" % (sh_uri, error))
+    print("%(action)s %(enrolled)s Server Hardware, %(skipped)s already "
+          "enrolled, %(failed)s failed." %
+          {'action': action, 'enrolled': len(result['enrolled']),
+           'skipped': len(result['skipped']),
+           'failed': len(result['failed'])})
+    return 1 if result['failed'] else 0
+
+
+@utils.arg('--include-maintenance', action='store_true',
+           help='Also validate the nodes in maintenance.')
+def do_validate(args):
+    """Validate the OneView data of the Ironic nodes as a JSON report."""
+    facade = Facade()
+    nodes = facade.get_ironic_node_snapshot(
+        drivers=utils.SUPPORTED_DRIVERS,
+        maintenance=None if args.include_maintenance else False,
+        fields=validation.VALIDATION_FIELDS)
+    report = validation.validate_nodes(nodes)
+    print(json.dumps(report.to_dict(), indent=2, sort_keys=True))
+    return 1 if report.invalid_nodes else 0
+
+
+@utils.arg('--include-maintenance', action='store_true',
+           help='Also check the nodes in maintenance.')
+@utils.arg('--set-maintenance', action='store_true',
+           help='Put the drifted nodes in maintenance.')
+def do_check_consistency(args):
+    """Check the Ironic nodes against the Server Hardware in OneView."""
+    facade = Facade()
+    nodes = facade.get_ironic_node_snapshot(
+        drivers=utils.SUPPORTED_DRIVERS,
+        maintenance=None if args.include_maintenance else False,
+        fields=consistency.CONSISTENCY_FIELDS)
+    report = consistency.check_nodes(
+        facade, nodes, set_maintenance=args.set_maintenance)
+    print(json.dumps(report.to_dict(), indent=2, sort_keys=True))
+    return 1 if report.drifted_nodes else 0
+
+
+def _parse_filters(filters):
+    parsed = {}
+    for node_filter in filters or []:
+        key, sep, value = node_filter.partition('=')
+        if not sep or key not in NODE_FILTER_KEYS + ONEVIEW_FILTER_KEYS:
+            raise Exception("Invalid filter %(filter)s, expected "
+                            "<key>=<value> with a key out of: %(keys)s." %
+                            {'filter': node_filter,
+                             'keys': ', '.join(NODE_FILTER_KEYS +
+                                               ONEVIEW_FILTER_KEYS)})
+        parsed[key] = value
+    return parsed
+
+
+def _node_matches(node, filters):
+    oneview_info = None
+    for key, value in filters.items():
+        if key in NODE_FILTER_KEYS:
+            if getattr(node, key) != value:
+                return False
+            continue
+        if oneview_info is None:
+            try:
+                oneview_info = utils.get_node_info_from_node(node)
+            except exceptions.InvalidParameterValue:
+                return False
+        if oneview_info.get(key) != value:
+            return False
+    return True
+
+
+def _select_nodes(facade, args, maintenance):
+    """Get the nodes a batch subcommand applies to.
+
+    :param facade: Facade listing the nodes and the Server Hardware.
+    :param args: Parsed arguments, with the filters and the enclosure.
+    :param maintenance: Filter nodes by maintenance mode if not None.
+    :returns: List of the NodeRecord objects selected.
+    """
+    filters = _parse_filters(args.filters)
+    provision_states = None
+    if 'provision_state' in filters:
+        provision_states = [filters['provision_state']]
+    nodes = facade.get_ironic_node_snapshot(
+        drivers=utils.SUPPORTED_DRIVERS, provision_states=provision_states,
+        maintenance=maintenance, fields=BATCH_FIELDS)
+    if args.enclosure:
+        enclosure_hardware = set(
+            server_hardware['uri'] for server_hardware in
+            facade.iter_server_hardware_available(
+                filters="locationUri='%s'" % args.enclosure, fields=['uri']))
+        nodes = [node for node in nodes
+                 if utils.server_hardware_uri_from_node(node) in
+                 enclosure_hardware]
+    return [node for node in nodes if _node_matches(node, filters)]
+
+
+def _print_batch_results(action, nodes, results, dry_run):
+    if dry_run:
+        for node in nodes:
+            print("Would be %s: %s" % (action, node.uuid))
+        print("%(nodes)s nodes would be %(action)s." %
+              {'nodes': len(nodes), 'action': action})
+        return 0
+    failed = 0
+    for result in results:
+        if result.error is None:
+            print("%s: %s" % (action.capitalize(), result.node_uuid))
+        else:
+            failed += 1
+            print("Failed %s: %s" % (result.node_uuid, result.error))
+    print("%(succeeded)s nodes %(action)s, %(failed)s failed." %
+          {'succeeded': len(results) - failed, 'action': action,
+           'failed': failed})
+    return 1 if failed else 0
+
+
+@utils.arg('--on', action='store_true',
+           help='Put the nodes in maintenance.')
+@utils.arg('--off', action='store_true',
+           help='Take the nodes out of maintenance.')
+@utils.arg('--reason', metavar='<reason>',
+           help='Reason of the maintenance.')
+@utils.arg('--filter', metavar='<key>=<value>', action='append',
+           dest='filters', help=FILTER_HELP)
+@utils.arg('--enclosure', metavar='<uri>', help=ENCLOSURE_HELP)
+@utils.arg('--max-concurrency', metavar='<nodes>', type=int,
+           help='Maximum number of nodes handled at once.')
+@utils.arg('--dry-run', action='store_true',
+           help='Only show the nodes that would be changed.')
+def do_maintenance(args):
+    """Set or unset the maintenance mode of many Ironic nodes."""
+    if args.on == args.off:
+        raise Exception("Exactly one of --on and --off must be given.")
+
+    facade = Facade()
+    # NOTE: Only the nodes whose maintenance mode changes are selected.
+    nodes = _select_nodes(facade, args, maintenance=not args.on)
+    results = None
+    if not args.dry_run:
+        results = facade.nodes_set_maintenance(
+            [node.uuid for node in nodes], args.on, args.reason,
+            max_concurrency=args.max_concurrency)
+    action = ('set in maintenance' if args.on else
+              'taken out of maintenance')
+    return _print_batch_results(action, nodes, results, args.dry_run)
+
+
+@utils.arg('state', metavar='<state>',
+           help='Provision state target, such as manage or provide.')
+@utils.arg('--filter', metavar='<key>=<value>', action='append',
+           dest='filters', help=FILTER_HELP)
+@utils.arg('--enclosure', metavar='<uri>', help=ENCLOSURE_HELP)
+@utils.arg('--max-concurrency', metavar='<nodes>', type=int,
+           help='Maximum number of nodes handled at once.')
+@utils.arg('--dry-run', action='store_true',
+           help='Only show the nodes that would be moved.')
+def do_provision(args):
+    """Move many Ironic nodes, not in maintenance, to a provision state."""
+    facade = Facade()
+    nodes = _select_nodes(facade, args, maintenance=False)
+    results = None
+    if not args.dry_run:
+        results = facade.set_nodes_provision_state(
+            nodes, args.state, max_concurrency=args.max_concurrency)
+    return _print_batch_results('requested to %s' % args.state, nodes,
+                                results, args.dry_run)
@@ -0,0 +1,260 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Prometheus metrics of the daemon. Requires prometheus_client.
+
+Both manager processes record their metrics in the prometheus_client
+multiprocess mode, and the daemon process serves them all. Recording is a
+no-op until setup is called with metrics enabled.
+
+prometheus_client picks its multiprocess mode when first imported, which
+ironicclient does, so the entry point of the daemon calls prepare before
+importing anything else.
+"""
+
+import glob
+import os
+import sys
+import tempfile
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_utils import importutils
+
+from ironic_oneviewd.conf import CONF
+from ironic_oneviewd.conf import metrics as metrics_opts
+
+LOG = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+                   30.0, 60.0)
+CIRCUIT_STATES = ('closed', 'half_open', 'open')
+CYCLE_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+prometheus_client = None
+_metrics = {}
+_provision_states = set()
+
+
+def _make_multiprocess_dir(multiprocess_dir):
+    multiprocess_dir = (multiprocess_dir or
+                        tempfile.mkdtemp(prefix='ironic-oneviewd-metrics-'))
+    if not os.path.isdir(multiprocess_dir):
+        os.makedirs(multiprocess_dir)
+    for metric_file in glob.glob(os.path.join(multiprocess_dir, '*.db')):
+        os.remove(metric_file)
+    return multiprocess_dir
+
+
+def prepare(config_file):
+    """Set the metrics directory before prometheus_client is imported.
+
+    The [metrics] options are read on their own from the configuration
+    file, since the configuration of the daemon is only loaded later.
+    Nothing is set unless metrics are enabled.
+
+    :param config_file: Path to the configuration file of the daemon.
+    """
+    conf = cfg.ConfigOpts()
+    metrics_opts.register_opts(conf)
+    try:
+        conf(args=[], default_config_files=[config_file])
+    except cfg.Error:
+        # NOTE: Reported when the daemon loads its configuration
+        return
+    if conf.metrics.enabled:
+        os.environ['PROMETHEUS_MULTIPROC_DIR'] = _make_multiprocess_dir(
+            conf.metrics.multiprocess_dir)
+
+
+def setup():
+    """Set up the metrics of the daemon, before the managers are forked.
+
+    :returns: The multiprocess directory, or None if metrics are disabled.
+    """
+    global prometheus_client
+    if not CONF.metrics.enabled:
+        return None
+    multiprocess_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if multiprocess_dir is None:
+        if 'prometheus_client' in sys.modules:
+            LOG.warning("Metrics are disabled, prometheus_client was "
+                        "imported before the metrics directory was set and "
+                        "would not collect the metrics of the managers.")
+            return None
+        multiprocess_dir = _make_multiprocess_dir(
+            CONF.metrics.multiprocess_dir)
+        os.environ['PROMETHEUS_MULTIPROC_DIR'] = multiprocess_dir
+
+    prometheus_client = importutils.try_import('prometheus_client')
+    if prometheus_client is None:
+        LOG.warning("Metrics are enabled but prometheus_client is not "
+                    "installed.")
+        return None
+    importutils.import_module('prometheus_client.multiprocess')
+
+    histogram = prometheus_client.Histogram
+    counter = prometheus_client.Counter
+    gauge = prometheus_client.Gauge
+    _metrics.update({
+        'cycle_duration': histogram(
+            'ironic_oneviewd_cycle_duration_seconds',
+            'Duration of the manager cycles.', ['manager'],
+            buckets=CYCLE_BUCKETS, registry=None),
+        'nodes': gauge(
+            'ironic_oneviewd_nodes',
+            'Ironic nodes listed by the node manager per provision state.',
+            ['provision_state'], multiprocess_mode='livesum', registry=None),
+        'transitions': counter(
+            'ironic_oneviewd_transitions',
+            'Provision state transitions per target and outcome.',
+            ['target', 'outcome'], registry=None),
+        'request_duration': histogram(
+            'ironic_oneviewd_request_duration_seconds',
+            'Latency of the requests to Ironic, Keystone and OneView.',
+            ['backend', 'method'], buckets=LATENCY_BUCKETS, registry=None),
+        'call_duration': histogram(
+            'ironic_oneviewd_call_duration_seconds',
+            'Duration of the instrumented calls per backend, method and '
+            'outcome.', ['backend', 'method', 'outcome'],
+            buckets=LATENCY_BUCKETS, registry=None),
+        'queued_actions': gauge(
+            'ironic_oneviewd_queued_node_actions',
+            'Node actions waiting for a free thread of the executor.',
+            multiprocess_mode='livesum', registry=None),
+        'running_actions': gauge(
+            'ironic_oneviewd_running_node_actions',
+            'Node actions running on the executor.',
+            multiprocess_mode='livesum', registry=None),
+        'circuit_state': gauge(
+            'ironic_oneviewd_circuit_breaker_state',
+            'State of the circuit breaker of each backend: 0 closed, 1 '
+            'half open, 2 open.', ['backend'], multiprocess_mode='livemax',
+            registry=None),
+        'invalid_nodes': gauge(
+            'ironic_oneviewd_invalid_nodes',
+            'Ironic nodes with each issue found by the last validation.',
+            ['issue'], multiprocess_mode='livesum', registry=None),
+        'unenrolled_hardware': gauge(
+            'ironic_oneviewd_unenrolled_server_hardware',
+            'Server Hardware not enrolled as Ironic nodes.',
+            multiprocess_mode='livesum', registry=None),
+        'node_cache_requests': counter(
+            'ironic_oneviewd_node_cache_requests',
+            'Requests to the node snapshot cache per result: hit or miss.',
+            ['result'], registry=None),
+        'node_cache_staleness': histogram(
+            'ironic_oneviewd_node_cache_staleness_seconds',
+            'Age of the node snapshots served by the node snapshot cache.',
+            buckets=CYCLE_BUCKETS, registry=None),
+    })
+    return multiprocess_dir
+
+
+def get_registry():
+    """Get a registry collecting the metrics of every process."""
+    registry = prometheus_client.CollectorRegistry()
+    prometheus_client.multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def start_server():
+    """Serve the metrics of every process from the daemon process."""
+    if not _metrics:
+        return
+    prometheus_client.start_http_server(
+        CONF.metrics.port, addr=CONF.metrics.host, registry=get_registry())
+    LOG.info("Serving metrics on %(host)s:%(port)s." %
+             {'host': CONF.metrics.host, 'port': CONF.metrics.port})
+
+
+def mark_process_dead(pid):
+    if _metrics:
+        prometheus_client.multiprocess.mark_process_dead(pid)
+
+
+def observe_cycle(manager, duration):
+    if _metrics:
+        _metrics['cycle_duration'].labels(manager).observe(duration)
+
+
+def set_provision_states(nodes):
+    """Record how many of the listed nodes are in each provision state."""
+    if not _metrics:
+        return
+    counts = {}
+    for node in nodes:
+        counts[node.provision_state] = counts.get(node.provision_state, 0) + 1
+    _provision_states.update(counts)
+    for provision_state in _provision_states:
+        _metrics['nodes'].labels(provision_state).set(
+            counts.get(provision_state, 0))
+
+
+def count_transition(target, outcome):
+    if _metrics:
+        _metrics['transitions'].labels(target, outcome).inc()
+
+
+def observe_request(backend, method, duration):
+    if _metrics:
+        _metrics['request_duration'].labels(backend, method).observe(
+            duration)
+
+
+def observe_call(record):
+    """Record an instrumented call, from its CallRecord."""
+    if _metrics:
+        outcome = 'error' if record.error is not None else 'ok'
+        _metrics['call_duration'].labels(
+            record.backend, record.method, outcome).observe(record.duration)
+
+
+def set_node_actions(in_flight, max_workers):
+    """Record the node actions queued and running on the executor."""
+    if _metrics:
+        _metrics['running_actions'].set(min(in_flight, max_workers))
+        _metrics['queued_actions'].set(max(in_flight - max_workers, 0))
+
+
+def set_circuit_state(backend, state):
+    if _metrics:
+        _metrics['circuit_state'].labels(backend).set(
+            CIRCUIT_STATES.index(state))
+
+
+def set_invalid_nodes(counts):
+    """Record how many nodes have each validation issue."""
+    if _metrics:
+        for issue, count in counts.items():
+            _metrics['invalid_nodes'].labels(issue).set(count)
+
+
+def set_unenrolled_hardware(count):
+    if _metrics:
+        _metrics['unenrolled_hardware'].set(count)
+
+
+def observe_node_cache(hit, staleness):
+    """Record a request to the node snapshot cache.
+
+    :param hit: Whether the cached snapshot was served.
+    :param staleness: Age in seconds of the snapshot served.
+    """
+    if _metrics:
+        _metrics['node_cache_requests'].labels(
+            'hit' if hit else 'miss').inc()
+        _metrics['node_cache_staleness'].observe(staleness)
@@ -0,0 +1,87 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+from oslo_log import log as logging
+
+from ironic_oneviewd.conf import CONF
+from ironic_oneviewd import metrics
+from ironic_oneviewd import utils
+
+LOG = logging.getLogger(__name__)
+
+
+class NodeSnapshotCache(object):
+    """Ironic node snapshot shared by the daemon manager processes.
+
+    The snapshot lives in a multiprocessing manager owned by the parent
+    process. The first manager asking for nodes after the snapshot expires
+    polls Ironic and fills it; the other one reads it while it is fresh.
+    """
+
+    def __init__(self, facade, process_manager, ttl=None):
+        self.facade = facade
+        self.ttl = CONF.DEFAULT.node_cache_ttl if ttl is None else ttl
+        self._lock = process_manager.Lock()
+        self._snapshot = process_manager.dict(
+            nodes=[], timestamp=None, hits=0, misses=0,
+            staleness=0.0, max_staleness=0.0)
+
+    def get_nodes(self):
+        """Get the Ironic nodes using OneView drivers out of maintenance.
+
+        :returns: List of NodeRecord objects.
+        """
+        with self._lock:
+            now = time.time()
+            timestamp = self._snapshot['timestamp']
+            if timestamp is not None and now - timestamp < self.ttl:
+                staleness = now - timestamp
+                self._snapshot.update(
+                    hits=self._snapshot['hits'] + 1,
+                    staleness=staleness,
+                    max_staleness=max(staleness,
+                                      self._snapshot['max_staleness']))
+                nodes = self._snapshot['nodes']
+                metrics.observe_node_cache(True, staleness)
+            else:
+                nodes = self._fetch_nodes()
+                self._snapshot.update(
+                    nodes=nodes, timestamp=now,
+                    misses=self._snapshot['misses'] + 1,
+                    staleness=0.0)
+                metrics.observe_node_cache(False, 0.0)
+                LOG.info("Node snapshot cache refreshed with %(nodes)s "
+                         "nodes. %(stats)s" % {'nodes': len(nodes),
+                                               'stats': self.stats()})
+
+        return list(nodes)
+
+    def stats(self):
+        """Get the cache hit and staleness metrics.
+
+        :returns: A dict with the number of hits and misses, and the age in
+                  seconds of the last and the oldest snapshots served.
+        """
+        return dict((key, self._snapshot[key])
+                    for key in ('hits', 'misses', 'staleness',
+                                'max_staleness'))
+
+    def _fetch_nodes(self):
+        return self.facade.get_ironic_node_snapshot(
+            drivers=utils.SUPPORTED_DRIVERS,
+            maintenance=False)
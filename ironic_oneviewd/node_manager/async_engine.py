@@ -0,0 +1,223 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""asyncio engine for the node manager. Requires Python 3 and aiohttp."""
+
+import asyncio
+import functools
+import ssl
+import time
+
+from oslo_log import log as logging
+from oslo_utils import importutils
+
+from ironic_oneviewd.conf import CONF
+from ironic_oneviewd import exceptions
+from ironic_oneviewd import metrics
+from ironic_oneviewd.node_manager import manage
+from ironic_oneviewd import polling
+from ironic_oneviewd import throttling
+from ironic_oneviewd import utils
+
+aiohttp = importutils.try_import('aiohttp')
+
+LOG = logging.getLogger(__name__)
+
+
+class AsyncFacade(object):
+    """Asynchronous Ironic and OneView actions with bounded concurrency.
+
+    Ironic provision state changes are sent through a keep-alive aiohttp
+    session. OneView calls, made by the blocking hpOneView client, run on
+    the executor. Each backend has its own semaphore.
+    """
+
+    def __init__(self, facade, session, executor):
+        self.facade = facade
+        self.session = session
+        self.executor = executor
+        self.ironic_semaphore = asyncio.Semaphore(
+            CONF.DEFAULT.ironic_max_concurrency)
+        self.oneview_semaphore = asyncio.Semaphore(
+            CONF.DEFAULT.oneview_max_concurrency)
+        self.endpoint = None
+        self.token = None
+
+    async def authenticate(self):
+        """Refresh the Ironic endpoint and token from the Ironic client."""
+        loop = asyncio.get_event_loop()
+        endpoint, self.token = await loop.run_in_executor(
+            self.executor, self.facade.get_ironic_endpoint_and_token)
+        endpoint = endpoint.rstrip('/')
+        if endpoint.endswith('/v1'):
+            endpoint = endpoint[:-len('/v1')]
+        self.endpoint = endpoint
+
+    async def set_node_provision_state(self, node, state):
+        if self.token is None:
+            await self.authenticate()
+        url = '%s/v1/nodes/%s/states/provision' % (self.endpoint, node.uuid)
+        headers = {
+            'X-Auth-Token': self.token,
+            'X-OpenStack-Ironic-API-Version': utils.IRONIC_API_MICROVERSION
+        }
+        throttle = throttling.get_throttle('ironic')
+        delay = throttle.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+        async with self.ironic_semaphore:
+            try:
+                async with self.session.put(
+                        url, json={'target': state},
+                        headers=headers) as response:
+                    throttle.record(response.status)
+                    if response.status >= 400:
+                        raise exceptions.IronicAPIError(
+                            response.status, await response.text())
+            except aiohttp.ClientError:
+                throttle.record(None)
+                raise
+
+    async def call_oneview(self, method, *args, **kwargs):
+        """Run a blocking OneView facade method on the executor."""
+        loop = asyncio.get_event_loop()
+        async with self.oneview_semaphore:
+            return await loop.run_in_executor(
+                self.executor, functools.partial(method, *args, **kwargs))
+
+
+def get_ironic_ssl_context():
+    if CONF.openstack.insecure:
+        return False
+    context = ssl.create_default_context(cafile=CONF.openstack.cacert)
+    if CONF.openstack.cert:
+        context.load_cert_chain(CONF.openstack.cert)
+    return context
+
+
+class AsyncNodeManager(manage.NodeManager):
+    """Node manager taking node actions as asyncio tasks.
+
+    Node listing and authentication still go through the Ironic client on
+    the executor, while the provision state changes of a cycle all run
+    concurrently on the event loop, bounded by the Ironic semaphore.
+    """
+
+    def __init__(self, facade, node_cache=None):
+        if aiohttp is None:
+            raise ImportError("aiohttp is required by the asyncio engine.")
+        super(AsyncNodeManager, self).__init__(facade, node_cache)
+        self.loop = None
+        self.async_facade = None
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._run_async())
+
+    async def _run_async(self):
+        retry_interval = CONF.DEFAULT.retry_interval
+        async with self.open_session() as session:
+            self.async_facade = AsyncFacade(
+                self.facade, session, self.executor)
+            if CONF.notifications.enabled:
+                self.start_notification_listener()
+                retry_interval = CONF.notifications.reconciliation_interval
+            polling_interval = polling.get_polling_interval(retry_interval)
+
+            while True:
+                started_at = time.time()
+                results = await self.run_cycle()
+                metrics.observe_cycle('node_manager',
+                                      time.time() - started_at)
+                await asyncio.sleep(self.get_cycle_delay(
+                    polling_interval, bool(results or self.in_flight)))
+
+    def open_session(self):
+        connector = aiohttp.TCPConnector(
+            limit=CONF.DEFAULT.ironic_max_concurrency,
+            ssl=get_ironic_ssl_context())
+        return aiohttp.ClientSession(connector=connector)
+
+    async def run_cycle(self):
+        await self.loop.run_in_executor(self.executor, self.refresh_shards)
+        try:
+            ironic_nodes = await self.loop.run_in_executor(
+                self.executor, self._get_ironic_nodes)
+        except exceptions.CircuitOpenError as exc:
+            LOG.warning("Skipping the node manager cycle: %(error)s" %
+                        {'error': exc})
+            return []
+        metrics.set_provision_states(ironic_nodes)
+        changed_nodes = self.get_changed_nodes(ironic_nodes)
+        if not changed_nodes or self.is_dispatch_paused(len(changed_nodes)):
+            return []
+
+        await self.async_facade.authenticate()
+        return await asyncio.gather(
+            *[self.manage_node_provision_state_async(node)
+              for node in changed_nodes])
+
+    def dispatch(self, node):
+        # NOTE: Called from the notification listener thread
+        return asyncio.run_coroutine_threadsafe(
+            self.manage_node_provision_state_async(node), self.loop)
+
+    async def run_transition(self, node, target):
+        """Request a transition as TransitionTracker.run, without blocking.
+
+        :returns: True if Ironic accepted the transition, False if it is
+                  to be retried.
+        """
+        transition = self.transitions.start(node, target)
+        transition.attempts += 1
+        try:
+            await self.async_facade.set_node_provision_state(node, target)
+        except exceptions.CircuitOpenError:
+            self.transitions.paused(transition)
+            raise
+        except Exception as exc:
+            if self.transitions.retry_delay(transition, exc) is None:
+                raise
+            return False
+        self.transitions.succeeded(transition)
+        return True
+
+    async def manage_node_provision_state_async(self, node):
+        if node.uuid in self.in_flight:
+            return None
+        self.in_flight[node.uuid] = node.provision_state
+
+        started_at = time.time()
+        confirmed = True
+        try:
+            target = self.get_provision_target(node)
+            if target:
+                confirmed = await self.run_transition(node, target)
+        except Exception as exc:
+            LOG.error("Failed to manage node %(node)s: %(error)s" %
+                      {'node': node.uuid, 'error': exc})
+            confirmed = False
+        finally:
+            self.in_flight.pop(node.uuid, None)
+
+        self.confirm_node_actions(node, confirmed)
+        LOG.debug("Actions for node %(node)s in %(state)s state finished "
+                  "in %(latency).3fs: %(outcome)s." %
+                  {'node': node.uuid, 'state': node.provision_state,
+                   'latency': time.time() - started_at,
+                   'outcome': 'confirmed' if confirmed else 'failed'})
+        return confirmed
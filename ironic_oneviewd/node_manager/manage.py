@@ -14,12 +14,20 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
 import time
 
 from concurrent import futures
 from oslo_log import log as logging
 
 from ironic_oneviewd.conf import CONF
+from ironic_oneviewd import coordination
+from ironic_oneviewd import exceptions
+from ironic_oneviewd import metrics
+from ironic_oneviewd.node_manager import notifications
+from ironic_oneviewd.node_manager import transitions
+from ironic_oneviewd import polling
+from ironic_oneviewd import throttling
 from ironic_oneviewd import utils
 
 LOG = logging.getLogger(__name__)
@@ -33,76 +41,373 @@ ACTION_STATES = [ENROLL_PROVISION_STATE,
                  MANAGEABLE_PROVISION_STATE,
                  INSPECTION_FAILED_PROVISION_STATE]
 
+NODE_FIELDS = ['uuid', 'driver', 'maintenance', 'provision_state',
+               'properties', 'last_error', 'updated_at']
+
+
+def node_fingerprint(node):
+    """Get the fields whose change makes a node worth evaluating again."""
+    return (node.provision_state, node.maintenance,
+            getattr(node, 'updated_at', None), node.last_error)
+
 
 class NodeManager(object):
-    def __init__(self, facade):
+    def __init__(self, facade, node_cache=None):
         self.facade = facade
+        self.node_cache = node_cache
         self.max_workers = CONF.DEFAULT.rpc_thread_pool_size
         self.executor = futures.ThreadPoolExecutor(
             max_workers=self.max_workers
         )
+        self.dispatch_slots = threading.BoundedSemaphore(
+            self.max_workers + CONF.DEFAULT.dispatch_queue_size)
+        self.in_flight = {}
+        self.in_flight_lock = threading.Lock()
+        self.dirty_nodes = set()
+        self.fingerprints = {}
+        self.fingerprints_lock = threading.Lock()
+        self.transitions = transitions.TransitionTracker()
+        self.shards = None
+        self.ironic_breaker = throttling.get_throttle('ironic').breaker
+        self.changed_nodes_count = 0
+        self.unchanged_nodes_count = 0
+        self.listener = None
 
     def run(self):
+        self.start_sharding()
+        try:
+            self._run()
+        finally:
+            if self.shards:
+                self.shards.stop()
+
+    def _run(self):
         retry_interval = CONF.DEFAULT.retry_interval
+        if CONF.notifications.enabled:
+            self.start_notification_listener()
+            # NOTE: Polling remains as a safety net for lost notifications
+            retry_interval = CONF.notifications.reconciliation_interval
+        polling_interval = polling.get_polling_interval(retry_interval)
 
         while True:
-            ironic_nodes = self.facade.get_ironic_node_list()
-            provide_nodes = [node for node in ironic_nodes
-                             if node.driver in utils.SUPPORTED_DRIVERS
-                             if node.maintenance is False
-                             if node.provision_state in ACTION_STATES]
-            if provide_nodes:
-                LOG.info("%(nodes)s Ironic nodes has been taken." %
-                         {"nodes": len(provide_nodes)})
-                self.executor.map(
-                    self.manage_node_provision_state, provide_nodes)
-            else:
-                LOG.info("No Ironic nodes to manage.")
+            started_at = time.time()
+            self.refresh_shards()
+            try:
+                ironic_nodes = self._get_ironic_nodes()
+            except exceptions.CircuitOpenError as exc:
+                LOG.warning("Skipping the node manager cycle: %(error)s" %
+                            {'error': exc})
+                time.sleep(polling_interval.next(bool(self.in_flight)))
+                continue
+            changed_nodes = self.get_changed_nodes(ironic_nodes)
+            for index, node in enumerate(changed_nodes):
+                if self.is_dispatch_paused(len(changed_nodes) - index):
+                    break
+                self.dispatch(node)
+            metrics.set_provision_states(ironic_nodes)
+            metrics.set_node_actions(len(self.in_flight), self.max_workers)
+            metrics.observe_cycle('node_manager', time.time() - started_at)
 
-            time.sleep(retry_interval)
+            if self.in_flight:
+                LOG.info("%(outstanding)s Ironic node actions are still in "
+                         "progress." % {'outstanding': len(self.in_flight)})
+            LOG.debug("Keystone session: %(keystone)s; transitions: "
+                      "%(transitions)s; Ironic circuit breaker: "
+                      "%(breaker)s" %
+                      {'keystone': self.facade.keystone_session.auth.stats(),
+                       'transitions': self.transitions.stats(),
+                       'breaker': self.ironic_breaker.stats()})
 
-    def manage_node_provision_state(self, node):
-        if node.provision_state == ENROLL_PROVISION_STATE:
-            self.take_enroll_state_actions(node)
-        elif node.provision_state == MANAGEABLE_PROVISION_STATE:
-            self.take_manageable_state_actions(node)
-        elif node.provision_state == INSPECTION_FAILED_PROVISION_STATE:
-            self.take_inspect_failed_state_actions(node)
+            time.sleep(self.get_cycle_delay(
+                polling_interval, bool(changed_nodes or self.in_flight)))
+
+    def get_cycle_delay(self, polling_interval, active):
+        """Get the time to wait before the next cycle.
+
+        Transition retries scheduled before the next poll bring it
+        forward, though not closer than the minimum polling interval.
+
+        :param polling_interval: Polling interval of the manager.
+        :param active: Whether the last cycle found work to be done.
+        :returns: Delay in seconds.
+        """
+        delay = polling_interval.next(active)
+        retry_in = self.transitions.next_retry_in()
+        if retry_in is not None:
+            delay = min(delay, max(retry_in,
+                                   polling.get_min_polling_interval()))
+        return delay
+
+    def start_sharding(self):
+        # NOTE: Started in the node manager process, since tooz
+        # connections and heartbeats do not survive a fork.
+        self.shards = coordination.get_shard_coordinator()
+        if self.shards:
+            self.shards.start()
+            LOG.info("Managing the nodes owned by %(member)s in "
+                     "coordination group %(group)s." %
+                     {'member': self.shards.member_id,
+                      'group': CONF.coordination.group_id})
+
+    def refresh_shards(self):
+        if self.shards and self.shards.refresh():
+            LOG.info("Node ownership changed: %(stats)s" %
+                     {'stats': self.shards.stats()})
+
+    def owns(self, node):
+        """Tell whether this daemon instance manages a node."""
+        return self.shards is None or self.shards.owns(node.uuid)
+
+    def is_dispatch_paused(self, pending):
+        """Tell whether node actions must wait for Ironic to recover.
+
+        :param pending: Number of node actions left to dispatch.
+        :returns: True while the Ironic circuit breaker is open.
+        """
+        if not self.ironic_breaker.is_open():
+            return False
+        LOG.warning("Ironic circuit breaker is open, pausing the actions "
+                    "of %(pending)s nodes until the next cycle." %
+                    {'pending': pending})
+        return True
+
+    def start_notification_listener(self):
+        self.listener = notifications.get_node_event_listener(
+            self.handle_node_event)
+        self.listener.start()
+        LOG.info("Listening to Ironic node notifications on topics: "
+                 "%(topics)s." % {'topics': CONF.notifications.topics})
+
+    def handle_node_event(self, node_uuid, blocking=True):
+        """Take the actions for a node reported by an Ironic notification.
+
+        A node whose actions are still in progress is marked dirty and
+        handled again once they finish.
+
+        :param node_uuid: UUID of the node that had its provision state or
+                          maintenance changed.
+        :param blocking: Whether to wait for room in the queue when it is
+                         full, rather than leaving the node to the next
+                         polling cycle.
+        """
+        with self.in_flight_lock:
+            if node_uuid in self.in_flight:
+                self.dirty_nodes.add(node_uuid)
+                return
 
-    def take_enroll_state_actions(self, node):
-        LOG.info("Taking enroll state actions for node %(node)s." %
-                 {'node': node.uuid})
         try:
-            self.facade.set_node_provision_state(node, 'manage')
+            node = self.facade.get_ironic_node(node_uuid)
         except Exception as exc:
-            LOG.error(exc.message)
+            LOG.error("Failed to get node %(node)s from a notification: "
+                      "%(error)s" % {'node': node_uuid, 'error': exc})
+            return
+
+        if not (node.driver in utils.SUPPORTED_DRIVERS and
+                node.maintenance is False and
+                node.provision_state in ACTION_STATES):
+            return
+        if self.transitions.is_quarantined(node.uuid) or not self.owns(node):
+            return
+        if self.is_dispatch_paused(1):
+            return
+
+        with self.fingerprints_lock:
+            unchanged = (self.fingerprints.get(node.uuid) ==
+                         node_fingerprint(node))
+        if not unchanged:
+            self.dispatch(node, blocking)
+
+    def dispatch(self, node, blocking=True):
+        """Queue the actions of a node to be taken by the executor.
+
+        A node whose actions are still queued or running is not queued
+        again. When the queue is full this blocks until a worker is free,
+        unless blocking is False.
+
+        :param node: Ironic node in an action state.
+        :param blocking: Whether to wait for room in the queue when it is
+                         full.
+        :returns: The future of the node actions, or None if they are
+                  already in progress or the queue is full.
+        """
+        if node.uuid in self.in_flight:
+            LOG.debug("Actions for node %(node)s are already in "
+                      "progress." % {'node': node.uuid})
+            return None
+
+        if not self.dispatch_slots.acquire(blocking):
+            LOG.debug("No room to queue the actions of node %(node)s, "
+                      "leaving it to the next cycle." % {'node': node.uuid})
+            return None
+        with self.in_flight_lock:
+            if node.uuid in self.in_flight:
+                self.dispatch_slots.release()
+                return None
+            self.in_flight[node.uuid] = node.provision_state
 
-    def take_manageable_state_actions(self, node):
-        LOG.info("Taking manageable state actions for node %(node)s." %
-                 {'node': node.uuid})
+        started_at = time.time()
         try:
+            future = self.executor.submit(
+                self.manage_node_provision_state, node)
+        except Exception:
+            self._release(node)
+            raise
+
+        def _done(future):
+            if self._release(node):
+                # NOTE: Handled by a worker, since this callback may run
+                # in the dispatching thread. The worker must not wait for
+                # a queue slot, which may be held by tasks queued behind
+                # it, so a full queue leaves the node to the next cycle.
+                self.executor.submit(self.handle_node_event, node.uuid,
+                                     False)
+            latency = time.time() - started_at
+            if future.exception():
+                LOG.error("Actions for node %(node)s in %(state)s state "
+                          "raised an error after %(latency).3fs: "
+                          "%(error)s" % {'node': node.uuid,
+                                         'state': node.provision_state,
+                                         'latency': latency,
+                                         'error': future.exception()})
+                return
+            LOG.debug("Actions for node %(node)s in %(state)s state "
+                      "finished in %(latency).3fs: %(outcome)s." %
+                      {'node': node.uuid, 'state': node.provision_state,
+                       'latency': latency,
+                       'outcome': ('confirmed' if future.result()
+                                   else 'failed')})
+
+        future.add_done_callback(_done)
+        return future
+
+    def _release(self, node):
+        """Release a node, telling whether it was marked dirty meanwhile."""
+        with self.in_flight_lock:
+            self.in_flight.pop(node.uuid, None)
+            dirty = node.uuid in self.dirty_nodes
+            self.dirty_nodes.discard(node.uuid)
+        self.dispatch_slots.release()
+        return dirty
+
+    def _get_ironic_nodes(self):
+        if self.node_cache:
+            return self.node_cache.get_nodes()
+        return self.facade.get_ironic_node_snapshot(
+            drivers=utils.SUPPORTED_DRIVERS,
+            provision_states=ACTION_STATES,
+            maintenance=False,
+            fields=NODE_FIELDS)
+
+    def get_changed_nodes(self, ironic_nodes):
+        """Get the nodes whose actions must be taken on this cycle.
+
+        :param ironic_nodes: Ironic nodes listed on this cycle.
+        :returns: List of nodes in action states that changed since their
+                  actions were last confirmed.
+        """
+        action_nodes = [node for node in ironic_nodes
+                        if node.driver in utils.SUPPORTED_DRIVERS
+                        if node.maintenance is False
+                        if node.provision_state in ACTION_STATES
+                        if self.owns(node)]
+        self.transitions.prune(set(node.uuid for node in action_nodes))
+        provide_nodes = [node for node in action_nodes
+                         if not self.transitions.is_quarantined(node.uuid)
+                         if not self.transitions.is_retry_pending(node.uuid)]
+        changed_nodes = self._get_changed_nodes(provide_nodes)
+        if changed_nodes:
+            LOG.info("%(nodes)s Ironic nodes has been taken. "
+                     "%(unchanged)s nodes are unchanged since the last "
+                     "cycle." % {"nodes": len(changed_nodes),
+                                 "unchanged": self.unchanged_nodes_count})
+        elif provide_nodes:
+            LOG.info("No changes on the %(nodes)s Ironic nodes to "
+                     "manage." % {"nodes": len(provide_nodes)})
+        else:
+            LOG.info("No Ironic nodes to manage.")
+        return changed_nodes
+
+    def _get_changed_nodes(self, nodes):
+        """Get the nodes changed since their actions were last confirmed.
+
+        Fingerprints of nodes that left the action states are dropped, so
+        they are evaluated again if they ever come back.
+
+        :param nodes: Ironic nodes in action states.
+        :returns: List of nodes whose actions must be taken.
+        """
+        with self.fingerprints_lock:
+            node_uuids = set(node.uuid for node in nodes)
+            for node_uuid in list(self.fingerprints):
+                if node_uuid not in node_uuids:
+                    del self.fingerprints[node_uuid]
+
+            changed_nodes = [
+                node for node in nodes
+                if self.fingerprints.get(node.uuid) != node_fingerprint(node)]
+
+        self.changed_nodes_count = len(changed_nodes)
+        self.unchanged_nodes_count = len(nodes) - len(changed_nodes)
+        return changed_nodes
+
+    def manage_node_provision_state(self, node):
+        # NOTE: A transition to be retried is not confirmed, so the node is
+        # dispatched again once its retry is due.
+        confirmed = True
+        try:
+            target = self.get_provision_target(node)
+            if target:
+                confirmed = self.transitions.run(
+                    node, target, self.facade.set_node_provision_state)
+        except Exception as exc:
+            LOG.error("Failed to manage node %(node)s: %(error)s" %
+                      {'node': node.uuid, 'error': exc})
+            confirmed = False
+
+        self.confirm_node_actions(node, confirmed)
+        return confirmed
+
+    def confirm_node_actions(self, node, confirmed):
+        # NOTE: Nodes whose actions failed are not fingerprinted, so they
+        # are taken again on the next cycle even if nothing changed.
+        with self.fingerprints_lock:
+            if confirmed:
+                self.fingerprints[node.uuid] = node_fingerprint(node)
+            else:
+                self.fingerprints.pop(node.uuid, None)
+
+    def get_provision_target(self, node):
+        """Get the provision state target the node must be moved to.
+
+        :param node: Ironic node in an action state.
+        :returns: The provision state target, or None if the node must be
+                  left as it is.
+        """
+        if node.provision_state == ENROLL_PROVISION_STATE:
+            LOG.info("Taking enroll state actions for node %(node)s." %
+                     {'node': node.uuid})
+            return 'manage'
+
+        elif node.provision_state == MANAGEABLE_PROVISION_STATE:
+            LOG.info("Taking manageable state actions for node %(node)s." %
+                     {'node': node.uuid})
             if (CONF.openstack.inspection_enabled and
                     not utils.node_has_hardware_propeties(node)):
-                self.facade.set_node_provision_state(node, 'inspect')
-                return
+                return 'inspect'
             elif not (CONF.openstack.inspection_enabled or
                       utils.node_has_hardware_propeties(node)):
                 LOG.warning("Node %(node)s has missing hardware properties "
                             "and Inspection is not enabled." % {
                                 'node': node.uuid})
-            self.facade.set_node_provision_state(node, 'provide')
-        except Exception as e:
-            LOG.error(e.message)
+            return 'provide'
 
-    def take_inspect_failed_state_actions(self, node):
-        try:
+        elif node.provision_state == INSPECTION_FAILED_PROVISION_STATE:
             if node.last_error and IN_USE_BY_ONEVIEW in node.last_error:
                 LOG.info("Inspection failed on node %(node)s due to machine "
                          "being in use by OneView. Moving it back to "
                          "manageable state." % {'node': node.uuid})
-                self.facade.set_node_provision_state(node, 'manage')
-            else:
-                LOG.warning("Inspection failed on node %(node)s." %
-                            {'node': node.uuid})
-        except Exception as e:
-            LOG.error(e.message)
+                return 'manage'
+            LOG.warning("Inspection failed on node %(node)s." %
+                        {'node': node.uuid})
+
+        return None
@@ -0,0 +1,77 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_log import log as logging
+from oslo_utils import importutils
+
+from ironic_oneviewd.conf import CONF
+
+oslo_messaging = importutils.try_import('oslo_messaging')
+
+LOG = logging.getLogger(__name__)
+
+# NOTE: Created and updated nodes are handled too, so a newly enrolled
+# node does not wait for the reconciliation polling.
+NODE_EVENT_TYPES = (r'^baremetal\.node\.'
+                    r'(provision_set|maintenance_set|create|update)\..*$')
+
+
+class NodeEventEndpoint(object):
+    """Notification endpoint for Ironic node events.
+
+    The UUID of the node of each matching notification is handed to the
+    callback.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+        if oslo_messaging:
+            self.filter_rule = oslo_messaging.NotificationFilter(
+                event_type=NODE_EVENT_TYPES)
+
+    def info(self, ctxt, publisher_id, event_type, payload, metadata):
+        node_data = payload.get('ironic_object.data', {})
+        node_uuid = node_data.get('uuid')
+        if not node_uuid:
+            LOG.debug("Ignoring %(event)s notification without a node "
+                      "UUID." % {'event': event_type})
+            return
+        LOG.debug("Received %(event)s notification for node %(node)s." %
+                  {'event': event_type, 'node': node_uuid})
+        self.callback(node_uuid)
+
+    # NOTE: Failed transitions are published with the error priority
+    error = info
+
+
+def get_node_event_listener(callback):
+    """Get a notification listener for Ironic node events.
+
+    :param callback: Function to be called with the UUID of each node
+                     having its provision state or maintenance changed.
+    :returns: An oslo.messaging notification listener, not yet started.
+    :raises: ImportError if oslo.messaging is not installed.
+    """
+    if not oslo_messaging:
+        raise ImportError("oslo.messaging is required to consume Ironic "
+                          "notifications.")
+
+    transport = oslo_messaging.get_notification_transport(CONF)
+    targets = [oslo_messaging.Target(topic=topic)
+               for topic in CONF.notifications.topics]
+    return oslo_messaging.get_notification_listener(
+        transport, targets, [NodeEventEndpoint(callback)],
+        executor='threading', pool=CONF.notifications.pool)
@@ -0,0 +1,235 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import random
+import threading
+import time
+
+from oslo_log import log as logging
+
+from ironic_oneviewd.conf import CONF
+from ironic_oneviewd import exceptions
+from ironic_oneviewd import metrics
+
+LOG = logging.getLogger(__name__)
+
+REQUESTED = 'requested'
+RETRYING = 'retrying'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+PAUSED = 'paused'
+
+# NOTE: Ironic answers 409 while the node is locked by a conductor and
+# 503 while it is overloaded; both usually clear within seconds.
+TRANSIENT_STATUS_CODES = (409, 503)
+
+
+def is_transient(exc):
+    """Tell whether a failed request to Ironic is worth retrying."""
+    status_code = (getattr(exc, 'http_status', None) or
+                   getattr(exc, 'status_code', None))
+    return status_code in TRANSIENT_STATUS_CODES
+
+
+class NodeTransition(object):
+    """A provision state transition requested for a node."""
+
+    def __init__(self, node_uuid, source, target, deadline):
+        self.node_uuid = node_uuid
+        self.source = source
+        self.target = target
+        self.deadline = deadline
+        self.state = REQUESTED
+        self.attempts = 0
+        self.error = None
+        self.retry_at = None
+
+
+class TransitionTracker(object):
+    """Track the provision state transitions requested for each node.
+
+    A transition is requested again with exponential backoff and jitter
+    while Ironic answers with transient errors, until its deadline. Retries
+    are scheduled for a later cycle rather than waited for, so they never
+    hold a worker. Nodes whose transitions fail quarantine_threshold times
+    in a row are left alone for quarantine_time seconds.
+    """
+
+    def __init__(self):
+        self.deadline = CONF.DEFAULT.transition_deadline
+        self.backoff = CONF.DEFAULT.transition_backoff
+        self.max_backoff = CONF.DEFAULT.transition_max_backoff
+        self.quarantine_threshold = CONF.DEFAULT.quarantine_threshold
+        self.quarantine_time = CONF.DEFAULT.quarantine_time
+        self.transitions = {}
+        self.failures = {}
+        self.quarantined = {}
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def start(self, node, target):
+        """Record a new transition of a node, or resume a scheduled retry.
+
+        :param node: Ironic node being moved.
+        :param target: Provision state target requested.
+        :returns: The NodeTransition.
+        """
+        with self._lock:
+            transition = self.transitions.get(node.uuid)
+            if (transition is not None and transition.target == target and
+                    transition.state == RETRYING):
+                return transition
+            transition = NodeTransition(node.uuid, node.provision_state,
+                                        target, time.time() + self.deadline)
+            self.transitions[node.uuid] = transition
+        metrics.count_transition(target, 'issued')
+        return transition
+
+    def retry_delay(self, transition, exc):
+        """Get how long to wait before requesting a transition again.
+
+        :param transition: NodeTransition that failed.
+        :param exc: Exception raised by the request.
+        :returns: The delay in seconds, or None if the transition failed
+                  for good.
+        """
+        transition.error = exc
+        delay = min(self.backoff * 2 ** (transition.attempts - 1),
+                    self.max_backoff)
+        delay = delay / 2.0 + random.uniform(0, delay / 2.0)
+        if is_transient(exc) and time.time() + delay < transition.deadline:
+            transition.state = RETRYING
+            transition.retry_at = time.time() + delay
+            with self._lock:
+                self.retries += 1
+            LOG.warning("Moving node %(node)s to %(target)s failed on "
+                        "attempt %(attempt)s, retrying in %(delay).1fs: "
+                        "%(error)s" %
+                        {'node': transition.node_uuid,
+                         'target': transition.target,
+                         'attempt': transition.attempts,
+                         'delay': delay, 'error': exc})
+            return delay
+        self.failed(transition)
+        return None
+
+    def succeeded(self, transition):
+        transition.state = SUCCEEDED
+        metrics.count_transition(transition.target, SUCCEEDED)
+        with self._lock:
+            self.transitions.pop(transition.node_uuid, None)
+            self.failures.pop(transition.node_uuid, None)
+
+    def failed(self, transition):
+        transition.state = FAILED
+        metrics.count_transition(transition.target, FAILED)
+        with self._lock:
+            self.transitions.pop(transition.node_uuid, None)
+            failures = self.failures.get(transition.node_uuid, 0) + 1
+            self.failures[transition.node_uuid] = failures
+            if failures >= self.quarantine_threshold:
+                self.quarantined[transition.node_uuid] = (
+                    time.time() + self.quarantine_time)
+                LOG.warning("Node %(node)s failed %(failures)s transitions "
+                            "in a row and is quarantined for %(time)s "
+                            "seconds." % {'node': transition.node_uuid,
+                                          'failures': failures,
+                                          'time': self.quarantine_time})
+
+    def paused(self, transition):
+        """Drop a transition refused by an open circuit breaker.
+
+        The node is not at fault, so this does not count towards its
+        quarantine.
+        """
+        transition.state = PAUSED
+        metrics.count_transition(transition.target, PAUSED)
+        with self._lock:
+            self.transitions.pop(transition.node_uuid, None)
+
+    def is_quarantined(self, node_uuid):
+        with self._lock:
+            quarantined_until = self.quarantined.get(node_uuid)
+            if quarantined_until is None:
+                return False
+            if time.time() < quarantined_until:
+                return True
+            del self.quarantined[node_uuid]
+            self.failures.pop(node_uuid, None)
+            return False
+
+    def is_retry_pending(self, node_uuid):
+        """Tell whether a node waits for the retry of its transition."""
+        with self._lock:
+            transition = self.transitions.get(node_uuid)
+            return (transition is not None and
+                    transition.state == RETRYING and
+                    time.time() < transition.retry_at)
+
+    def next_retry_in(self):
+        """Get the time until the earliest scheduled retry, if any."""
+        with self._lock:
+            retries = [transition.retry_at
+                       for transition in self.transitions.values()
+                       if transition.state == RETRYING]
+        if not retries:
+            return None
+        return max(min(retries) - time.time(), 0.0)
+
+    def prune(self, node_uuids):
+        """Drop the scheduled retries of nodes not listed anymore.
+
+        :param node_uuids: UUIDs of the nodes in action states.
+        """
+        with self._lock:
+            for node_uuid, transition in list(self.transitions.items()):
+                if (transition.state == RETRYING and
+                        node_uuid not in node_uuids):
+                    del self.transitions[node_uuid]
+
+    def run(self, node, target, request):
+        """Request a transition of a node.
+
+        A transient failure schedules the transition to be requested again
+        once its backoff delay elapsed, by a later dispatch of the node.
+
+        :param node: Ironic node to be moved.
+        :param target: Provision state target.
+        :param request: Function requesting the transition to Ironic,
+                        called with the node and the target.
+        :returns: True if Ironic accepted the transition, False if it is
+                  to be retried.
+        :raises: The error if the transition failed for good.
+        """
+        transition = self.start(node, target)
+        transition.attempts += 1
+        try:
+            request(node, target)
+        except exceptions.CircuitOpenError:
+            self.paused(transition)
+            raise
+        except Exception as exc:
+            if self.retry_delay(transition, exc) is None:
+                raise
+            return False
+        self.succeeded(transition)
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {'in_progress': len(self.transitions),
+                    'retries': self.retries,
+                    'quarantined': len(self.quarantined)}
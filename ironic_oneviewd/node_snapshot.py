@@ -0,0 +1,87 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Compact snapshot of the Ironic nodes read by the managers.
+
+Listing thousands of nodes through the Ironic client materializes a
+Resource object, with its own attribute dict, for each of them. The
+managers only read a few fields, so the nodes are rather kept as slotted
+records of those fields, with the strings shared by many nodes, such as
+drivers, provision states and capabilities, interned.
+"""
+
+import six
+
+# NOTE: Only these keys of the node dicts are read by the daemon
+PROPERTIES_KEYS = ('capabilities', 'cpu_arch', 'cpus', 'local_gb',
+                   'memory_mb')
+DRIVER_INFO_KEYS = ('server_hardware_uri', 'server_profile_template_uri')
+EXTRA_KEYS = ('server_hardware_uri',)
+
+SNAPSHOT_FIELDS = ['uuid', 'name', 'driver', 'maintenance',
+                   'provision_state', 'properties', 'driver_info', 'extra',
+                   'last_error', 'updated_at']
+
+
+def _intern(value):
+    if isinstance(value, str):
+        return six.moves.intern(value)
+    return value
+
+
+def _pick(node_dict, keys):
+    node_dict = node_dict or {}
+    return dict((key, _intern(node_dict[key]))
+                for key in keys if key in node_dict)
+
+
+class NodeRecord(object):
+    """Snapshot of the fields of an Ironic node read by the managers."""
+
+    __slots__ = SNAPSHOT_FIELDS
+
+    def __init__(self, uuid, name=None, driver=None, maintenance=False,
+                 provision_state=None, properties=None, driver_info=None,
+                 extra=None, last_error=None, updated_at=None):
+        self.uuid = uuid
+        self.name = name
+        self.driver = _intern(driver)
+        self.maintenance = maintenance
+        self.provision_state = _intern(provision_state)
+        self.properties = _pick(properties, PROPERTIES_KEYS)
+        self.driver_info = _pick(driver_info, DRIVER_INFO_KEYS)
+        self.extra = _pick(extra, EXTRA_KEYS)
+        self.last_error = last_error
+        self.updated_at = updated_at
+
+    @classmethod
+    def from_dict(cls, node):
+        """Build the record of a node from its Ironic API JSON.
+
+        :param node: Node dict as returned by the Ironic API.
+        :returns: A NodeRecord holding none of the node dicts.
+        """
+        return cls(**dict((field, node[field]) for field in SNAPSHOT_FIELDS
+                          if field in node))
+
+    # NOTE: Records sent to another process are interned again there
+    def __getstate__(self):
+        return tuple(getattr(self, field) for field in SNAPSHOT_FIELDS)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __repr__(self):
+        return '<NodeRecord %s>' % self.uuid
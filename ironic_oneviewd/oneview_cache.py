@@ -0,0 +1,86 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import threading
+import time
+
+
+class OneViewResourceCache(object):
+    """LRU cache of OneView resources with a time to live.
+
+    Expired resources are revalidated before being fetched again, so an
+    unchanged resource only costs a cheap conditional check.
+    """
+
+    def __init__(self, ttl, max_size):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, fetch, is_unchanged):
+        """Get a resource from the cache, fetching it when needed.
+
+        :param key: Key of the resource in the cache.
+        :param fetch: Function returning the resource from OneView.
+        :param is_unchanged: Function telling whether an expired resource
+                             is still the same in OneView.
+        :returns: The resource.
+        """
+        if self.ttl <= 0:
+            return fetch()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.pop(key)
+                self._entries[key] = entry
+
+        now = time.time()
+        if entry is not None:
+            resource, expires_at = entry
+            if now < expires_at:
+                self.hits += 1
+                return resource
+            if is_unchanged(resource):
+                self.revalidations += 1
+                self._store(key, resource, now)
+                return resource
+
+        self.misses += 1
+        resource = fetch()
+        self._store(key, resource, now)
+        return resource
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'revalidations': self.revalidations,
+                'size': len(self._entries)}
+
+    def _store(self, key, resource, now):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (resource, now + self.ttl)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
@@ -0,0 +1,185 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+import socket
+import threading
+import time
+
+from oslo_log import log as logging
+from oslo_utils import importutils
+from six.moves import http_client
+from six.moves import queue
+
+from ironic_oneviewd import metrics
+from ironic_oneviewd import throttling
+
+oneview_exceptions = importutils.try_import('hpOneView.exceptions')
+
+LOG = logging.getLogger(__name__)
+
+LOGIN_SESSIONS_URI = '/rest/login-sessions'
+
+# NOTE: hpOneView has no extension point for its connection, so the session
+# relies on these members of it. They are present in the hpOneView versions
+# allowed by requirements.txt.
+CONNECTION_MEMBERS = ('_headers', 'do_http', 'get_connection',
+                      'get_session_id', 'login')
+
+# NOTE: Only these requests are sent again when a pooled connection fails,
+# since OneView may have applied another request before the failure.
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'DELETE')
+
+
+class OneViewSession(object):
+    """Managed session over the connection of a hpOneView client.
+
+    hpOneView opens a new HTTPS connection, with its TLS handshake, for
+    every request. The session takes over the requests of the connection,
+    sending them through a pool of persistent HTTPS connections, and logs
+    in again when OneView answers 401 because the session token expired.
+    Only one worker logs in at a time; the others reuse the new token.
+
+    A forked process gets a copy of the connection, so it opens its own
+    pooled connections and logs in again on its own once its token expires.
+
+    When the connection lacks a member the session relies on, as after an
+    hpOneView upgrade, it is left unmanaged and hpOneView sends its requests.
+    """
+
+    def __init__(self, connection, pool_size, credentials):
+        self.connection = connection
+        self.pool_size = pool_size
+        self.credentials = credentials
+        self.logins = 0
+        self.requests = 0
+        self.request_time = 0.0
+        self.connections_opened = 0
+        self._reset_pool()
+        missing = [member for member in CONNECTION_MEMBERS
+                   if not hasattr(connection, member)]
+        self.managed = not missing
+        if missing:
+            LOG.warning("The hpOneView connection has no %s, OneView "
+                        "requests will not be pooled. Check the installed "
+                        "hpOneView version against requirements.txt." %
+                        ', '.join(missing))
+        else:
+            connection.do_http = self.do_http
+
+    def _reset_pool(self):
+        self._pid = os.getpid()
+        self._pool = queue.LifoQueue(maxsize=self.pool_size)
+        self._login_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def do_http(self, method, path, body, custom_headers=None):
+        """Send a request to OneView, as hpOneView connection.do_http."""
+        if self._pid != os.getpid():
+            self._reset_pool()
+
+        session_id = self.connection.get_session_id()
+        resp, resp_body = self._request(method, path, body, custom_headers)
+        if resp.status == 401 and path != LOGIN_SESSIONS_URI:
+            self.login(session_id)
+            resp, resp_body = self._request(
+                method, path, body, custom_headers)
+        return resp, resp_body
+
+    def login(self, expired_session_id):
+        """Log in to OneView again, unless another worker already did.
+
+        :param expired_session_id: Session token refused by OneView.
+        """
+        with self._login_lock:
+            if self.connection.get_session_id() != expired_session_id:
+                return
+            LOG.info("OneView session expired, logging in again.")
+            self.connection.login(dict(self.credentials))
+            self.logins += 1
+
+    def stats(self):
+        with self._stats_lock:
+            average_latency = (self.request_time / self.requests
+                               if self.requests else 0.0)
+            return {'logins': self.logins,
+                    'requests': self.requests,
+                    'average_latency': round(average_latency, 3),
+                    'connections_opened': self.connections_opened}
+
+    def _request(self, method, path, body, custom_headers):
+        headers = dict(self.connection._headers)
+        if custom_headers:
+            headers.update(custom_headers)
+
+        throttle = throttling.get_throttle('oneview')
+        throttle.wait()
+        started_at = time.time()
+        while True:
+            conn, reused = self._acquire()
+            try:
+                conn.request(method, path, body, headers)
+                resp = conn.getresponse()
+                resp_bytes = resp.read()
+            except (http_client.HTTPException, socket.error) as exc:
+                conn.close()
+                # NOTE: OneView may have closed an idle pooled connection,
+                # so an idempotent request is sent again on a new one.
+                if reused and method in IDEMPOTENT_METHODS:
+                    continue
+                throttle.record(None)
+                raise oneview_exceptions.HPOneViewException(
+                    'Failure during request to %(path)s: %(error)s' %
+                    {'path': path, 'error': exc})
+            break
+
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+
+        throttle.record(resp.status)
+        latency = time.time() - started_at
+        metrics.observe_request('oneview', method, latency)
+        with self._stats_lock:
+            self.requests += 1
+            self.request_time += latency
+
+        try:
+            resp_body = resp_bytes.decode('utf-8')
+        except UnicodeDecodeError:
+            return resp, resp_bytes
+        if resp_body:
+            try:
+                resp_body = json.loads(resp_body)
+            except ValueError:
+                pass
+        return resp, resp_body
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            with self._stats_lock:
+                self.connections_opened += 1
+            return self.connection.get_connection(), False
+
+    def _release(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
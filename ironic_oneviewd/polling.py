@@ -0,0 +1,89 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import random
+
+from ironic_oneviewd.conf import CONF
+
+
+class FixedInterval(object):
+    """Polling interval that never changes."""
+
+    def __init__(self, interval):
+        self.interval = interval
+
+    def next(self, active):
+        return self.interval
+
+
+class AdaptiveInterval(object):
+    """Polling interval driven by the activity observed on each cycle.
+
+    The interval drops to its minimum after an active cycle and grows
+    exponentially up to its maximum while cycles are idle. A random jitter
+    keeps many daemons from polling in lockstep.
+    """
+
+    def __init__(self, min_interval, max_interval, backoff_factor=2.0,
+                 jitter=0.1):
+        self.min_interval = min(min_interval, max_interval)
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.interval = self.min_interval
+
+    def next(self, active):
+        """Get the time to wait before the next cycle.
+
+        :param active: Whether the last cycle found work to be done.
+        :returns: Interval in seconds.
+        """
+        if active:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff_factor,
+                                self.max_interval)
+        return self.interval * (1 + random.uniform(-self.jitter,
+                                                   self.jitter))
+
+
+def get_min_polling_interval():
+    """Get the shortest interval between two polls of Ironic.
+
+    Polling again before the shared node snapshot expires would read the
+    same snapshot, so min_polling_interval is raised to node_cache_ttl
+    while the cache is enabled.
+
+    :returns: Interval in seconds.
+    """
+    return max(CONF.DEFAULT.min_polling_interval,
+               CONF.DEFAULT.node_cache_ttl)
+
+
+def get_polling_interval(max_interval):
+    """Get the polling interval for a manager.
+
+    :param max_interval: Configured interval of the manager, used as the
+                         ceiling of adaptive polling.
+    :returns: An AdaptiveInterval if adaptive polling is enabled, otherwise
+              a FixedInterval.
+    """
+    if CONF.DEFAULT.adaptive_polling:
+        return AdaptiveInterval(get_min_polling_interval(),
+                                max_interval,
+                                CONF.DEFAULT.polling_backoff_factor,
+                                CONF.DEFAULT.polling_jitter)
+    return FixedInterval(max_interval)
@@ -25,6 +25,7 @@ from oslo_log import log as logging
 from oslo_utils import encodeutils
 
 import ironic_oneviewd
+from ironic_oneviewd import conf
 from ironic_oneviewd.conf import CONF
 from ironic_oneviewd import manage as oneviewd_manager
 from ironic_oneviewd import utils
@@ -54,8 +55,7 @@ def get_base_parser():
                         version=ironic_oneviewd.__version__)
 
     parser.add_argument('-c', '--config-file',
-                        default='/etc/ironic-oneviewd/'
-                                'ironic-oneviewd.conf',
+                        default=conf.DEFAULT_CONFIG_FILE,
                         help='Path to the Ironic OneView daemon '
                              'configuration file.')
 
@@ -63,6 +63,11 @@ def get_base_parser():
                         help='Path to the Ironic OneView daemon '
                              'logging file.')
 
+    parser.add_argument('--drop-oneview-cache',
+                        action='store_true',
+                        help='Do not cache Server Profile Templates; always '
+                             'get them from OneView.')
+
     return parser
 
 
@@ -99,22 +104,28 @@ class IronicOneViewD(object):
         self.parser = subcommand_parser
 
         logging.register_options(CONF)
-        CONF(default_config_files=[options.config_file])
+        CONF(args=[], default_config_files=[options.config_file])
         logging.setup(CONF, log_domain)
 
+        if options.drop_oneview_cache:
+            CONF.set_override('cache_ttl', 0, group='oneview')
+
         if options.help:
             self.do_help(options)
-
-        if 'help' not in argv:
-            oneviewd_manager.do_oneview_daemon()
+            return 0
 
         args = subcommand_parser.parse_args(argv)
 
+        # NOTE: Without a subcommand, the daemon is started.
+        func = getattr(args, 'func', oneviewd_manager.do_oneview_daemon)
+
         # Short-circuit and deal with these node_manager right away.
-        if args.func == self.do_help:
+        if func == self.do_help:
             self.do_help(args)
             return 0
 
+        return func(args)
+
 
 def define_command(subparsers, command, callback, cmd_mapper):
     """Define a command in the subparsers collection.
@@ -162,7 +173,7 @@ class HelpFormatter(argparse.HelpFormatter):
 
 def main():
     try:
-        IronicOneViewD().main(sys.argv[1:])
+        sys.exit(IronicOneViewD().main(sys.argv[1:]))
     except KeyboardInterrupt:
         print("\nironic-oneviewd stopped", file=sys.stderr)
         sys.exit(130)
@@ -17,6 +17,8 @@
 import mock
 import unittest
 
+from concurrent import futures
+
 from ironic_oneviewd.conf import CONF
 from ironic_oneviewd import facade
 from ironic_oneviewd.inventory_manager import manage as inventory_manager
@@ -111,6 +113,21 @@ POOL_OF_FAKE_IRONIC_NODES = [
     )
 ]
 
+
+def _fake_nodes_response(nodes):
+    return mock.Mock(), {'nodes': [dict(vars(node)) for node in nodes]}
+
+
+class FakeSynchronousExecutor(object):
+    def submit(self, func, *args):
+        future = futures.Future()
+        try:
+            future.set_result(func(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+
 FakeProfileTemplate = {
     'uuid': '1111-2222-3333-4444',
     'serverHardwareTypeUri': 'rest/server-hardware/11223344',
@@ -124,17 +141,40 @@ class TestIronicOneviewd(unittest.TestCase):
     @mock.patch("time.sleep", side_effect=ValueError)
     def test_node_manager(self, mock_sleep, mock_oneview, mock_ironic):
         ironic_client = mock_ironic()
-        ironic_client.node.list.return_value = POOL_OF_FAKE_IRONIC_NODES
+        ironic_client.http_client.json_request.return_value = (
+            _fake_nodes_response(POOL_OF_FAKE_IRONIC_NODES))
         test_facade = facade.Facade()
         node_manage = node_manager.NodeManager(test_facade)
 
         with self.assertRaises(ValueError):
             node_manage.run()
+        node_manage.executor.shutdown(wait=True)
 
         # NOTE(nicodemos): Set Provision State called for nodes 1, 2, 3
         self.assertEqual(
             3, ironic_client.node.set_provision_state.call_count)
 
+    @mock.patch.object(utils, 'get_ironic_client')
+    @mock.patch.object(utils, 'get_hponeview_client')
+    @mock.patch("time.sleep", side_effect=[None, ValueError])
+    def test_node_manager_unchanged_nodes(self, mock_sleep, mock_oneview,
+                                          mock_ironic):
+        ironic_client = mock_ironic()
+        ironic_client.http_client.json_request.return_value = (
+            _fake_nodes_response(POOL_OF_FAKE_IRONIC_NODES))
+        test_facade = facade.Facade()
+        node_manage = node_manager.NodeManager(test_facade)
+        node_manage.executor = FakeSynchronousExecutor()
+
+        with self.assertRaises(ValueError):
+            node_manage.run()
+
+        # NOTE: Nodes 1, 2, 3 and 4 are only taken on the first cycle
+        self.assertEqual(
+            3, ironic_client.node.set_provision_state.call_count)
+        self.assertEqual(0, node_manage.changed_nodes_count)
+        self.assertEqual(4, node_manage.unchanged_nodes_count)
+
     @mock.patch.object(utils, 'get_ironic_client')
     @mock.patch.object(utils, 'get_hponeview_client')
     @mock.patch("time.sleep", side_effect=ValueError)
@@ -145,13 +185,22 @@ class TestIronicOneviewd(unittest.TestCase):
             FakeProfileTemplate
         )
         ironic_client = mock_ironic()
-        ironic_client.node.list.return_value = POOL_OF_FAKE_IRONIC_NODES
+        ironic_client.http_client.json_request.return_value = (
+            _fake_nodes_response(POOL_OF_FAKE_IRONIC_NODES))
         test_facade = facade.Facade()
         inventory_manage = inventory_manager.InventoryManager(test_facade)
 
         with self.assertRaises(ValueError):
             inventory_manage.run()
 
-        oneview_client.server_hardware.get_all.assert_called_with(
-            filter=["serverHardwareTypeUri='rest/server-hardware/11223344'",
-                    "serverGroupUri='rest/enclosure-group/3322211'"])
+        oneview_client.connection.get.assert_any_call(
+            "/rest/server-hardware?start=0&count=256"
+            "&filter=serverHardwareTypeUri%3D%27rest/server-hardware/"
+            "11223344%27"
+            "&filter=serverGroupUri%3D%27rest/enclosure-group/3322211%27"
+            "&fields=uri%2Cname%2Cstate")
+        # NOTE: The enrolled hardware not seen by the scan is looked up in
+        # a single listing
+        oneview_client.connection.get.assert_called_with(
+            "/rest/server-hardware?start=0&count=256&fields=uri")
+        self.assertFalse(oneview_client.server_hardware.get.called)
@@ -0,0 +1,77 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Fake Ironic API for the asyncio engine tests. Requires Python 3.
+
+Kept out of the test modules, which Python 2 imports to discover the tests.
+"""
+
+import asyncio
+
+from aiohttp import test_utils
+from aiohttp import web
+
+from ironic_oneviewd.node_manager import async_engine
+
+
+class FakeIronicAPI(object):
+    """Stub Ironic API answering provision state changes after a delay."""
+
+    def __init__(self, delay, conflicts=None):
+        self.delay = delay
+        self.conflicts = conflicts or {}
+        self.requests = []
+        self.concurrent = 0
+        self.max_concurrent = 0
+
+    async def set_provision_state(self, request):
+        self.concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        try:
+            await asyncio.sleep(self.delay)
+            body = await request.json()
+            self.requests.append((request.match_info['uuid'], body['target'],
+                                  request.headers['X-Auth-Token']))
+        finally:
+            self.concurrent -= 1
+        if self.conflicts.get(request.match_info['uuid']):
+            self.conflicts[request.match_info['uuid']] -= 1
+            return web.Response(status=409, text='Node is locked')
+        return web.Response(status=202)
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_put('/v1/nodes/{uuid}/states/provision',
+                           self.set_provision_state)
+        self.server = test_utils.TestServer(app)
+        await self.server.start_server()
+        return str(self.server.make_url('/v1'))
+
+    async def stop(self):
+        await self.server.close()
+
+
+async def run_cycle(node_manage, facade, fake_api):
+    """Run a cycle of the node manager against the fake Ironic API."""
+    endpoint = await fake_api.start()
+    facade.get_ironic_endpoint_and_token.return_value = (endpoint, 'token')
+    try:
+        async with node_manage.open_session() as session:
+            node_manage.async_facade = async_engine.AsyncFacade(
+                facade, session, node_manage.executor)
+            return await node_manage.run_cycle()
+    finally:
+        await fake_api.stop()
@@ -0,0 +1,100 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import time
+import unittest
+
+from oslo_utils import importutils
+
+from ironic_oneviewd.conf import CONF
+
+aiohttp = importutils.try_import('aiohttp')
+if aiohttp is not None:
+    # NOTE: aiohttp requires Python 3, the only one parsing these modules
+    import asyncio
+
+    from ironic_oneviewd.node_manager import async_engine
+    from ironic_oneviewd.tests.unit import fake_ironic_api
+
+
+def _enroll_nodes(count):
+    return [mock.Mock(uuid='node-%d' % i, driver='oneview',
+                      maintenance=False, provision_state='enroll',
+                      last_error=None, updated_at=None)
+            for i in range(count)]
+
+
+@unittest.skipIf(aiohttp is None, 'aiohttp is not installed')
+class TestAsyncNodeManager(unittest.TestCase):
+    def setUp(self):
+        CONF.set_override('ironic_max_concurrency', 500, group='DEFAULT')
+        self.addCleanup(CONF.clear_override, 'ironic_max_concurrency',
+                        group='DEFAULT')
+        self.facade = mock.Mock()
+        self.node_manage = async_engine.AsyncNodeManager(self.facade)
+        self.addCleanup(self.node_manage.executor.shutdown)
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.node_manage.loop = self.loop
+
+    def _run_cycle(self, fake_api):
+        return self.loop.run_until_complete(fake_ironic_api.run_cycle(
+            self.node_manage, self.facade, fake_api))
+
+    def test_run_cycle(self):
+        self.facade.get_ironic_node_snapshot.return_value = _enroll_nodes(2000)
+        fake_api = fake_ironic_api.FakeIronicAPI(delay=0.01)
+
+        results = self._run_cycle(fake_api)
+
+        self.assertEqual(2000, len(results))
+        self.assertTrue(all(results))
+        self.assertEqual(set(('node-%d' % i, 'manage', 'token')
+                             for i in range(2000)),
+                         set(fake_api.requests))
+        self.assertLessEqual(fake_api.max_concurrent, 500)
+        self.assertEqual(2000, len(self.node_manage.fingerprints))
+
+    def test_run_cycle_conflict(self):
+        # NOTE: The conflict is not retried
+        self.node_manage.transitions.deadline = 0
+        self.facade.get_ironic_node_snapshot.return_value = _enroll_nodes(3)
+        fake_api = fake_ironic_api.FakeIronicAPI(
+            delay=0, conflicts={'node-1': 1})
+
+        results = self._run_cycle(fake_api)
+
+        self.assertEqual([True, False, True], results)
+        self.assertEqual(set(['node-0', 'node-2']),
+                         set(self.node_manage.fingerprints))
+        self.assertEqual({}, self.node_manage.in_flight)
+
+    def test_run_cycle_conflict_retried(self):
+        self.node_manage.transitions.backoff = 0.01
+        self.facade.get_ironic_node_snapshot.return_value = _enroll_nodes(3)
+        fake_api = fake_ironic_api.FakeIronicAPI(
+            delay=0, conflicts={'node-1': 2})
+
+        # NOTE: Retries are left for the next cycles instead of awaited
+        cycles = [self._run_cycle(fake_api)]
+        for _ in range(2):
+            time.sleep(self.node_manage.transitions.next_retry_in())
+            cycles.append(self._run_cycle(fake_api))
+
+        self.assertEqual([[True, False, True], [False], [True]], cycles)
+        self.assertEqual(5, len(fake_api.requests))
+        self.assertEqual(2, self.node_manage.transitions.stats()['retries'])
@@ -0,0 +1,158 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import mock
+import unittest
+
+import six
+
+from ironic_oneviewd import consistency
+from ironic_oneviewd import manage
+from ironic_oneviewd.node_snapshot import NodeRecord
+from ironic_oneviewd import utils
+
+CAPABILITIES = ('server_hardware_type_uri:/rest/server-hardware-types/%d,'
+                'enclosure_group_uri:/rest/enclosure-groups/%d')
+
+
+def _node(index, capabilities=None, maintenance=False):
+    if capabilities is None:
+        capabilities = CAPABILITIES % (index % 4, index % 2)
+    return NodeRecord(
+        'node-%d' % index, driver='oneview', maintenance=maintenance,
+        properties={'capabilities': capabilities},
+        driver_info={'server_hardware_uri':
+                     '/rest/server-hardware/%d' % index})
+
+
+def _server_hardware(index, sht_index=None, eg_index=None):
+    sht_index = index % 4 if sht_index is None else sht_index
+    eg_index = index % 2 if eg_index is None else eg_index
+    return {'uri': '/rest/server-hardware/%d' % index,
+            'serverHardwareTypeUri':
+                '/rest/server-hardware-types/%d' % sht_index,
+            'serverGroupUri': '/rest/enclosure-groups/%d' % eg_index}
+
+
+class TestConsistency(unittest.TestCase):
+    def setUp(self):
+        self.hardware_index = consistency.index_server_hardware(
+            [_server_hardware(1), _server_hardware(2, sht_index=0)])
+
+    def test_consistent_node(self):
+        self.assertEqual({}, consistency.check_node(
+            _node(1), self.hardware_index))
+
+    def test_server_hardware_not_found(self):
+        self.assertEqual(
+            {consistency.SERVER_HARDWARE_NOT_FOUND: {
+                'claimed': '/rest/server-hardware/3', 'actual': None}},
+            consistency.check_node(_node(3), self.hardware_index))
+
+    def test_server_hardware_type_drift(self):
+        self.assertEqual(
+            {consistency.SERVER_HARDWARE_TYPE_DRIFT: {
+                'claimed': '/rest/server-hardware-types/2',
+                'actual': '/rest/server-hardware-types/0'}},
+            consistency.check_node(_node(2), self.hardware_index))
+
+    def test_enclosure_group_drift(self):
+        rack_server = _server_hardware(1)
+        rack_server['serverGroupUri'] = None
+        hardware_index = consistency.index_server_hardware([rack_server])
+
+        self.assertEqual(
+            {consistency.ENCLOSURE_GROUP_DRIFT: {
+                'claimed': '/rest/enclosure-groups/1', 'actual': None}},
+            consistency.check_node(_node(1), hardware_index))
+        self.assertEqual({}, consistency.check_node(
+            _node(1, 'server_hardware_type_uri:'
+                     '/rest/server-hardware-types/1'), hardware_index))
+
+    def test_unchecked_node(self):
+        node = _node(1, capabilities='server_hardware_type_uri')
+        self.assertIsNone(consistency.check_node(node, self.hardware_index))
+        node = _node(1)
+        node.driver_info = {}
+        self.assertIsNone(consistency.check_node(node, self.hardware_index))
+
+    def test_check_nodes_set_maintenance(self):
+        facade = mock.Mock()
+        facade.iter_server_hardware_available.return_value = iter(
+            [_server_hardware(1), _server_hardware(2, sht_index=0)])
+        facade.node_set_maintenance.side_effect = [
+            None, ValueError('boom'), None]
+        nodes = [_node(1), _node(2), _node(3), _node(4, maintenance=True),
+                 _node(5)]
+
+        report = consistency.check_nodes(facade, nodes, set_maintenance=True)
+
+        facade.iter_server_hardware_available.assert_called_once_with(
+            fields=consistency.SERVER_HARDWARE_FIELDS)
+        self.assertEqual(['node-2', 'node-3', 'node-4', 'node-5'],
+                         sorted(report.drifted_nodes))
+        self.assertEqual(3, report.counts[
+            consistency.SERVER_HARDWARE_NOT_FOUND])
+        self.assertEqual([mock.call('node-2', True,
+                                    'Drifted from OneView: '
+                                    'server_hardware_type_drift'),
+                          mock.call('node-3', True,
+                                    'Drifted from OneView: '
+                                    'server_hardware_not_found'),
+                          mock.call('node-5', True,
+                                    'Drifted from OneView: '
+                                    'server_hardware_not_found')],
+                         facade.node_set_maintenance.call_args_list)
+        self.assertEqual(['node-2', 'node-5'], report.maintenance_set)
+        self.assertEqual({'node-3': 'boom'}, report.maintenance_failed)
+
+    def test_check_50k_nodes(self):
+        facade = mock.Mock()
+        facade.iter_server_hardware_available.return_value = iter(
+            [_server_hardware(index) for index in range(50000)])
+        nodes = [_node(index) for index in range(50000)]
+        for index in range(0, 50000, 100):
+            nodes[index].properties = {
+                'capabilities': CAPABILITIES % (index % 4 + 1, index % 2)}
+        utils._parsed_capabilities.clear()
+
+        report = consistency.check_nodes(facade, nodes)
+
+        self.assertEqual(500, len(report.drifted_nodes))
+        # NOTE: The Server Hardware is listed once for all the nodes
+        facade.iter_server_hardware_available.assert_called_once_with(
+            fields=consistency.SERVER_HARDWARE_FIELDS)
+        self.assertFalse(facade.get_server_hardware.called)
+        self.assertFalse(facade.node_set_maintenance.called)
+
+    @mock.patch.object(manage, 'Facade')
+    def test_do_check_consistency(self, mock_facade):
+        mock_facade().get_ironic_node_snapshot.return_value = [
+            _node(1), _node(2)]
+        mock_facade().iter_server_hardware_available.return_value = iter(
+            [_server_hardware(1), _server_hardware(2)])
+
+        with mock.patch('sys.stdout', new=six.StringIO()) as stdout:
+            self.assertEqual(0, manage.do_check_consistency(
+                mock.Mock(include_maintenance=False, set_maintenance=False)))
+
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(2, report['consistent'])
+        self.assertEqual(2, report['server_hardware'])
+        mock_facade().get_ironic_node_snapshot.assert_called_once_with(
+            drivers=utils.SUPPORTED_DRIVERS, maintenance=False,
+            fields=consistency.CONSISTENCY_FIELDS)
@@ -0,0 +1,201 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import mock
+import shutil
+import tempfile
+import unittest
+import uuid
+
+from ironic_oneviewd import coordination
+from ironic_oneviewd.node_manager import manage as node_manager
+
+NODE_UUIDS = [str(uuid.UUID(int=index * 7919)) for index in range(5000)]
+
+
+def _owners(ring):
+    return dict((node_uuid, ring.get_owner(node_uuid))
+                for node_uuid in NODE_UUIDS)
+
+
+class TestHashRing(unittest.TestCase):
+    def test_empty_ring(self):
+        self.assertIsNone(coordination.HashRing([], 64).get_owner('node-1'))
+
+    def test_nodes_split_evenly(self):
+        ring = coordination.HashRing(['daemon-1', 'daemon-2', 'daemon-3'], 64)
+
+        owners = list(_owners(ring).values())
+
+        for member in ring.members:
+            self.assertGreater(owners.count(member), len(NODE_UUIDS) / 5)
+
+    def test_member_joining_moves_its_share(self):
+        members = ['daemon-1', 'daemon-2', 'daemon-3']
+        before = _owners(coordination.HashRing(members, 64))
+        after = _owners(coordination.HashRing(members + ['daemon-4'], 64))
+
+        moved = [node_uuid for node_uuid in NODE_UUIDS
+                 if before[node_uuid] != after[node_uuid]]
+
+        self.assertTrue(all(after[node_uuid] == 'daemon-4'
+                            for node_uuid in moved))
+        self.assertLess(len(moved), len(NODE_UUIDS) / 3)
+
+    def test_member_leaving_moves_its_share(self):
+        members = ['daemon-1', 'daemon-2', 'daemon-3']
+        before = _owners(coordination.HashRing(members, 64))
+        after = _owners(coordination.HashRing(members[:2], 64))
+
+        for node_uuid in NODE_UUIDS:
+            if before[node_uuid] != 'daemon-3':
+                self.assertEqual(before[node_uuid], after[node_uuid])
+
+
+class TestNodeManagerSharding(unittest.TestCase):
+    def setUp(self):
+        self.node_manages = []
+        members = ['daemon-1', 'daemon-2']
+        for member_id in members:
+            node_manage = node_manager.NodeManager(mock.Mock())
+            self.addCleanup(node_manage.executor.shutdown)
+            node_manage.shards = mock.Mock(
+                ring=coordination.HashRing(members, 64))
+            node_manage.shards.owns.side_effect = (
+                lambda node_uuid, shards=node_manage.shards,
+                member_id=member_id:
+                shards.ring.get_owner(node_uuid) == member_id)
+            self.node_manages.append(node_manage)
+        self.nodes = [mock.Mock(uuid=node_uuid, driver='oneview',
+                                maintenance=False, provision_state='enroll',
+                                last_error=None, updated_at=None)
+                      for node_uuid in NODE_UUIDS[:200]]
+
+    def _changed_uuids(self, node_manage):
+        return set(node.uuid for node in
+                   node_manage.get_changed_nodes(self.nodes))
+
+    def test_nodes_split_among_instances(self):
+        first, second = [self._changed_uuids(node_manage)
+                         for node_manage in self.node_manages]
+
+        self.assertFalse(first & second)
+        self.assertEqual(set(NODE_UUIDS[:200]), first | second)
+
+    def test_nodes_taken_over_after_rebalance(self):
+        first, second = self.node_manages
+        first_nodes = first.get_changed_nodes(self.nodes)
+        second_uuids = self._changed_uuids(second)
+        for node in first_nodes:
+            first.confirm_node_actions(node, True)
+
+        # NOTE: The second instance left the group
+        first.shards.ring = coordination.HashRing(['daemon-1'], 64)
+
+        self.assertEqual(second_uuids, self._changed_uuids(first))
+
+
+@unittest.skipIf(coordination.tooz_coordination is None,
+                 'tooz is not installed')
+class TestShardCoordinator(unittest.TestCase):
+    def setUp(self):
+        backend_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, backend_dir)
+        self.backend_url = 'file://%s' % backend_dir
+
+    def _start(self, member_id):
+        shards = coordination.ShardCoordinator(
+            self.backend_url, 'ironic-oneviewd', member_id, 64)
+        shards.start()
+        self.addCleanup(lambda: shards._coordinator.is_started and
+                        shards._coordinator.stop())
+        return shards
+
+    def test_rebalance_on_join_and_leave(self):
+        first = self._start('daemon-1')
+        self.assertEqual(frozenset(['daemon-1']), first.ring.members)
+
+        second = self._start('daemon-2')
+        self.assertTrue(first.refresh())
+        self.assertEqual(frozenset(['daemon-1', 'daemon-2']),
+                         first.ring.members)
+        self.assertEqual(first.ring.members, second.ring.members)
+        self.assertTrue(all(first.owns(node_uuid) != second.owns(node_uuid)
+                            for node_uuid in NODE_UUIDS[:100]))
+
+        second.stop()
+        self.assertTrue(first.refresh())
+        self.assertTrue(all(first.owns(node_uuid)
+                            for node_uuid in NODE_UUIDS[:100]))
+        self.assertEqual(2, first.stats()['rebalances'])
+
+
+@unittest.skipIf(coordination.tooz_coordination is None,
+                 'tooz is not installed')
+class TestLeaderElection(unittest.TestCase):
+    def setUp(self):
+        backend_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, backend_dir)
+        self.backend_url = 'file://%s' % backend_dir
+
+    def _start(self, member_id):
+        election = coordination.LeaderElection(
+            self.backend_url, 'ironic-oneviewd-inventory', member_id)
+        election.start()
+        self.addCleanup(lambda: election._coordinator.is_started and
+                        election.stop())
+        return election
+
+    def test_failover(self):
+        first = self._start('daemon-1')
+        second = self._start('daemon-2')
+
+        self.assertTrue(first.is_leader())
+        self.assertFalse(second.is_leader())
+
+        first.stop()
+        self.assertTrue(second.is_leader())
+        self.assertEqual(1, second.elections)
+
+
+class TestLeaderElectionLease(unittest.TestCase):
+    def setUp(self):
+        tooz_patch = mock.patch.object(coordination, 'tooz_coordination')
+        self.tooz = tooz_patch.start()
+        self.addCleanup(tooz_patch.stop)
+        self.tooz.ToozError = ValueError
+        self.lock = self.tooz.get_coordinator().get_lock()
+        self.election = coordination.LeaderElection(
+            'redis://localhost', 'ironic-oneviewd-inventory', 'daemon-1')
+
+    def test_lease_lost(self):
+        self.lock.acquire.side_effect = [True, False]
+        self.lock.is_still_owner.side_effect = [True, False]
+
+        self.assertTrue(self.election.is_leader())
+        self.assertTrue(self.election.is_leader())
+        # NOTE: Another instance took the lock once the lease expired
+        self.assertFalse(self.election.is_leader())
+        self.assertEqual(2, self.lock.acquire.call_count)
+        self.assertEqual(1, self.election.elections)
+
+    def test_lease_not_verifiable(self):
+        self.lock.acquire.return_value = True
+        self.lock.is_still_owner.side_effect = NotImplementedError
+        self.lock.acquired = True
+
+        self.assertTrue(self.election.is_leader())
+        self.assertTrue(self.election.is_leader())
+        self.assertEqual(1, self.lock.acquire.call_count)
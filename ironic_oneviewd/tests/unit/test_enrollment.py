@@ -0,0 +1,131 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import threading
+import unittest
+
+from ironicclient import exc as ironic_exc
+
+from ironic_oneviewd.inventory_manager import enrollment
+
+TEMPLATE = {'uri': '/rest/server-profile-templates/1',
+            'serverHardwareTypeUri': '/rest/server-hardware-types/1',
+            'enclosureGroupUri': '/rest/enclosure-groups/1'}
+
+
+class FakeIronicFacade(object):
+    """Fake facade creating Ironic nodes."""
+
+    def __init__(self):
+        self.nodes = {}
+        self.create_calls = 0
+        self.lock = threading.Lock()
+
+    def get_ironic_node_list(self, fields=None):
+        with self.lock:
+            return list(self.nodes.values())
+
+    def create_ironic_node(self, **attrs):
+        with self.lock:
+            self.create_calls += 1
+            if attrs['name'] in self.nodes:
+                raise ironic_exc.Conflict()
+            node = mock.Mock(uuid='node-%d' % len(self.nodes),
+                             driver_info=attrs['driver_info'])
+            node.name = attrs['name']
+            self.nodes[attrs['name']] = node
+            return node
+
+
+def _server_hardware(count):
+    return dict(('/rest/server-hardware/%04d' % i, TEMPLATE)
+                for i in range(count))
+
+
+class TestBulkEnroller(unittest.TestCase):
+    def test_get_node_attributes(self):
+        sh_uri = '/rest/server-hardware/30303437-3034-4D32'
+
+        attrs = enrollment.get_node_attributes(sh_uri, TEMPLATE)
+
+        self.assertEqual('oneview-30303437-3034-4d32', attrs['name'])
+        self.assertEqual({'server_hardware_uri': sh_uri},
+                         attrs['driver_info'])
+        self.assertEqual(
+            'server_hardware_type_uri:/rest/server-hardware-types/1,'
+            'server_profile_template_uri:/rest/server-profile-templates/1,'
+            'enclosure_group_uri:/rest/enclosure-groups/1',
+            attrs['properties']['capabilities'])
+
+    @mock.patch.object(enrollment, 'time')
+    def test_enroll_bulk(self, mock_time):
+        facade = FakeIronicFacade()
+        enroller = enrollment.BulkEnroller(facade, batch_size=50,
+                                           rate_limit=100)
+        server_hardware = _server_hardware(200)
+        # NOTE: The second batch takes longer than the 0.5s allowed to
+        # each batch of 50 nodes, the others 0.2s.
+        mock_time.time.side_effect = [0.0, 0.2, 1.0, 1.6, 2.0, 2.2,
+                                      3.0, 3.2]
+
+        result = enroller.enroll(server_hardware)
+
+        self.assertEqual(sorted(server_hardware), sorted(result['enrolled']))
+        self.assertEqual(200, len(facade.nodes))
+        # NOTE: Neither the slow batch nor the last one are paced
+        self.assertEqual(2, mock_time.sleep.call_count)
+        for call in mock_time.sleep.call_args_list:
+            self.assertAlmostEqual(0.3, call[0][0])
+
+        # NOTE: Enrolling again is a no-op
+        result = enroller.enroll(server_hardware)
+
+        self.assertEqual([], result['enrolled'])
+        self.assertEqual(200, len(result['skipped']))
+        self.assertEqual(200, facade.create_calls)
+
+    def test_enroll_conflict(self):
+        facade = FakeIronicFacade()
+        enroller = enrollment.BulkEnroller(facade, batch_size=2,
+                                           rate_limit=1000)
+        server_hardware = _server_hardware(2)
+        # NOTE: Another enrollment created the node after the listing
+        facade.get_ironic_node_list = mock.Mock(return_value=[])
+        facade.create_ironic_node(**enrollment.get_node_attributes(
+            '/rest/server-hardware/0000', TEMPLATE))
+
+        result = enroller.enroll(server_hardware)
+
+        self.assertEqual(['/rest/server-hardware/0001'], result['enrolled'])
+        self.assertEqual(['/rest/server-hardware/0000'], result['skipped'])
+        self.assertEqual(2, len(facade.nodes))
+
+    @mock.patch.object(enrollment.time, 'sleep')
+    def test_enroll_rate_limit(self, mock_sleep):
+        facade = FakeIronicFacade()
+        enroller = enrollment.BulkEnroller(facade, batch_size=10,
+                                           rate_limit=5)
+
+        result = enroller.enroll(_server_hardware(30))
+
+        self.assertEqual(30, len(result['enrolled']))
+        # NOTE: Every batch but the last waits to keep 5 nodes per second
+        waits = [call[0][0] for call in mock_sleep.call_args_list
+                 if call[0][0]]
+        self.assertEqual(2, len(waits))
+        for wait in waits:
+            self.assertAlmostEqual(2.0, wait, places=1)
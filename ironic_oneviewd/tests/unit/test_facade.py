@@ -0,0 +1,276 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import mock
+import threading
+import unittest
+
+from ironic_oneviewd import facade
+from ironic_oneviewd.node_manager import manage as node_manager
+from ironic_oneviewd import utils
+
+
+class FakeNode(object):
+    def __init__(self, info):
+        self._info = info
+        for key, value in info.items():
+            setattr(self, key, value)
+
+
+class FakeIronicNodeEndpoint(object):
+    """Fake Ironic node endpoint honoring the list filters."""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.transferred_bytes = 0
+
+    def list(self, detail=False, fields=None, limit=None, maintenance=None,
+             driver=None, provision_state=None):
+        nodes = [node for node in self.nodes
+                 if maintenance is None or node['maintenance'] is maintenance
+                 if driver is None or node['driver'] == driver
+                 if (provision_state is None or
+                     node['provision_state'] == provision_state)]
+        if fields:
+            nodes = [dict((f, node[f]) for f in fields) for node in nodes]
+        self.transferred_bytes += len(json.dumps({'nodes': nodes}))
+        return [FakeNode(node) for node in nodes]
+
+
+def _fake_nodes(count):
+    states = ['available', 'active', 'active', 'active', 'enroll']
+    return [{
+        'uuid': '66666666-7777-8888-9999-%012d' % i,
+        'driver': 'oneview' if i % 10 else 'ipmi',
+        'maintenance': i % 50 == 0,
+        'provision_state': states[i % len(states)],
+        'last_error': None,
+        'updated_at': '2017-06-01T10:00:00+00:00',
+        'properties': {'cpus': 8, 'memory_mb': 32768, 'local_gb': 120,
+                       'cpu_arch': 'x86_64',
+                       'capabilities': 'server_hardware_type_uri:/rest/'
+                                       'server-hardware-types/1,'
+                                       'server_profile_template_uri:/rest/'
+                                       'server-profile-templates/2'},
+        'driver_info': {'server_hardware_uri':
+                        '/rest/server-hardware/%d' % i,
+                        'deploy_kernel': 'kernel', 'deploy_ramdisk': 'ram'},
+        'extra': {},
+        'instance_info': {'image_source': 'image', 'root_gb': 10},
+        'driver_internal_info': {'clean_steps': None, 'is_whole_disk': True},
+        'links': [{'href': 'http://ironic/v1/nodes/%d' % i, 'rel': 'self'}],
+    } for i in range(count)]
+
+
+class TestFacade(unittest.TestCase):
+    @mock.patch.object(utils, 'get_ironic_client')
+    @mock.patch.object(utils, 'get_hponeview_client')
+    def setUp(self, mock_oneview, mock_ironic):
+        self.ironic_client = mock_ironic()
+        self.oneview_client = mock_oneview()
+        self.facade = facade.Facade()
+
+    def test_get_ironic_node_list(self):
+        self.facade.get_ironic_node_list()
+        self.ironic_client.node.list.assert_called_once_with(
+            detail=True, limit=0)
+
+    def test_get_ironic_node_list_filtered(self):
+        self.ironic_client.node.list.return_value = [
+            mock.Mock(uuid='1'), mock.Mock(uuid='2')]
+
+        nodes = self.facade.get_ironic_node_list(
+            drivers=['oneview', 'fake_oneview'],
+            provision_states=['enroll'],
+            maintenance=False,
+            fields=['uuid', 'driver'])
+
+        self.assertEqual(['1', '2'], [node.uuid for node in nodes])
+        self.ironic_client.node.list.assert_has_calls([
+            mock.call(limit=0, fields=['uuid', 'driver'], maintenance=False,
+                      driver='oneview', provision_state='enroll'),
+            mock.call(limit=0, fields=['uuid', 'driver'], maintenance=False,
+                      driver='fake_oneview', provision_state='enroll')])
+
+    def test_get_ironic_node_snapshot(self):
+        nodes = _fake_nodes(3)
+        self.ironic_client.http_client.json_request.side_effect = [
+            (mock.Mock(), {'nodes': nodes[:2],
+                           'next': 'https://cloud/baremetal/v1/nodes'
+                                   '?limit=2&marker=%s' % nodes[1]['uuid']}),
+            (mock.Mock(), {'nodes': nodes[2:]})]
+
+        records = self.facade.get_ironic_node_snapshot(
+            drivers=['oneview'], maintenance=False, fields=['uuid', 'driver'])
+
+        self.assertEqual([node['uuid'] for node in nodes],
+                         [record.uuid for record in records])
+        self.ironic_client.http_client.json_request.assert_has_calls([
+            mock.call('GET', '/v1/nodes?driver=oneview&fields=uuid%2Cdriver'
+                             '&maintenance=false'),
+            mock.call('GET', '/v1/nodes?driver=oneview&fields=uuid%%2Cdriver'
+                             '&maintenance=false&marker=%s' %
+                      nodes[1]['uuid'])])
+
+    def test_get_ironic_node_list_filtered_payload(self):
+        endpoint = FakeIronicNodeEndpoint(_fake_nodes(5000))
+        self.ironic_client.node = endpoint
+
+        full_list = [node for node in self.facade.get_ironic_node_list()
+                     if node.driver in utils.SUPPORTED_DRIVERS
+                     if node.maintenance is False
+                     if node.provision_state in node_manager.ACTION_STATES]
+        full_bytes = endpoint.transferred_bytes
+
+        endpoint.transferred_bytes = 0
+        filtered_list = self.facade.get_ironic_node_list(
+            drivers=utils.SUPPORTED_DRIVERS,
+            provision_states=node_manager.ACTION_STATES,
+            maintenance=False,
+            fields=node_manager.NODE_FIELDS)
+        filtered_bytes = endpoint.transferred_bytes
+
+        self.assertEqual(sorted(node.uuid for node in full_list),
+                         sorted(node.uuid for node in filtered_list))
+        self.assertLess(filtered_bytes * 5, full_bytes)
+
+    @mock.patch.object(facade.oneview_cache.time, 'time')
+    def test_get_server_profile_template_cached(self, mock_time):
+        mock_time.side_effect = [100.0, 110.0, 10000.0]
+        template = {'uri': '/rest/server-profile-templates/1',
+                    'eTag': '1', 'modified': '2017-06-01T10:00:00.000Z'}
+        templates = self.oneview_client.server_profile_templates
+        templates.get.return_value = template
+        self.oneview_client.index_resources.get.return_value = {
+            'uri': '/rest/server-profile-templates/1',
+            'eTag': '1', 'modified': '2017-06-01T10:00:00.000Z'}
+
+        for i in range(3):
+            self.assertEqual(
+                template, self.facade.get_server_profile_template('1'))
+
+        templates.get.assert_called_once_with('1')
+        self.oneview_client.index_resources.get.assert_called_once_with(
+            '/rest/server-profile-templates/1')
+
+    @mock.patch.object(facade.oneview_cache.time, 'time')
+    def test_get_server_profile_template_changed(self, mock_time):
+        mock_time.side_effect = [100.0, 10000.0]
+        templates = self.oneview_client.server_profile_templates
+        templates.get.return_value = {
+            'uri': '/rest/server-profile-templates/1', 'eTag': '1'}
+        self.oneview_client.index_resources.get.return_value = {
+            'uri': '/rest/server-profile-templates/1', 'eTag': '2'}
+
+        self.facade.get_server_profile_template('1')
+        self.facade.get_server_profile_template('1')
+
+        self.assertEqual(2, templates.get.call_count)
+
+    def test_iter_server_hardware_available(self):
+        server_hardware = [{'uri': '/rest/server-hardware/%d' % i}
+                           for i in range(5)]
+        self.oneview_client.connection.get.side_effect = [
+            {'members': server_hardware[:2], 'nextPageUri': 'page-2'},
+            {'members': server_hardware[2:4], 'nextPageUri': 'page-3'},
+            {'members': server_hardware[4:], 'nextPageUri': None}]
+
+        hardware_iter = self.facade.iter_server_hardware_available(
+            "serverHardwareTypeUri='/rest/server-hardware-types/1'",
+            page_size=2)
+
+        self.assertEqual(server_hardware[:1], [next(hardware_iter)])
+        # NOTE: Pages are only requested as the iteration goes on
+        self.assertEqual(1, self.oneview_client.connection.get.call_count)
+        self.assertEqual(server_hardware[1:], list(hardware_iter))
+        self.oneview_client.connection.get.assert_has_calls([
+            mock.call('/rest/server-hardware?start=%d&count=2'
+                      '&filter=serverHardwareTypeUri%%3D%%27/rest/'
+                      'server-hardware-types/1%%27'
+                      '&fields=uri%%2Cname%%2Cstate' % start)
+            for start in (0, 2, 4)])
+
+    def test_nodes_set_maintenance(self):
+        node_uuids = ['node-%d' % i for i in range(50)]
+        # NOTE: The first calls wait until 10 of them run at once
+        all_running = threading.Event()
+        lock = threading.Lock()
+        running = [0]
+        max_running = [0]
+
+        def set_maintenance(node_uuid, maintenance_mode, maint_reason=None):
+            with lock:
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+                if running[0] == 10:
+                    all_running.set()
+            try:
+                all_running.wait(10)
+            finally:
+                with lock:
+                    running[0] -= 1
+            if node_uuid == 'node-7':
+                raise ValueError('locked')
+        self.ironic_client.node.set_maintenance.side_effect = set_maintenance
+
+        results = self.facade.nodes_set_maintenance(
+            node_uuids, True, 'draining', max_concurrency=10)
+
+        self.assertEqual(10, max_running[0])
+        self.assertEqual(node_uuids, [r.node_uuid for r in results])
+        self.assertEqual({'node-7': 'locked'},
+                         dict((r.node_uuid, r.error) for r in results
+                              if r.error is not None))
+        self.ironic_client.node.set_maintenance.assert_any_call(
+            'node-1', True, maint_reason='draining')
+
+    def test_set_nodes_provision_state_per_node_order(self):
+        nodes = [FakeNode({'uuid': 'node-1'}), FakeNode({'uuid': 'node-2'}),
+                 FakeNode({'uuid': 'node-1'}), FakeNode({'uuid': 'node-2'})]
+        requests = []
+
+        def set_provision_state(node_uuid, state):
+            if (node_uuid, state) == ('node-2', 'manage'):
+                raise ValueError('conflict')
+            requests.append((node_uuid, state))
+        self.ironic_client.node.set_provision_state.side_effect = (
+            set_provision_state)
+
+        results = self.facade._run_batch(
+            lambda node: self.facade.set_node_provision_state(
+                node, 'manage' if node in nodes[:2] else 'provide'),
+            nodes, lambda node: node.uuid, None)
+
+        self.assertEqual([('node-1', 'manage'), ('node-1', 'provide')],
+                         requests)
+        self.assertEqual(
+            [facade.NodeResult('node-1', None),
+             facade.NodeResult('node-2', 'conflict'),
+             facade.NodeResult('node-1', None),
+             facade.NodeResult('node-2', 'Skipped after a previous '
+                                         'failure: conflict')],
+            results)
+
+    def test_set_nodes_provision_state(self):
+        nodes = [FakeNode({'uuid': 'node-%d' % i}) for i in range(3)]
+
+        results = self.facade.set_nodes_provision_state(nodes, 'provide')
+
+        self.assertEqual(['node-0', 'node-1', 'node-2'],
+                         [r.node_uuid for r in results if r.error is None])
+        self.assertEqual(3, self.ironic_client.node.set_provision_state
+                         .call_count)
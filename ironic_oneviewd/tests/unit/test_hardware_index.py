@@ -0,0 +1,104 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import unittest
+
+from ironic_oneviewd.inventory_manager import hardware_index
+
+
+def _node(uuid, server_hardware_uri):
+    return mock.Mock(uuid=uuid,
+                     driver_info={'server_hardware_uri': server_hardware_uri})
+
+
+class TestHardwareIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = hardware_index.HardwareIndex()
+
+    def test_update(self):
+        self.index.update([_node('node-1', '/rest/server-hardware/1'),
+                           _node('node-2', '/rest/server-hardware/2'),
+                           _node('node-3', None)])
+
+        self.assertIn('/rest/server-hardware/1', self.index)
+        self.assertNotIn(None, self.index)
+        self.assertEqual(set(['node-2']),
+                         self.index.get_nodes('/rest/server-hardware/2'))
+
+    def test_update_incremental(self):
+        self.index.update([_node('node-1', '/rest/server-hardware/1'),
+                           _node('node-2', '/rest/server-hardware/2')])
+        self.index.mark_existing(['/rest/server-hardware/1'])
+
+        reindexed = self.index.update(
+            [_node('node-1', '/rest/server-hardware/1'),
+             _node('node-2', '/rest/server-hardware/3')])
+
+        self.assertEqual(1, reindexed)
+        self.assertNotIn('/rest/server-hardware/2', self.index)
+        self.assertEqual(set(['/rest/server-hardware/3']),
+                         self.index.unverified_hardware())
+
+    def test_duplicated_hardware(self):
+        self.index.update([_node('node-2', '/rest/server-hardware/1'),
+                           _node('node-1', '/rest/server-hardware/1'),
+                           _node('node-3', '/rest/server-hardware/3')])
+
+        self.assertEqual({'/rest/server-hardware/1': ['node-1', 'node-2']},
+                         self.index.duplicated_hardware())
+
+    def test_deleted_hardware(self):
+        self.index.update([_node('node-1', '/rest/server-hardware/1'),
+                           _node('node-2', '/rest/server-hardware/2')])
+        self.index.mark_existing(['/rest/server-hardware/1'])
+        self.index.mark_deleted(['/rest/server-hardware/2',
+                                 '/rest/server-hardware/3'])
+
+        self.assertEqual(set(), self.index.unverified_hardware())
+        self.assertEqual(set(['/rest/server-hardware/2']),
+                         self.index.deleted_hardware)
+
+        self.index.update([_node('node-1', '/rest/server-hardware/1')])
+
+        self.assertEqual(set(), self.index.deleted_hardware)
+
+    def test_start_scan(self):
+        self.index.update([_node('node-1', '/rest/server-hardware/1'),
+                           _node('node-2', '/rest/server-hardware/2')])
+        self.index.mark_existing(['/rest/server-hardware/1'])
+        self.index.mark_deleted(['/rest/server-hardware/2'])
+
+        self.index.start_scan()
+
+        # NOTE: Hardware seen by a scan must be seen again by the next one
+        self.assertEqual(set(['/rest/server-hardware/1',
+                              '/rest/server-hardware/2']),
+                         self.index.unverified_hardware())
+        self.assertEqual(set(), self.index.deleted_hardware)
+
+    def test_update_and_lookup_20k(self):
+        nodes = [_node('node-%d' % i, '/rest/server-hardware/%d' % i)
+                 for i in range(20000)]
+        server_hardware = ['/rest/server-hardware/%d' % i
+                           for i in range(10000, 30000)]
+
+        self.assertEqual(20000, self.index.update(nodes))
+        self.assertEqual(0, self.index.update(nodes))
+        not_enrolled = [uri for uri in server_hardware
+                        if uri not in self.index]
+
+        self.assertEqual(10000, len(not_enrolled))
@@ -0,0 +1,174 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import mock
+import unittest
+
+from ironic_oneviewd.conf import CONF
+from ironic_oneviewd import instrumentation
+
+
+class FakeResource(object):
+    def __init__(self, items):
+        self.items = items
+
+    @instrumentation.instrumented('oneview')
+    def get_all(self):
+        return list(self.items)
+
+    @instrumentation.instrumented('oneview')
+    def iter_all(self):
+        for item in self.items:
+            yield item
+
+    @instrumentation.instrumented('ironic')
+    def fail(self):
+        raise ValueError('conflict')
+
+    def get_one(self):
+        return self.items[0]
+
+    get_one_instrumented = instrumentation.instrumented('ironic')(get_one)
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.records = []
+        self.resource = FakeResource(['sh-1', 'sh-2', 'sh-3'])
+        instrumentation.register_observer(self.records.append)
+        self.addCleanup(instrumentation.unregister_observer,
+                        self.records.append)
+        self.addCleanup(setattr, instrumentation, '_enabled', False)
+        self.addCleanup(setattr, instrumentation, '_tracer', None)
+
+    def _enable(self, tracer=None):
+        instrumentation._enabled = True
+        instrumentation._tracer = tracer
+
+    def test_disabled(self):
+        self.assertEqual(['sh-1', 'sh-2', 'sh-3'], self.resource.get_all())
+        self.assertEqual(3, len(list(self.resource.iter_all())))
+        self.assertEqual([], self.records)
+
+    @mock.patch.object(instrumentation, 'time')
+    @mock.patch.object(instrumentation, '_iterate')
+    @mock.patch.object(instrumentation, '_call')
+    def test_disabled_overhead(self, mock_call, mock_iterate, mock_time):
+        observer = mock.Mock()
+        instrumentation.register_observer(observer)
+        self.addCleanup(instrumentation.unregister_observer, observer)
+
+        self.assertEqual('sh-1', self.resource.get_one_instrumented())
+        self.assertEqual(3, len(list(self.resource.iter_all())))
+
+        # NOTE: The disabled instrumentation only checks its flag
+        self.assertFalse(mock_call.called)
+        self.assertFalse(mock_iterate.called)
+        self.assertFalse(mock_time.time.called)
+        self.assertFalse(observer.called)
+
+    def test_call(self):
+        self._enable()
+
+        self.resource.get_all()
+
+        record = self.records[0]
+        self.assertEqual(('oneview', 'get_all', 3, None),
+                         (record.backend, record.method, record.size,
+                          record.error))
+        self.assertGreaterEqual(record.duration, 0)
+
+    def test_call_size(self):
+        self._enable()
+        self.resource.items = [{'uri': '/rest/server-hardware/1'}]
+
+        self.resource.get_one_instrumented()
+        self.resource.get_all()
+
+        # NOTE: Only list results have a size, not a resource dict
+        self.assertEqual([None, 1], [record.size for record in self.records])
+
+    def test_call_error(self):
+        self._enable()
+
+        self.assertRaises(ValueError, self.resource.fail)
+
+        record = self.records[0]
+        self.assertEqual(('ironic', 'fail'), (record.backend, record.method))
+        self.assertIsInstance(record.error, ValueError)
+
+    def test_generator_timed_until_exhausted(self):
+        self._enable()
+
+        items = self.resource.iter_all()
+        next(items)
+        self.assertEqual([], self.records)
+        list(items)
+
+        self.assertEqual(3, self.records[0].size)
+
+    def test_observer_failure_ignored(self):
+        self._enable()
+        observer = mock.Mock(side_effect=RuntimeError)
+        instrumentation.register_observer(observer)
+        self.addCleanup(instrumentation.unregister_observer, observer)
+
+        self.assertEqual(3, len(self.resource.get_all()))
+        self.assertEqual(1, len(self.records))
+
+    def test_spans(self):
+        tracer = mock.MagicMock()
+        self._enable(tracer)
+
+        self.resource.get_all()
+        list(self.resource.iter_all())
+
+        tracer.start_as_current_span.assert_called_once_with(
+            'oneview.get_all', attributes={'ironic_oneviewd.backend':
+                                           'oneview'})
+        span = tracer.start_as_current_span.return_value.__enter__()
+        span.set_attribute.assert_called_once_with('ironic_oneviewd.size', 3)
+        tracer.start_span.assert_called_once_with(
+            'oneview.iter_all', attributes={'ironic_oneviewd.backend':
+                                            'oneview'})
+        tracer.start_span.return_value.end.assert_called_once_with()
+
+    def test_setup_disabled(self):
+        instrumentation._enabled = True
+
+        instrumentation.setup()
+
+        self.assertFalse(instrumentation._enabled)
+
+    @mock.patch.object(instrumentation.importutils, 'try_import')
+    def test_setup_opentelemetry(self, mock_try_import):
+        CONF.set_override('enabled', True, group='instrumentation')
+        CONF.set_override('opentelemetry', True, group='instrumentation')
+        self.addCleanup(CONF.clear_override, 'enabled',
+                        group='instrumentation')
+        self.addCleanup(CONF.clear_override, 'opentelemetry',
+                        group='instrumentation')
+        self.addCleanup(instrumentation.unregister_observer,
+                        instrumentation.log_call)
+        self.addCleanup(instrumentation.unregister_observer,
+                        instrumentation.metrics.observe_call)
+
+        instrumentation.setup()
+
+        mock_try_import.assert_called_once_with('opentelemetry.trace')
+        self.assertEqual(
+            mock_try_import.return_value.get_tracer.return_value,
+            instrumentation._tracer)
+        self.assertIn(instrumentation.log_call, instrumentation._observers)
@@ -0,0 +1,205 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import os
+import shutil
+import tempfile
+import unittest
+
+from oslo_utils import importutils
+
+from ironic_oneviewd.conf import CONF
+from ironic_oneviewd.inventory_manager import manage as inventory_manager
+from ironic_oneviewd.inventory_manager import results
+
+client_exception = importutils.try_import('hpOneView.exceptions')
+
+
+def _node(uuid, server_hardware_uri):
+    return mock.Mock(uuid=uuid, driver='oneview', maintenance=False,
+                     driver_info={'server_hardware_uri': server_hardware_uri})
+
+
+class TestInventoryManager(unittest.TestCase):
+    def setUp(self):
+        self.facade = mock.Mock()
+        self.facade.get_server_profile_template.return_value = {
+            'uri': '/rest/server-profile-templates/1',
+            'serverHardwareTypeUri': '/rest/server-hardware-types/1',
+            'enclosureGroupUri': '/rest/enclosure-groups/1'}
+        self.facade.iter_server_hardware_available.return_value = [
+            {'uri': '/rest/server-hardware/1', 'name': 'Enclosure 1, bay 1'},
+            {'uri': '/rest/server-hardware/2', 'name': 'Enclosure 1, bay 2'}]
+        self.inventory_manage = inventory_manager.InventoryManager(
+            self.facade)
+
+    def test_check_not_enrolled_hardware(self):
+        nodes = [_node('node-1', '/rest/server-hardware/1')]
+
+        not_enrolled = self.inventory_manage.check_not_enrolled_hardware(
+            nodes, ['1'])
+
+        self.assertEqual(['/rest/server-hardware/2'], not_enrolled)
+        self.assertFalse(self.facade.get_server_hardware.called)
+
+    def test_check_not_enrolled_hardware_shared_query(self):
+        templates = {
+            '1': {'uri': '/rest/server-profile-templates/1',
+                  'serverHardwareTypeUri': '/rest/server-hardware-types/1',
+                  'enclosureGroupUri': '/rest/enclosure-groups/1'},
+            '2': {'uri': '/rest/server-profile-templates/2',
+                  'serverHardwareTypeUri': '/rest/server-hardware-types/1',
+                  'enclosureGroupUri': '/rest/enclosure-groups/1'},
+            '3': {'uri': '/rest/server-profile-templates/3',
+                  'serverHardwareTypeUri': '/rest/server-hardware-types/2'},
+        }
+        self.facade.get_server_profile_template.side_effect = (
+            templates.get)
+
+        not_enrolled = self.inventory_manage.check_not_enrolled_hardware(
+            [], ['1', '2', '3'])
+
+        filter_calls = self.facade.iter_server_hardware_available
+        self.assertEqual(3, self.facade.get_server_profile_template.call_count)
+        self.assertEqual(
+            sorted([mock.call(["serverHardwareTypeUri="
+                               "'/rest/server-hardware-types/1'",
+                               "serverGroupUri='/rest/enclosure-groups/1'"]),
+                    mock.call(["serverHardwareTypeUri="
+                               "'/rest/server-hardware-types/2'"])]),
+            sorted(filter_calls.call_args_list))
+        self.assertEqual(4, len(not_enrolled))
+
+    def test_check_not_enrolled_hardware_oneview_error(self):
+        self.facade.get_server_profile_template.side_effect = (
+            client_exception.HPOneViewException('Template not found'))
+
+        not_enrolled = self.inventory_manage.check_not_enrolled_hardware(
+            [], ['1'])
+
+        self.assertEqual([], not_enrolled)
+        self.assertFalse(self.facade.iter_server_hardware_available.called)
+
+    @mock.patch.object(inventory_manager.LOG, 'warning')
+    def test_check_enrolled_hardware(self, mock_warning):
+        template_hardware = [{'uri': '/rest/server-hardware/1'},
+                             {'uri': '/rest/server-hardware/2'}]
+        oneview_hardware = template_hardware + [
+            {'uri': '/rest/server-hardware/5'}]
+
+        def iter_server_hardware(filters='', fields=None):
+            return oneview_hardware if fields == ['uri'] else (
+                template_hardware)
+        self.facade.iter_server_hardware_available.side_effect = (
+            iter_server_hardware)
+        nodes = [_node('node-1', '/rest/server-hardware/1'),
+                 _node('node-2', '/rest/server-hardware/1'),
+                 _node('node-3', '/rest/server-hardware/9'),
+                 _node('node-4', '/rest/server-hardware/5')]
+        index = self.inventory_manage.hardware_index
+
+        self.inventory_manage.check_not_enrolled_hardware(nodes, ['1'])
+
+        self.assertEqual({'/rest/server-hardware/1': ['node-1', 'node-2']},
+                         index.duplicated_hardware())
+        self.assertEqual(set(['/rest/server-hardware/9']),
+                         index.deleted_hardware)
+        self.assertEqual(2, mock_warning.call_count)
+
+        # NOTE: Hardware seen by a previous scan is reported once deleted
+        oneview_hardware.pop()
+        self.inventory_manage.check_not_enrolled_hardware(nodes, ['1'])
+
+        self.assertEqual(set(['/rest/server-hardware/5',
+                              '/rest/server-hardware/9']),
+                         index.deleted_hardware)
+        self.facade.iter_server_hardware_available.assert_called_with(
+            fields=['uri'])
+        self.assertEqual(4, self.facade.iter_server_hardware_available
+                         .call_count)
+        self.assertFalse(self.facade.get_server_hardware.called)
+
+    @mock.patch.object(inventory_manager.validation, 'validate_nodes')
+    def test_check_inventory_validation_due(self, mock_validate):
+        CONF.set_override('server_profile_templates', [], group='inventory')
+        self.addCleanup(CONF.clear_override, 'server_profile_templates',
+                        group='inventory')
+        nodes = [_node('node-1', '/rest/server-hardware/1')]
+        self.facade.get_ironic_node_snapshot.return_value = nodes
+
+        self.inventory_manage.check_inventory()
+        self.inventory_manage.check_inventory()
+
+        # NOTE: The nodes are validated from the inventory listing
+        self.facade.get_ironic_node_snapshot.assert_has_calls([
+            mock.call(drivers=mock.ANY, maintenance=False,
+                      fields=inventory_manager.VALIDATION_NODE_FIELDS),
+            mock.call(drivers=mock.ANY, maintenance=False,
+                      fields=inventory_manager.NODE_FIELDS)])
+        self.assertEqual(2, self.facade.get_ironic_node_snapshot.call_count)
+        mock_validate.assert_called_once_with(nodes)
+
+
+@mock.patch.object(inventory_manager.time, 'sleep', side_effect=ValueError)
+class TestInventoryLeaderElection(unittest.TestCase):
+    def setUp(self):
+        results_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, results_dir)
+        self.results_file = os.path.join(results_dir, 'inventory.json')
+        CONF.set_override('results_file', self.results_file,
+                          group='inventory')
+        CONF.set_override('server_profile_templates', ['1'],
+                          group='inventory')
+        self.addCleanup(CONF.clear_override, 'results_file',
+                        group='inventory')
+        self.addCleanup(CONF.clear_override, 'server_profile_templates',
+                        group='inventory')
+        self.facade = mock.Mock()
+        self.facade.get_server_profile_template.return_value = {
+            'uri': '/rest/server-profile-templates/1',
+            'serverHardwareTypeUri': '/rest/server-hardware-types/1',
+            'enclosureGroupUri': '/rest/enclosure-groups/1'}
+        self.facade.iter_server_hardware_available.return_value = [
+            {'uri': '/rest/server-hardware/1', 'name': 'Enclosure 1, bay 1'},
+            {'uri': '/rest/server-hardware/2', 'name': 'Enclosure 1, bay 2'}]
+        self.facade.get_ironic_node_snapshot.return_value = [
+            _node('node-1', '/rest/server-hardware/1')]
+        self.inventory_manage = inventory_manager.InventoryManager(
+            self.facade)
+
+    def test_leader_publishes_results(self, mock_sleep):
+        self.assertRaises(ValueError, self.inventory_manage._run)
+
+        leader_results = results.read(self.results_file)
+        self.assertEqual(['/rest/server-hardware/2'],
+                         leader_results['not_enrolled_hardware'])
+
+    @mock.patch.object(inventory_manager.metrics, 'set_unenrolled_hardware')
+    def test_follower_reads_results(self, mock_metric, mock_sleep):
+        results.publish(self.results_file, 'daemon-1',
+                        ['/rest/server-hardware/2'])
+        self.inventory_manage.election = mock.Mock()
+        self.inventory_manage.election.is_leader.return_value = False
+
+        self.assertRaises(ValueError, self.inventory_manage._run)
+
+        self.assertFalse(self.facade.iter_server_hardware_available.called)
+        mock_sleep.assert_called_once_with(
+            CONF.coordination.leader_retry_interval)
+        self.assertEqual('daemon-1',
+                         self.inventory_manage.follow_leader()['leader'])
+        mock_metric.assert_called_with(1)
@@ -0,0 +1,112 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import mock
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+from keystoneauth1 import access
+from keystoneauth1.identity import generic
+
+from ironic_oneviewd.conf import CONF
+from ironic_oneviewd import keystone_auth
+from ironic_oneviewd import utils
+
+
+def _token(expires_in):
+    expires_at = datetime.datetime.utcnow() + datetime.timedelta(
+        seconds=expires_in)
+    return access.create(
+        body={'token': {'expires_at': expires_at.isoformat() + 'Z',
+                        'methods': ['password'], 'catalog': []}},
+        auth_token='token-%d' % expires_in)
+
+
+class TestCachedPassword(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.token_cache_file = os.path.join(self.temp_dir, 'token')
+        patcher = mock.patch.object(generic.Password, 'get_auth_ref')
+        self.mock_get_auth_ref = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _auth(self, username='user', token_cache_file=None):
+        return keystone_auth.CachedPassword(
+            token_cache_file=token_cache_file,
+            auth_url='http://keystone:5000/v3', username=username,
+            password='secret', project_name='admin',
+            user_domain_id='default', project_domain_id='default')
+
+    def test_get_access_reuses_token(self):
+        self.mock_get_auth_ref.return_value = _token(3600)
+        auth = self._auth()
+
+        for i in range(10):
+            self.assertEqual('token-3600', auth.get_token(mock.Mock()))
+
+        self.assertEqual(1, self.mock_get_auth_ref.call_count)
+        self.assertEqual({'token_requests': 10, 'keystone_requests': 1,
+                          'round_trips_avoided': 9}, auth.stats())
+
+    def test_get_access_token_expiring(self):
+        self.mock_get_auth_ref.side_effect = [_token(10), _token(3600)]
+        auth = self._auth()
+
+        auth.get_token(mock.Mock())
+        self.assertEqual('token-3600', auth.get_token(mock.Mock()))
+
+        self.assertEqual(2, self.mock_get_auth_ref.call_count)
+
+    def test_token_cache_file(self):
+        self.mock_get_auth_ref.return_value = _token(3600)
+        self._auth(token_cache_file=self.token_cache_file).get_token(
+            mock.Mock())
+
+        restarted_auth = self._auth(token_cache_file=self.token_cache_file)
+
+        self.assertEqual('token-3600', restarted_auth.get_token(mock.Mock()))
+        self.assertEqual(1, self.mock_get_auth_ref.call_count)
+        self.assertEqual(
+            0o600, stat.S_IMODE(os.stat(self.token_cache_file).st_mode))
+
+    def test_token_cache_file_other_credentials(self):
+        self.mock_get_auth_ref.return_value = _token(3600)
+        self._auth(token_cache_file=self.token_cache_file).get_token(
+            mock.Mock())
+
+        other_auth = self._auth(username='other',
+                                token_cache_file=self.token_cache_file)
+        other_auth.get_token(mock.Mock())
+
+        self.assertEqual(2, self.mock_get_auth_ref.call_count)
+
+
+class TestKeystoneSession(unittest.TestCase):
+    def test_get_keystone_session_pool_size(self):
+        CONF.set_override('rpc_thread_pool_size', 42, group='DEFAULT')
+        self.addCleanup(CONF.clear_override, 'rpc_thread_pool_size',
+                        group='DEFAULT')
+
+        session = utils.get_keystone_session()
+
+        adapter = session.session.get_adapter('https://ironic:6385')
+        self.assertEqual(42, adapter._pool_maxsize)
+        self.assertIsInstance(session.auth, keystone_auth.CachedPassword)
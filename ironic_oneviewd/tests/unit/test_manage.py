@@ -0,0 +1,97 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import unittest
+
+import six
+
+from ironic_oneviewd import facade
+from ironic_oneviewd import manage
+from ironic_oneviewd.node_snapshot import NodeRecord
+from ironic_oneviewd import utils
+
+
+def _node(index, provision_state='available'):
+    return NodeRecord(
+        'node-%d' % index, name='node-%d' % index, driver='oneview',
+        provision_state=provision_state,
+        properties={'capabilities': 'enclosure_group_uri:'
+                                    '/rest/enclosure-groups/%d' % (index % 2)},
+        driver_info={'server_hardware_uri':
+                     '/rest/server-hardware/%d' % index})
+
+
+def _args(**kwargs):
+    args = {'filters': None, 'enclosure': None, 'max_concurrency': None,
+            'dry_run': False, 'on': False, 'off': False, 'reason': None}
+    args.update(kwargs)
+    return mock.Mock(**args)
+
+
+@mock.patch.object(manage, 'Facade')
+class TestBatchCommands(unittest.TestCase):
+    def _run(self, command, args):
+        with mock.patch('sys.stdout', new=six.StringIO()) as stdout:
+            exit_code = command(args)
+        return exit_code, stdout.getvalue()
+
+    def test_maintenance_on_filtered(self, mock_facade):
+        mock_facade().get_ironic_node_snapshot.return_value = [
+            _node(i) for i in range(6)]
+        mock_facade().iter_server_hardware_available.return_value = iter(
+            [{'uri': '/rest/server-hardware/%d' % i} for i in range(4)])
+        mock_facade().nodes_set_maintenance.return_value = [
+            facade.NodeResult('node-1', None),
+            facade.NodeResult('node-3', 'locked')]
+
+        exit_code, output = self._run(manage.do_maintenance, _args(
+            on=True, reason='draining', enclosure='/rest/enclosures/1',
+            filters=['enclosure_group_uri=/rest/enclosure-groups/1']))
+
+        self.assertEqual(1, exit_code)
+        self.assertIn('1 nodes set in maintenance, 1 failed.', output)
+        mock_facade().get_ironic_node_snapshot.assert_called_once_with(
+            drivers=utils.SUPPORTED_DRIVERS, provision_states=None,
+            maintenance=False, fields=manage.BATCH_FIELDS)
+        mock_facade().iter_server_hardware_available.assert_called_once_with(
+            filters="locationUri='/rest/enclosures/1'", fields=['uri'])
+        mock_facade().nodes_set_maintenance.assert_called_once_with(
+            ['node-1', 'node-3'], True, 'draining', max_concurrency=None)
+
+    def test_maintenance_on_or_off(self, mock_facade):
+        self.assertRaises(Exception, manage.do_maintenance,
+                          _args(on=True, off=True))
+        self.assertRaises(Exception, manage.do_maintenance, _args())
+
+    def test_invalid_filter(self, mock_facade):
+        self.assertRaises(Exception, manage.do_maintenance,
+                          _args(off=True, filters=['maintenance=true']))
+
+    def test_provision_dry_run(self, mock_facade):
+        mock_facade().get_ironic_node_snapshot.return_value = [
+            _node(1, 'enroll'), _node(2, 'enroll')]
+
+        exit_code, output = self._run(manage.do_provision, _args(
+            state='manage', dry_run=True, filters=['provision_state=enroll',
+                                                   'name=node-2']))
+
+        self.assertEqual(0, exit_code)
+        self.assertIn('1 nodes would be requested to manage.', output)
+        mock_facade().get_ironic_node_snapshot.assert_called_once_with(
+            drivers=utils.SUPPORTED_DRIVERS, provision_states=['enroll'],
+            maintenance=False, fields=manage.BATCH_FIELDS)
+        self.assertFalse(mock_facade().set_nodes_provision_state.called)
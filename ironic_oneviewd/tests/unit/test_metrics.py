@@ -0,0 +1,250 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import mock
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+from oslo_utils import importutils
+
+from ironic_oneviewd.conf import CONF
+from ironic_oneviewd import instrumentation
+from ironic_oneviewd import metrics
+from ironic_oneviewd import node_cache
+from ironic_oneviewd.node_manager import transitions
+
+prometheus_client = importutils.try_import('prometheus_client')
+
+CONFIG = """[metrics]
+enabled = %(enabled)s
+multiprocess_dir = %(multiprocess_dir)s
+"""
+
+# NOTE: prometheus_client is already imported in the test process, so the
+# metrics are recorded in a new interpreter, set up as the entry point of the
+# daemon does it: prepare is called before anything else is imported.
+DAEMON = """import json
+import sys
+
+from ironic_oneviewd import metrics
+metrics.prepare(sys.argv[1])
+
+from ironic_oneviewd.tests.unit import test_metrics
+print(json.dumps(test_metrics.run_daemon(sys.argv[1], sys.argv[2])))
+"""
+
+
+def _get_sample(name, labels=None):
+    return metrics.get_registry().get_sample_value(name, labels or {})
+
+
+def run_daemon(config_file, target):
+    CONF(args=[], default_config_files=[config_file])
+    metrics.setup()
+    return globals()[target]()
+
+
+def _record_inventory_cycle():
+    metrics.set_unenrolled_hardware(7)
+    metrics.observe_cycle('inventory_manager', 2.0)
+
+
+def _record_both_processes():
+    nodes = [mock.Mock(provision_state=state)
+             for state in ['enroll', 'enroll', 'manageable']]
+    metrics.set_provision_states(nodes)
+    metrics.set_node_actions(25, 20)
+    metrics.observe_cycle('node_manager', 0.3)
+    metrics.observe_request('oneview', 'GET', 0.02)
+    metrics.set_circuit_state('ironic', 'open')
+    metrics.observe_call(instrumentation.CallRecord(
+        'ironic', 'get_ironic_node', 0.2, None, ValueError()))
+
+    process = multiprocessing.Process(target=_record_inventory_cycle)
+    process.start()
+    process.join()
+
+    samples = {
+        'nodes': _get_sample(
+            'ironic_oneviewd_nodes', {'provision_state': 'enroll'}),
+        'queued_actions': _get_sample('ironic_oneviewd_queued_node_actions'),
+        'running_actions': _get_sample(
+            'ironic_oneviewd_running_node_actions'),
+        'node_cycles': _get_sample(
+            'ironic_oneviewd_cycle_duration_seconds_count',
+            {'manager': 'node_manager'}),
+        'inventory_cycles': _get_sample(
+            'ironic_oneviewd_cycle_duration_seconds_sum',
+            {'manager': 'inventory_manager'}),
+        'requests': _get_sample(
+            'ironic_oneviewd_request_duration_seconds_bucket',
+            {'backend': 'oneview', 'method': 'GET', 'le': '0.025'}),
+        'circuit_state': _get_sample(
+            'ironic_oneviewd_circuit_breaker_state', {'backend': 'ironic'}),
+        'calls': _get_sample(
+            'ironic_oneviewd_call_duration_seconds_count',
+            {'backend': 'ironic', 'method': 'get_ironic_node',
+             'outcome': 'error'}),
+        'unenrolled_hardware': _get_sample(
+            'ironic_oneviewd_unenrolled_server_hardware'),
+    }
+    metrics.mark_process_dead(process.pid)
+    samples['unenrolled_hardware_dead'] = _get_sample(
+        'ironic_oneviewd_unenrolled_server_hardware')
+    return samples
+
+
+def _record_provision_state_emptied():
+    metrics.set_provision_states([mock.Mock(provision_state='enroll')])
+    metrics.set_provision_states([])
+    return _get_sample('ironic_oneviewd_nodes', {'provision_state': 'enroll'})
+
+
+def _record_transitions():
+    tracker = transitions.TransitionTracker()
+    node = mock.Mock(uuid='node-1', provision_state='enroll')
+
+    tracker.run(node, 'manage', mock.Mock())
+
+    return [_get_sample('ironic_oneviewd_transitions_total',
+                        {'target': 'manage', 'outcome': outcome})
+            for outcome in ('issued', 'succeeded')]
+
+
+# NOTE: Only the clock of the cache is patched, prometheus_client reads it too
+@mock.patch.object(node_cache, 'time')
+def _record_node_cache(mock_time):
+    mock_time.time.side_effect = [100.0, 110.0, 200.0]
+    facade = mock.Mock()
+    facade.get_ironic_node_snapshot.return_value = []
+    process_manager = mock.Mock(Lock=threading.Lock, dict=dict)
+    cache = node_cache.NodeSnapshotCache(facade, process_manager, ttl=60)
+
+    for _ in range(3):
+        cache.get_nodes()
+
+    return {
+        'hits': _get_sample('ironic_oneviewd_node_cache_requests_total',
+                            {'result': 'hit'}),
+        'misses': _get_sample('ironic_oneviewd_node_cache_requests_total',
+                              {'result': 'miss'}),
+        'staleness_count': _get_sample(
+            'ironic_oneviewd_node_cache_staleness_seconds_count'),
+        'staleness_sum': _get_sample(
+            'ironic_oneviewd_node_cache_staleness_seconds_sum'),
+    }
+
+
+@unittest.skipIf(prometheus_client is None,
+                 'prometheus_client is not installed')
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.multiprocess_dir = os.path.join(self.tmp_dir, 'metrics')
+        environ = mock.patch.dict(os.environ)
+        environ.start()
+        self.addCleanup(environ.stop)
+        os.environ.pop('PROMETHEUS_MULTIPROC_DIR', None)
+
+    def _write_config(self, enabled):
+        config_file = os.path.join(self.tmp_dir, 'ironic-oneviewd.conf')
+        with open(config_file, 'w') as f:
+            f.write(CONFIG % {'enabled': enabled,
+                              'multiprocess_dir': self.multiprocess_dir})
+        return config_file
+
+    def _run_daemon(self, target):
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        output = subprocess.check_output(
+            [sys.executable, '-c', DAEMON, self._write_config(True), target],
+            env=env)
+        return json.loads(output.decode('utf-8'))
+
+    def test_metrics_from_both_processes(self):
+        samples = self._run_daemon('_record_both_processes')
+
+        self.assertEqual(2, samples['nodes'])
+        self.assertEqual(5, samples['queued_actions'])
+        self.assertEqual(20, samples['running_actions'])
+        self.assertEqual(1, samples['node_cycles'])
+        self.assertEqual(2.0, samples['inventory_cycles'])
+        self.assertEqual(1, samples['requests'])
+        self.assertEqual(2, samples['circuit_state'])
+        self.assertEqual(1, samples['calls'])
+
+        # NOTE: Live gauges of finished processes are dropped
+        self.assertEqual(7, samples['unenrolled_hardware'])
+        self.assertEqual(0, samples['unenrolled_hardware_dead'])
+
+    def test_provision_state_emptied(self):
+        self.assertEqual(
+            0, self._run_daemon('_record_provision_state_emptied'))
+
+    def test_transitions(self):
+        self.assertEqual([1, 1], self._run_daemon('_record_transitions'))
+
+    def test_node_cache(self):
+        self.assertEqual({'hits': 1, 'misses': 2, 'staleness_count': 3,
+                          'staleness_sum': 10.0},
+                         self._run_daemon('_record_node_cache'))
+
+    def test_prepare(self):
+        metrics.prepare(self._write_config(True))
+
+        self.assertEqual(self.multiprocess_dir,
+                         os.environ['PROMETHEUS_MULTIPROC_DIR'])
+        self.assertTrue(os.path.isdir(self.multiprocess_dir))
+
+    def test_prepare_private_dir(self):
+        self.multiprocess_dir = ''
+        metrics.prepare(self._write_config(True))
+
+        multiprocess_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+        self.addCleanup(shutil.rmtree, multiprocess_dir)
+        self.assertEqual(0o700, os.stat(multiprocess_dir).st_mode & 0o777)
+
+    def test_prepare_disabled(self):
+        metrics.prepare(self._write_config(False))
+
+        self.assertNotIn('PROMETHEUS_MULTIPROC_DIR', os.environ)
+        self.assertFalse(os.path.exists(self.multiprocess_dir))
+
+    def test_prepare_missing_config_file(self):
+        metrics.prepare(os.path.join(self.tmp_dir, 'missing.conf'))
+
+        self.assertNotIn('PROMETHEUS_MULTIPROC_DIR', os.environ)
+
+    def test_setup_disabled(self):
+        self.assertIsNone(metrics.setup())
+        self.assertNotIn('PROMETHEUS_MULTIPROC_DIR', os.environ)
+
+    @mock.patch.dict(sys.modules, {'prometheus_client': mock.Mock()})
+    def test_setup_after_prometheus_client_imported(self):
+        CONF.set_override('enabled', True, group='metrics')
+        self.addCleanup(CONF.clear_override, 'enabled', group='metrics')
+
+        self.assertIsNone(metrics.setup())
+        self.assertNotIn('PROMETHEUS_MULTIPROC_DIR', os.environ)
+        self.assertFalse(metrics._metrics)
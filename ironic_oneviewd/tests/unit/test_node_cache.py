@@ -0,0 +1,61 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import threading
+import unittest
+
+from ironic_oneviewd import node_cache
+
+
+class FakeProcessManager(object):
+    Lock = threading.Lock
+    dict = dict
+
+
+class TestNodeSnapshotCache(unittest.TestCase):
+    def setUp(self):
+        self.facade = mock.Mock()
+        self.facade.get_ironic_node_snapshot.return_value = [
+            mock.Mock(uuid='1', driver='oneview', maintenance=False,
+                      provision_state='enroll', properties={},
+                      driver_info={}, extra={}, last_error=None)]
+        self.cache = node_cache.NodeSnapshotCache(
+            self.facade, FakeProcessManager(), ttl=60)
+
+    @mock.patch.object(node_cache.time, 'time')
+    def test_get_nodes_hit(self, mock_time):
+        mock_time.side_effect = [100.0, 110.0]
+
+        first_nodes = self.cache.get_nodes()
+        second_nodes = self.cache.get_nodes()
+
+        self.assertEqual(1, self.facade.get_ironic_node_snapshot.call_count)
+        self.assertEqual(['1'], [node.uuid for node in first_nodes])
+        self.assertEqual(['1'], [node.uuid for node in second_nodes])
+        self.assertEqual({'hits': 1, 'misses': 1, 'staleness': 10.0,
+                          'max_staleness': 10.0}, self.cache.stats())
+
+    @mock.patch.object(node_cache.time, 'time')
+    def test_get_nodes_expired(self, mock_time):
+        mock_time.side_effect = [100.0, 160.0]
+
+        self.cache.get_nodes()
+        self.cache.get_nodes()
+
+        self.assertEqual(2, self.facade.get_ironic_node_snapshot.call_count)
+        self.assertEqual({'hits': 0, 'misses': 2, 'staleness': 0.0,
+                          'max_staleness': 0.0}, self.cache.stats())
@@ -0,0 +1,165 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import threading
+import time
+import unittest
+
+from ironic_oneviewd.conf import CONF
+from ironic_oneviewd.node_manager import manage as node_manager
+
+
+class SlowFakeFacade(object):
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def set_node_provision_state(self, node, state):
+        time.sleep(self.delay)
+        with self.lock:
+            self.calls.append((node.uuid, state))
+
+
+def _enroll_node(index):
+    return mock.Mock(uuid='node-%d' % index, driver='oneview',
+                     maintenance=False, provision_state='enroll',
+                     last_error=None, updated_at=None)
+
+
+class TestNodeManagerDispatch(unittest.TestCase):
+    def setUp(self):
+        CONF.set_override('rpc_thread_pool_size', 4, group='DEFAULT')
+        CONF.set_override('dispatch_queue_size', 8, group='DEFAULT')
+        self.addCleanup(CONF.clear_override, 'rpc_thread_pool_size',
+                        group='DEFAULT')
+        self.addCleanup(CONF.clear_override, 'dispatch_queue_size',
+                        group='DEFAULT')
+        self.facade = SlowFakeFacade(delay=0.005)
+        self.node_manage = node_manager.NodeManager(self.facade)
+        self.addCleanup(self.node_manage.executor.shutdown)
+
+    def test_dispatch_in_flight_node(self):
+        release = threading.Event()
+        self.facade.set_node_provision_state = (
+            lambda node, state: release.wait(10))
+        node = _enroll_node(1)
+
+        future = self.node_manage.dispatch(node)
+        self.assertIsNone(self.node_manage.dispatch(node))
+        release.set()
+
+        self.assertTrue(future.result(10))
+        self.assertEqual({}, self.node_manage.in_flight)
+
+    def test_dispatch_dirty_node(self):
+        release = threading.Event()
+        calls = []
+        redispatched = threading.Event()
+
+        def set_node_provision_state(node, state):
+            calls.append(node.uuid)
+            if len(calls) == 2:
+                redispatched.set()
+            release.wait(10)
+
+        self.facade.set_node_provision_state = set_node_provision_state
+        updated_node = _enroll_node(1)
+        updated_node.updated_at = '2017-06-01T10:00:00+00:00'
+        self.facade.get_ironic_node = mock.Mock(return_value=updated_node)
+        node = _enroll_node(1)
+
+        self.node_manage.dispatch(node)
+        self.node_manage.handle_node_event(node.uuid)
+        self.assertEqual({'node-1'}, self.node_manage.dirty_nodes)
+        self.assertFalse(self.facade.get_ironic_node.called)
+        release.set()
+
+        # NOTE: The notification received while the actions were in
+        # progress is handled again once they finish.
+        self.assertTrue(redispatched.wait(10))
+        self.facade.get_ironic_node.assert_called_once_with('node-1')
+        self.assertEqual(set(), self.node_manage.dirty_nodes)
+
+    def test_dispatch_dirty_node_queue_full(self):
+        CONF.set_override('rpc_thread_pool_size', 1, group='DEFAULT')
+        CONF.set_override('dispatch_queue_size', 0, group='DEFAULT')
+        node_manage = node_manager.NodeManager(self.facade)
+        self.addCleanup(node_manage.executor.shutdown)
+        release = threading.Event()
+
+        def set_node_provision_state(node, state):
+            if node.uuid == 'node-1':
+                release.wait(10)
+
+        def get_ironic_node(node_uuid):
+            # NOTE: Slow enough for node-2 to take the only queue slot
+            # before the dirty node is dispatched again.
+            time.sleep(0.2)
+            updated_node = _enroll_node(1)
+            updated_node.updated_at = '2017-06-01T10:00:00+00:00'
+            return updated_node
+
+        self.facade.set_node_provision_state = set_node_provision_state
+        self.facade.get_ironic_node = mock.Mock(side_effect=get_ironic_node)
+
+        node_manage.dispatch(_enroll_node(1))
+        node_manage.handle_node_event('node-1')
+        threading.Timer(0.05, release.set).start()
+        future = node_manage.dispatch(_enroll_node(2))
+
+        # NOTE: The worker handling the dirty node does not wait for the
+        # slot held by node-2, queued behind it, so both make progress.
+        self.assertTrue(future.result(10))
+        self.facade.get_ironic_node.assert_called_once_with('node-1')
+        node_manage.executor.shutdown(wait=True)
+        self.assertEqual({}, node_manage.in_flight)
+
+    def test_dispatch_stress_queue_bounded(self):
+        nodes = [_enroll_node(i) for i in range(200)]
+        bound = 4 + 8
+        max_in_flight = [0]
+        max_queued = [0]
+        stop = threading.Event()
+
+        def watch():
+            while not stop.is_set():
+                max_in_flight[0] = max(max_in_flight[0],
+                                       len(self.node_manage.in_flight))
+                max_queued[0] = max(
+                    max_queued[0],
+                    self.node_manage.executor._work_queue.qsize())
+                time.sleep(0.001)
+
+        watcher = threading.Thread(target=watch)
+        watcher.start()
+        try:
+            # NOTE: Cycles overlap the previous cycle's work, as happens
+            # when node actions take longer than the retry interval.
+            for cycle in range(5):
+                for node in self.node_manage._get_changed_nodes(nodes):
+                    self.node_manage.dispatch(node)
+            self.node_manage.executor.shutdown(wait=True)
+        finally:
+            stop.set()
+            watcher.join()
+
+        self.assertLessEqual(max_in_flight[0], bound)
+        self.assertLessEqual(max_queued[0], bound)
+        self.assertEqual(200, len(self.facade.calls))
+        self.assertEqual(200, len(self.node_manage.fingerprints))
+        self.assertEqual({}, self.node_manage.in_flight)
@@ -0,0 +1,117 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import gc
+import json
+import pickle
+import unittest
+
+from ironicclient.v1 import node as ironic_node
+from oslo_utils import importutils
+
+from ironic_oneviewd import node_snapshot
+
+tracemalloc = importutils.try_import('tracemalloc')
+
+
+def _node_dict(index):
+    return {
+        'uuid': '66666666-7777-8888-9999-%012d' % index,
+        'name': 'oneview-%d' % index,
+        'driver': 'oneview',
+        'maintenance': False,
+        'provision_state': ['enroll', 'manageable', 'available'][index % 3],
+        'last_error': None,
+        'updated_at': '2017-06-01T10:00:00+00:00',
+        'properties': {'cpus': 8, 'memory_mb': 32768, 'local_gb': 120,
+                       'cpu_arch': 'x86_64', 'root_device': {'size': 120},
+                       'capabilities': 'server_hardware_type_uri:/rest/'
+                                       'server-hardware-types/1,'
+                                       'enclosure_group_uri:/rest/'
+                                       'enclosure-groups/1,'
+                                       'server_profile_template_uri:/rest/'
+                                       'server-profile-templates/2'},
+        'driver_info': {'server_hardware_uri':
+                        '/rest/server-hardware/%d' % index,
+                        'use_oneview_ml2_driver': False,
+                        'deploy_kernel': 'kernel-uuid',
+                        'deploy_ramdisk': 'ramdisk-uuid'},
+        'extra': {'server_hardware_uri': '/rest/server-hardware/%d' % index},
+    }
+
+
+def _retained_size(build, payload):
+    """Get the bytes still allocated once build parsed the payload."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        objects = build(json.loads(payload)['nodes'])
+        gc.collect()
+        size, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del objects
+    return size
+
+
+class TestNodeRecord(unittest.TestCase):
+    def test_from_dict(self):
+        record = node_snapshot.NodeRecord.from_dict(_node_dict(1))
+
+        self.assertEqual('oneview', record.driver)
+        self.assertEqual(
+            {'server_hardware_uri': '/rest/server-hardware/1'},
+            record.driver_info)
+        self.assertEqual(['capabilities', 'cpu_arch', 'cpus', 'local_gb',
+                          'memory_mb'], sorted(record.properties))
+        self.assertFalse(hasattr(record, '__dict__'))
+
+    def test_missing_fields(self):
+        record = node_snapshot.NodeRecord.from_dict(
+            {'uuid': 'node-1', 'driver_info': None})
+
+        self.assertEqual({}, record.driver_info)
+        self.assertIsNone(record.provision_state)
+
+    def test_strings_interned(self):
+        first, second = [node_snapshot.NodeRecord.from_dict(
+            json.loads(json.dumps(_node_dict(index)))) for index in (0, 3)]
+
+        self.assertIs(first.provision_state, second.provision_state)
+        self.assertIs(first.properties['capabilities'],
+                      second.properties['capabilities'])
+
+    def test_pickle(self):
+        record = node_snapshot.NodeRecord.from_dict(_node_dict(1))
+
+        copy = pickle.loads(pickle.dumps(record, pickle.HIGHEST_PROTOCOL))
+
+        self.assertEqual(record.uuid, copy.uuid)
+        self.assertEqual(record.properties, copy.properties)
+        self.assertIs(record.driver, copy.driver)
+
+    @unittest.skipIf(tracemalloc is None, 'tracemalloc is not available')
+    def test_memory_50k_nodes(self):
+        payload = json.dumps(
+            {'nodes': [_node_dict(index) for index in range(50000)]})
+
+        resources_size = _retained_size(
+            lambda nodes: [ironic_node.Node(None, node, loaded=True)
+                           for node in nodes], payload)
+        records_size = _retained_size(
+            lambda nodes: [node_snapshot.NodeRecord.from_dict(node)
+                           for node in nodes], payload)
+
+        self.assertLess(records_size, resources_size / 2)
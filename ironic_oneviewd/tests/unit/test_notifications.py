@@ -0,0 +1,129 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import threading
+import unittest
+
+from oslo_utils import importutils
+
+from ironic_oneviewd.conf import CONF
+from ironic_oneviewd.node_manager import manage as node_manager
+from ironic_oneviewd.node_manager import notifications
+
+oslo_messaging = importutils.try_import('oslo_messaging')
+
+
+def _node_payload(node_uuid):
+    return {'ironic_object.name': 'NodeSetProvisionStatePayload',
+            'ironic_object.data': {'uuid': node_uuid,
+                                   'provision_state': 'enroll'}}
+
+
+@unittest.skipIf(oslo_messaging is None, 'oslo.messaging is not installed')
+class TestNodeEventListener(unittest.TestCase):
+    def setUp(self):
+        oslo_messaging.get_notification_transport(CONF, url='fake:/')
+        CONF.set_override('transport_url', 'fake:/',
+                          group='oslo_messaging_notifications')
+        self.addCleanup(CONF.clear_override, 'transport_url',
+                        group='oslo_messaging_notifications')
+        self.notifier = oslo_messaging.Notifier(
+            oslo_messaging.get_notification_transport(CONF),
+            publisher_id='ironic-conductor.host',
+            driver='messaging',
+            topics=CONF.notifications.topics)
+
+    def _listen(self, expected_events):
+        received = []
+        done = threading.Event()
+
+        def callback(node_uuid):
+            received.append(node_uuid)
+            if len(received) == expected_events:
+                done.set()
+
+        listener = notifications.get_node_event_listener(callback)
+        listener.start()
+        self.addCleanup(listener.wait)
+        self.addCleanup(listener.stop)
+        return received, done
+
+    def test_provision_and_maintenance_events(self):
+        received, done = self._listen(expected_events=2)
+
+        self.notifier.info({}, 'baremetal.node.provision_set.end',
+                           _node_payload('node-1'))
+        self.notifier.info({}, 'baremetal.node.power_set.end',
+                           _node_payload('node-2'))
+        self.notifier.info({}, 'baremetal.node.maintenance_set.end',
+                           _node_payload('node-3'))
+
+        self.assertTrue(done.wait(10))
+        self.assertEqual(['node-1', 'node-3'], received)
+
+    def test_create_event(self):
+        received, done = self._listen(expected_events=1)
+
+        # NOTE: A newly enrolled node is handled without waiting for the
+        # reconciliation polling.
+        self.notifier.info({}, 'baremetal.node.create.end',
+                           _node_payload('node-1'))
+
+        self.assertTrue(done.wait(10))
+        self.assertEqual(['node-1'], received)
+
+
+class TestNodeManagerEvents(unittest.TestCase):
+    def setUp(self):
+        self.facade = mock.Mock()
+        self.node_manage = node_manager.NodeManager(self.facade)
+        self.node_manage.dispatch = mock.Mock()
+
+    def _node(self, **kwargs):
+        node = mock.Mock(uuid='node-1', driver='oneview', maintenance=False,
+                         provision_state='enroll', last_error=None,
+                         updated_at='2017-06-01T10:00:00+00:00')
+        for key, value in kwargs.items():
+            setattr(node, key, value)
+        return node
+
+    def test_handle_node_event(self):
+        node = self._node()
+        self.facade.get_ironic_node.return_value = node
+
+        self.node_manage.handle_node_event('node-1')
+
+        self.facade.get_ironic_node.assert_called_once_with('node-1')
+        self.node_manage.dispatch.assert_called_once_with(node, True)
+
+    def test_handle_node_event_not_actionable(self):
+        self.facade.get_ironic_node.return_value = self._node(
+            provision_state='available')
+
+        self.node_manage.handle_node_event('node-1')
+
+        self.assertFalse(self.node_manage.dispatch.called)
+
+    def test_handle_node_event_unchanged(self):
+        node = self._node()
+        self.facade.get_ironic_node.return_value = node
+        self.node_manage.fingerprints['node-1'] = (
+            node_manager.node_fingerprint(node))
+
+        self.node_manage.handle_node_event('node-1')
+
+        self.assertFalse(self.node_manage.dispatch.called)
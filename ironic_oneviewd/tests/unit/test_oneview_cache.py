@@ -0,0 +1,80 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import unittest
+
+from ironic_oneviewd import oneview_cache
+
+
+class TestOneViewResourceCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = oneview_cache.OneViewResourceCache(ttl=60, max_size=2)
+        self.fetch = mock.Mock(return_value={'uri': '/rest/a'})
+        self.is_unchanged = mock.Mock(return_value=True)
+
+    @mock.patch.object(oneview_cache.time, 'time')
+    def test_get_hit(self, mock_time):
+        mock_time.side_effect = [100.0, 110.0]
+
+        self.cache.get('a', self.fetch, self.is_unchanged)
+        resource = self.cache.get('a', self.fetch, self.is_unchanged)
+
+        self.assertEqual({'uri': '/rest/a'}, resource)
+        self.fetch.assert_called_once_with()
+        self.assertFalse(self.is_unchanged.called)
+        self.assertEqual({'hits': 1, 'misses': 1, 'revalidations': 0,
+                          'size': 1}, self.cache.stats())
+
+    @mock.patch.object(oneview_cache.time, 'time')
+    def test_get_expired_unchanged(self, mock_time):
+        mock_time.side_effect = [100.0, 200.0, 210.0]
+
+        for i in range(3):
+            self.cache.get('a', self.fetch, self.is_unchanged)
+
+        self.fetch.assert_called_once_with()
+        self.is_unchanged.assert_called_once_with({'uri': '/rest/a'})
+        self.assertEqual({'hits': 1, 'misses': 1, 'revalidations': 1,
+                          'size': 1}, self.cache.stats())
+
+    @mock.patch.object(oneview_cache.time, 'time')
+    def test_get_expired_changed(self, mock_time):
+        mock_time.side_effect = [100.0, 200.0]
+        self.is_unchanged.return_value = False
+
+        self.cache.get('a', self.fetch, self.is_unchanged)
+        self.cache.get('a', self.fetch, self.is_unchanged)
+
+        self.assertEqual(2, self.fetch.call_count)
+
+    def test_get_evicts_least_recently_used(self):
+        self.cache.get('a', self.fetch, self.is_unchanged)
+        self.cache.get('b', self.fetch, self.is_unchanged)
+        self.cache.get('a', self.fetch, self.is_unchanged)
+        self.cache.get('c', self.fetch, self.is_unchanged)
+        self.cache.get('a', self.fetch, self.is_unchanged)
+        self.cache.get('b', self.fetch, self.is_unchanged)
+
+        self.assertEqual(4, self.fetch.call_count)
+
+    def test_get_disabled(self):
+        self.cache.ttl = 0
+
+        self.cache.get('a', self.fetch, self.is_unchanged)
+        self.cache.get('a', self.fetch, self.is_unchanged)
+
+        self.assertEqual(2, self.fetch.call_count)
@@ -0,0 +1,174 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import mock
+import socket
+import threading
+import time
+import unittest
+
+from ironic_oneviewd import oneview_session
+
+
+class FakeOneView(object):
+    """Fake OneView appliance accepting a single session token."""
+
+    def __init__(self):
+        self.session_id = 'session-1'
+        self.handshakes = 0
+        self.lock = threading.Lock()
+
+
+class FakeResponse(object):
+    def __init__(self, status, body):
+        self.status = status
+        self.will_close = False
+        self._body = json.dumps(body).encode('utf-8')
+
+    def read(self):
+        return self._body
+
+
+class FakeHTTPSConnection(object):
+    def __init__(self, oneview):
+        self.oneview = oneview
+        self.closed = False
+        self.response = None
+        with oneview.lock:
+            oneview.handshakes += 1
+
+    def request(self, method, path, body, headers):
+        if self.closed:
+            raise socket.error('Connection reset by peer')
+        if path == oneview_session.LOGIN_SESSIONS_URI:
+            time.sleep(0.01)
+            with self.oneview.lock:
+                self.oneview.session_id = 'session-%d' % (
+                    int(self.oneview.session_id.split('-')[1]) + 1)
+            self.response = FakeResponse(
+                200, {'sessionID': self.oneview.session_id})
+        elif headers.get('auth') != self.oneview.session_id:
+            self.response = FakeResponse(401, {'errorCode': 'AUTHORIZATION'})
+        else:
+            self.response = FakeResponse(200, {'uri': path})
+
+    def getresponse(self):
+        return self.response
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection(object):
+    """Fake hpOneView connection, logging in through do_http."""
+
+    def __init__(self, oneview):
+        self.oneview = oneview
+        self._headers = {'auth': oneview.session_id}
+
+    def get_session_id(self):
+        return self._headers.get('auth')
+
+    def get_connection(self):
+        return FakeHTTPSConnection(self.oneview)
+
+    def login(self, cred):
+        resp, body = self.do_http(
+            'POST', oneview_session.LOGIN_SESSIONS_URI, json.dumps(cred))
+        self._headers['auth'] = body['sessionID']
+
+    def do_http(self, method, path, body, custom_headers=None):
+        raise AssertionError('Requests must go through the session')
+
+
+class TestOneViewSession(unittest.TestCase):
+    def setUp(self):
+        self.oneview = FakeOneView()
+        self.connection = FakeConnection(self.oneview)
+        self.session = oneview_session.OneViewSession(
+            self.connection, 4, {'userName': 'user', 'password': 'secret'})
+
+    def test_do_http_reuses_connection(self):
+        for i in range(10):
+            resp, body = self.connection.do_http(
+                'GET', '/rest/server-hardware/%d' % i, '')
+            self.assertEqual(200, resp.status)
+            self.assertEqual({'uri': '/rest/server-hardware/%d' % i}, body)
+
+        self.assertEqual(1, self.oneview.handshakes)
+        self.assertEqual(10, self.session.stats()['requests'])
+        self.assertEqual(1, self.session.stats()['connections_opened'])
+
+    def test_do_http_stale_connection(self):
+        self.connection.do_http('GET', '/rest/server-hardware/1', '')
+        self.session._pool.queue[0].close()
+
+        resp, body = self.connection.do_http(
+            'GET', '/rest/server-hardware/2', '')
+
+        self.assertEqual(200, resp.status)
+        self.assertEqual(2, self.oneview.handshakes)
+
+    def test_do_http_stale_connection_not_idempotent(self):
+        self.connection.do_http('GET', '/rest/server-hardware/1', '')
+        self.session._pool.queue[0].close()
+
+        # NOTE: OneView may have applied the request, so it is not sent again
+        self.assertRaises(
+            oneview_session.oneview_exceptions.HPOneViewException,
+            self.connection.do_http, 'POST', '/rest/server-profiles', '{}')
+        self.assertEqual(1, self.oneview.handshakes)
+
+    def test_do_http_session_expired(self):
+        self.oneview.session_id = 'session-5'
+        results = []
+
+        def get(i):
+            results.append(self.connection.do_http(
+                'GET', '/rest/server-hardware/%d' % i, '')[0].status)
+
+        workers = [threading.Thread(target=get, args=(i,))
+                   for i in range(20)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual([200] * 20, results)
+        # NOTE: A single login for all the workers refused at once
+        self.assertEqual(1, self.session.stats()['logins'])
+        self.assertEqual('session-6', self.connection.get_session_id())
+
+    def test_do_http_forked_process(self):
+        self.connection.do_http('GET', '/rest/server-hardware/1', '')
+
+        with mock.patch.object(oneview_session.os, 'getpid',
+                               return_value=-1):
+            self.connection.do_http('GET', '/rest/server-hardware/2', '')
+
+        self.assertEqual(2, self.oneview.handshakes)
+
+    def test_unsupported_connection(self):
+        connection = FakeConnection(self.oneview)
+        del connection._headers
+
+        session = oneview_session.OneViewSession(
+            connection, 4, {'userName': 'user', 'password': 'secret'})
+
+        self.assertFalse(session.managed)
+        self.assertRaises(AssertionError, connection.do_http,
+                          'GET', '/rest/server-hardware/1', '')
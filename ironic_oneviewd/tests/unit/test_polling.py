@@ -0,0 +1,65 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import unittest
+
+from ironic_oneviewd.conf import CONF
+from ironic_oneviewd import polling
+
+
+class TestPolling(unittest.TestCase):
+    def test_adaptive_interval(self):
+        interval = polling.AdaptiveInterval(10, 300, jitter=0)
+
+        idle = [interval.next(False) for i in range(6)]
+        active = interval.next(True)
+
+        self.assertEqual([20, 40, 80, 160, 300, 300], idle)
+        self.assertEqual(10, active)
+
+    def test_adaptive_interval_jitter(self):
+        interval = polling.AdaptiveInterval(10, 300, jitter=0.1)
+
+        for i in range(100):
+            self.assertTrue(9 <= interval.next(True) <= 11)
+
+    def test_get_polling_interval(self):
+        self.assertIsInstance(polling.get_polling_interval(300),
+                              polling.FixedInterval)
+        self.assertEqual(300, polling.get_polling_interval(300).next(True))
+
+    def test_get_polling_interval_adaptive(self):
+        CONF.set_override('adaptive_polling', True, group='DEFAULT')
+        self.addCleanup(CONF.clear_override, 'adaptive_polling',
+                        group='DEFAULT')
+
+        interval = polling.get_polling_interval(300)
+
+        self.assertIsInstance(interval, polling.AdaptiveInterval)
+        self.assertEqual(10, interval.min_interval)
+        self.assertEqual(300, interval.max_interval)
+
+    def test_get_polling_interval_adaptive_node_cache(self):
+        CONF.set_override('adaptive_polling', True, group='DEFAULT')
+        self.addCleanup(CONF.clear_override, 'adaptive_polling',
+                        group='DEFAULT')
+        CONF.set_override('node_cache_ttl', 60, group='DEFAULT')
+        self.addCleanup(CONF.clear_override, 'node_cache_ttl',
+                        group='DEFAULT')
+
+        interval = polling.get_polling_interval(300)
+
+        self.assertEqual(60, interval.min_interval)
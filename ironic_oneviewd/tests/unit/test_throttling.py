@@ -0,0 +1,198 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import mock
+import requests
+import unittest
+
+from ironic_oneviewd.conf import CONF
+from ironic_oneviewd import exceptions
+from ironic_oneviewd.inventory_manager import manage as inventory_manager
+from ironic_oneviewd.node_manager import manage as node_manager
+from ironic_oneviewd import throttling
+from ironic_oneviewd import utils
+
+
+@mock.patch.object(throttling.time, 'time')
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_rate(self, mock_time):
+        mock_time.return_value = 100.0
+        bucket = throttling.TokenBucket(rate=10, burst=2)
+
+        delays = [bucket.reserve() for _ in range(4)]
+
+        self.assertEqual([0.0, 0.0], delays[:2])
+        self.assertAlmostEqual(0.1, delays[2])
+        self.assertAlmostEqual(0.2, delays[3])
+
+    def test_refill(self, mock_time):
+        mock_time.return_value = 100.0
+        bucket = throttling.TokenBucket(rate=10, burst=2)
+        bucket.reserve()
+        bucket.reserve()
+
+        mock_time.return_value = 100.5
+
+        self.assertEqual(0.0, bucket.reserve())
+        self.assertEqual(0.0, bucket.reserve())
+
+    def test_unlimited(self, mock_time):
+        mock_time.return_value = 100.0
+        bucket = throttling.TokenBucket(rate=0)
+
+        self.assertEqual(0.0, max(bucket.reserve() for _ in range(1000)))
+
+
+@mock.patch.object(throttling.time, 'time', return_value=100.0)
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.throttle = throttling.Throttle('ironic', 0, 0, 3, 30)
+        self.breaker = self.throttle.breaker
+
+    def test_opens_on_consecutive_failures(self, mock_time):
+        for status_code in (503, None, 500):
+            self.throttle.reserve()
+            self.throttle.record(status_code)
+
+        self.assertEqual(throttling.OPEN, self.breaker.state)
+        self.assertRaises(exceptions.CircuitOpenError, self.throttle.reserve)
+
+    def test_client_errors_reset_failures(self, mock_time):
+        for status_code in (503, 503, 409, 503, 503):
+            self.throttle.record(status_code)
+
+        self.assertEqual(throttling.CLOSED, self.breaker.state)
+
+    def test_half_open_probe(self, mock_time):
+        for _ in range(3):
+            self.breaker.failed()
+
+        mock_time.return_value = 130.0
+        self.assertEqual(throttling.HALF_OPEN, self.breaker.state)
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+        self.breaker.failed()
+        self.assertEqual(throttling.OPEN, self.breaker.state)
+
+        mock_time.return_value = 160.0
+        self.assertTrue(self.breaker.allow())
+        self.breaker.succeeded()
+        self.assertEqual(throttling.CLOSED, self.breaker.state)
+        self.assertEqual(2, self.breaker.stats()['times_opened'])
+
+    def test_disabled(self, mock_time):
+        breaker = throttling.CircuitBreaker('oneview', 0, 30)
+
+        for _ in range(100):
+            breaker.failed()
+
+        self.assertTrue(breaker.allow())
+
+
+class TestThrottledHTTPAdapter(unittest.TestCase):
+    def setUp(self):
+        self.throttle = throttling.Throttle('ironic', 0, 0, 2, 30)
+        throttling._throttles['ironic'] = self.throttle
+        self.addCleanup(throttling._throttles.pop, 'ironic', None)
+        self.adapter = utils.ThrottledHTTPAdapter()
+        self.request = mock.Mock(url='http://ironic:6385/v1/nodes')
+
+    @mock.patch.object(requests.adapters.HTTPAdapter, 'send')
+    def test_server_errors_open_circuit(self, mock_send):
+        mock_send.side_effect = [
+            mock.Mock(status_code=503),
+            requests.exceptions.ConnectionError()]
+
+        self.adapter.send(self.request)
+        self.assertRaises(requests.exceptions.ConnectionError,
+                          self.adapter.send, self.request)
+
+        self.assertRaises(exceptions.CircuitOpenError,
+                          self.adapter.send, self.request)
+        self.assertEqual(2, mock_send.call_count)
+
+
+class TestDispatchPause(unittest.TestCase):
+    def setUp(self):
+        self.facade = mock.Mock()
+        self.node_manage = node_manager.NodeManager(self.facade)
+        self.addCleanup(self.node_manage.executor.shutdown)
+        self.node_manage.ironic_breaker = throttling.CircuitBreaker(
+            'ironic', 1, 30)
+        self.node = mock.Mock(uuid='node-1', driver='oneview',
+                              maintenance=False, provision_state='enroll',
+                              last_error=None, updated_at=None)
+
+    @mock.patch.object(node_manager.time, 'sleep', side_effect=ValueError)
+    def test_dispatch_paused_while_open(self, mock_sleep):
+        self.node_manage.ironic_breaker.failed()
+        self.facade.get_ironic_node_snapshot.return_value = [self.node]
+
+        self.assertRaises(ValueError, self.node_manage.run)
+
+        self.assertEqual({}, self.node_manage.in_flight)
+        self.assertFalse(self.facade.set_node_provision_state.called)
+
+    def test_open_circuit_does_not_quarantine(self):
+        self.facade.set_node_provision_state.side_effect = (
+            exceptions.CircuitOpenError('ironic'))
+        tracker = self.node_manage.transitions
+
+        for _ in range(tracker.quarantine_threshold):
+            self.assertFalse(
+                self.node_manage.manage_node_provision_state(self.node))
+
+        self.assertFalse(tracker.is_quarantined(self.node.uuid))
+        self.assertEqual(0, tracker.stats()['in_progress'])
+        self.assertNotIn(self.node.uuid, tracker.failures)
+
+
+class TestOpenCircuitCycle(unittest.TestCase):
+    def setUp(self):
+        CONF.set_override('server_profile_templates', ['1'],
+                          group='inventory')
+        self.addCleanup(CONF.clear_override, 'server_profile_templates',
+                        group='inventory')
+        self.facade = mock.Mock()
+
+    @mock.patch.object(node_manager.time, 'sleep', side_effect=ValueError)
+    def test_node_manager_skips_cycle(self, mock_sleep):
+        self.facade.get_ironic_node_snapshot.side_effect = (
+            exceptions.CircuitOpenError('ironic'))
+        node_manage = node_manager.NodeManager(self.facade)
+        self.addCleanup(node_manage.executor.shutdown)
+
+        # NOTE: The loop goes on to sleep until the next cycle
+        self.assertRaises(ValueError, node_manage.run)
+        self.assertFalse(self.facade.set_node_provision_state.called)
+
+    @mock.patch.object(inventory_manager.time, 'sleep',
+                       side_effect=ValueError)
+    def test_inventory_manager_skips_cycle(self, mock_sleep):
+        self.facade.get_ironic_node_snapshot.return_value = [mock.Mock(
+            uuid='node-1', driver='oneview', maintenance=False,
+            driver_info={'server_hardware_uri': '/rest/server-hardware/1'})]
+        self.facade.get_server_profile_template.side_effect = (
+            exceptions.CircuitOpenError('oneview'))
+        self.facade.iter_server_hardware_available.side_effect = (
+            exceptions.CircuitOpenError('oneview'))
+        self.facade.get_server_hardware.side_effect = (
+            exceptions.CircuitOpenError('oneview'))
+        inventory_manage = inventory_manager.InventoryManager(self.facade)
+        self.addCleanup(inventory_manage.executor.shutdown)
+
+        self.assertRaises(ValueError, inventory_manage._run)
+        self.assertEqual({}, inventory_manage.not_enrolled_hardware)
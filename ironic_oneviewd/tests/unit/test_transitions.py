@@ -0,0 +1,145 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import unittest
+
+from ironicclient import exc as ironic_exc
+
+from ironic_oneviewd.node_manager import manage as node_manager
+from ironic_oneviewd.node_manager import transitions
+
+
+def _enroll_node(node_uuid='node-1'):
+    return mock.Mock(uuid=node_uuid, driver='oneview', maintenance=False,
+                     provision_state='enroll', last_error=None,
+                     updated_at=None)
+
+
+@mock.patch.object(transitions.time, 'sleep')
+class TestTransitionTracker(unittest.TestCase):
+    def setUp(self):
+        self.tracker = transitions.TransitionTracker()
+        self.tracker.backoff = 1.0
+        self.tracker.max_backoff = 4.0
+        self.tracker.deadline = 100
+        self.request = mock.Mock()
+        self.clock = [0.0]
+        time_patch = mock.patch.object(transitions.time, 'time',
+                                       side_effect=lambda: self.clock[0])
+        time_patch.start()
+        self.addCleanup(time_patch.stop)
+
+    def _run_until_done(self, node):
+        """Run a transition as the node manager cycles would.
+
+        :returns: The delays the retries were scheduled with.
+        """
+        delays = []
+        while not self.tracker.run(node, 'manage', self.request):
+            self.assertTrue(self.tracker.is_retry_pending(node.uuid))
+            delay = self.tracker.next_retry_in()
+            delays.append(delay)
+            self.clock[0] += delay
+            self.assertFalse(self.tracker.is_retry_pending(node.uuid))
+        return delays
+
+    def test_run_schedules_transient_errors(self, mock_sleep):
+        self.request.side_effect = [ironic_exc.Conflict(),
+                                    ironic_exc.ServiceUnavailable(),
+                                    ironic_exc.Conflict(),
+                                    ironic_exc.Conflict(), None]
+
+        delays = self._run_until_done(_enroll_node())
+
+        self.assertEqual(5, self.request.call_count)
+        # NOTE: Exponential backoff capped at 4s, with up to half of
+        # each delay as jitter
+        for delay, backoff in zip(delays, [1, 2, 4, 4]):
+            self.assertTrue(backoff / 2.0 <= delay <= backoff)
+        self.assertEqual({'in_progress': 0, 'retries': 4, 'quarantined': 0},
+                         self.tracker.stats())
+        self.assertFalse(mock_sleep.called)
+
+    def test_run_permanent_error(self, mock_sleep):
+        self.request.side_effect = ironic_exc.BadRequest()
+
+        self.assertRaises(ironic_exc.BadRequest, self.tracker.run,
+                          _enroll_node(), 'manage', self.request)
+
+        self.assertEqual(1, self.request.call_count)
+        self.assertIsNone(self.tracker.next_retry_in())
+
+    def test_run_deadline(self, mock_sleep):
+        self.tracker.deadline = 10
+        self.request.side_effect = ironic_exc.Conflict()
+
+        self.assertRaises(ironic_exc.Conflict, self._run_until_done,
+                          _enroll_node())
+
+        self.assertLess(self.clock[0], 10)
+        self.assertGreater(self.request.call_count, 2)
+        self.assertEqual(1, self.tracker.failures['node-1'])
+
+    def test_prune(self, mock_sleep):
+        self.request.side_effect = ironic_exc.Conflict()
+        self.tracker.run(_enroll_node(), 'manage', self.request)
+
+        self.tracker.prune(set(['node-2']))
+
+        self.assertFalse(self.tracker.is_retry_pending('node-1'))
+        self.assertIsNone(self.tracker.next_retry_in())
+
+    def test_retry_not_dispatched_until_due(self, mock_sleep):
+        self.request.side_effect = [ironic_exc.Conflict(), None]
+        node_manage = node_manager.NodeManager(mock.Mock())
+        self.addCleanup(node_manage.executor.shutdown)
+        node_manage.transitions = self.tracker
+        node_manage.facade.set_node_provision_state = self.request
+
+        self.assertFalse(
+            node_manage.manage_node_provision_state(_enroll_node()))
+        self.assertEqual([], node_manage.get_changed_nodes([_enroll_node()]))
+
+        self.clock[0] += self.tracker.next_retry_in()
+        changed_nodes = node_manage.get_changed_nodes([_enroll_node()])
+        self.assertEqual(['node-1'], [node.uuid for node in changed_nodes])
+        self.assertTrue(
+            node_manage.manage_node_provision_state(changed_nodes[0]))
+        self.assertEqual(2, self.request.call_count)
+
+    def test_quarantine(self, mock_sleep):
+        self.tracker.quarantine_threshold = 2
+        self.request.side_effect = ironic_exc.BadRequest()
+        node_manage = node_manager.NodeManager(mock.Mock())
+        self.addCleanup(node_manage.executor.shutdown)
+        node_manage.transitions = self.tracker
+        node_manage.facade.set_node_provision_state = self.request
+
+        for cycle in range(4):
+            node_manage.manage_node_provision_state(_enroll_node())
+            if not node_manage.get_changed_nodes([_enroll_node()]):
+                break
+
+        self.assertEqual(1, cycle)
+        self.assertEqual(2, self.request.call_count)
+        self.assertTrue(self.tracker.is_quarantined('node-1'))
+
+        self.tracker.quarantined['node-1'] = 0
+        self.assertFalse(self.tracker.is_quarantined('node-1'))
+        self.assertEqual(['node-1'], [
+            node.uuid for node in node_manage.get_changed_nodes(
+                [_enroll_node()])])
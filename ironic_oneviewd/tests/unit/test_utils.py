@@ -25,6 +25,17 @@ from ironic_oneviewd import utils
 
 hponeview_client = importutils.try_import('hpOneView.oneview_client')
 
+CAPABILITIES = ('server_hardware_type_uri:/rest/server-hardware-types/%d,'
+                'enclosure_group_uri:/rest/enclosure-groups/1,'
+                'server_profile_template_uri:/rest/server-profile-templates/1,'
+                'boot_mode:bios')
+
+
+class FakeNode(object):
+    def __init__(self, properties, driver_info):
+        self.properties = properties
+        self.driver_info = driver_info
+
 
 class TestUtils(unittest.TestCase):
     def setUp(self):
@@ -40,6 +51,20 @@ class TestUtils(unittest.TestCase):
         CONF.oneview.allow_insecure_connections = self.ov_insecure
         CONF.oneview.tls_cacert_file = self.ov_cafile
 
+    @mock.patch.object(utils.ironic_client, 'get_client')
+    def test_get_ironic_client(self, mock_get_client):
+        session = mock.Mock()
+
+        utils.get_ironic_client(session)
+
+        # NOTE: Conflicts are only retried by TransitionTracker
+        mock_get_client.assert_called_once_with(
+            utils.IRONIC_API_VERSION, session=session,
+            region_name=CONF.openstack.region_name,
+            interface=CONF.openstack.endpoint_type.replace('URL', ''),
+            os_ironic_api_version=utils.IRONIC_API_MICROVERSION,
+            max_retries=0)
+
     @mock.patch.object(hponeview_client, 'OneViewClient', autospec=True)
     def test_get_hponeview_client(self, mock_hponeview_client):
         utils.get_hponeview_client()
@@ -73,3 +98,65 @@ class TestUtils(unittest.TestCase):
         }
         utils.get_hponeview_client()
         mock_oneview.assert_called_once_with(config)
+
+
+class TestCapabilities(unittest.TestCase):
+    def setUp(self):
+        utils._parsed_capabilities.clear()
+        self.addCleanup(utils._parsed_capabilities.clear)
+
+    def test_parse_capabilities_shared(self):
+        first = utils.parse_capabilities(CAPABILITIES % 1)
+        second = utils.parse_capabilities(CAPABILITIES % 1)
+
+        self.assertIs(first, second)
+        self.assertEqual('bios', first['boot_mode'])
+        self.assertIsNot(first, utils.capabilities_to_dict(CAPABILITIES % 1))
+
+    def test_parse_capabilities_malformed(self):
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          utils.parse_capabilities, 'boot_mode')
+        self.assertRaises(exceptions.InvalidParameterValue,
+                          utils.parse_capabilities, {'boot_mode': 'bios'})
+        self.assertEqual({}, utils.parse_capabilities(None))
+
+    @mock.patch.object(utils, 'CAPABILITIES_CACHE_SIZE', 2)
+    def test_parse_capabilities_bounded(self):
+        for index in range(3):
+            utils.parse_capabilities(CAPABILITIES % index)
+        utils.parse_capabilities(CAPABILITIES % 1)
+        utils.parse_capabilities(CAPABILITIES % 3)
+
+        self.assertEqual([CAPABILITIES % 1, CAPABILITIES % 3],
+                         list(utils._parsed_capabilities))
+
+    def test_verify_node_properties_keys(self):
+        node = mock.Mock(properties={
+            'capabilities': 'server_hardware_type_uri:/rest/1,'
+                            'boot_mode:server_profile_template_uri'})
+
+        self.assertRaises(exceptions.MissingParameterValue,
+                          utils.verify_node_properties, node)
+
+        node.properties['capabilities'] = CAPABILITIES % 1
+        self.assertEqual(CAPABILITIES % 1,
+                         utils.verify_node_properties(node))
+
+    def test_100k_nodes(self):
+        nodes = [FakeNode({'capabilities': CAPABILITIES % (index % 5)},
+                          {'server_hardware_uri':
+                           '/rest/server-hardware/%d' % index})
+                 for index in range(100000)]
+        utils._parsed_capabilities.clear()
+
+        with mock.patch.object(utils, '_split_capabilities',
+                               wraps=utils._split_capabilities) as split:
+            for node in nodes:
+                utils.verify_node_properties(node)
+                node_info = utils.get_node_info_from_node(node)
+
+        # NOTE: Each of the 5 capabilities strings is parsed once
+        self.assertEqual(5, split.call_count)
+        self.assertEqual(5, len(utils._parsed_capabilities))
+        self.assertEqual('/rest/server-hardware-types/4',
+                         node_info['server_hardware_type_uri'])
@@ -0,0 +1,116 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import json
+import mock
+import unittest
+
+import six
+
+from ironic_oneviewd import manage
+from ironic_oneviewd.node_snapshot import NodeRecord
+from ironic_oneviewd import utils
+from ironic_oneviewd import validation
+
+CAPABILITIES = ('server_hardware_type_uri:/rest/server-hardware-types/1,'
+                'enclosure_group_uri:/rest/enclosure-groups/1,'
+                'server_profile_template_uri:/rest/server-profile-templates/'
+                '%d')
+PROPERTIES = {'cpus': 8, 'memory_mb': 32768, 'local_gb': 120,
+              'cpu_arch': 'x86_64'}
+
+
+def _node(index, provision_state='available', capabilities=None,
+          driver_info=None, properties=PROPERTIES):
+    properties = dict(properties)
+    properties['capabilities'] = (CAPABILITIES % (index % 4)
+                                  if capabilities is None else capabilities)
+    if driver_info is None:
+        driver_info = {'server_hardware_uri':
+                       '/rest/server-hardware/%d' % index}
+    return NodeRecord('node-%d' % index, driver='oneview',
+                      provision_state=provision_state,
+                      properties=properties, driver_info=driver_info)
+
+
+class TestValidation(unittest.TestCase):
+    def test_valid_node(self):
+        self.assertEqual([], validation.validate_node(_node(1)))
+
+    def test_missing_server_hardware_uri(self):
+        node = _node(1, driver_info={})
+
+        self.assertEqual([validation.MISSING_SERVER_HARDWARE_URI],
+                         validation.validate_node(node))
+
+    def test_malformed_capabilities(self):
+        node = _node(1, capabilities='server_hardware_type_uri')
+
+        self.assertEqual([validation.MALFORMED_CAPABILITIES],
+                         validation.validate_node(node))
+
+    def test_missing_capabilities(self):
+        node = _node(1, capabilities='boot_mode:bios')
+
+        self.assertEqual([validation.MISSING_CAPABILITIES],
+                         validation.validate_node(node))
+
+    def test_missing_hardware_properties(self):
+        self.assertEqual([validation.MISSING_HARDWARE_PROPERTIES],
+                         validation.validate_node(_node(1, properties={})))
+        self.assertEqual([], validation.validate_node(
+            _node(1, provision_state='enroll', properties={})))
+
+    def test_template_mismatch(self):
+        node = _node(1, driver_info={
+            'server_hardware_uri': '/rest/server-hardware/1',
+            'server_profile_template_uri':
+                '/rest/server-profile-templates/2'})
+
+        self.assertEqual([validation.TEMPLATE_MISMATCH],
+                         validation.validate_node(node))
+
+    def test_validate_20k_nodes(self):
+        nodes = [_node(index) for index in range(20000)]
+        for index in range(0, 20000, 100):
+            nodes[index].driver_info = {}
+        utils._parsed_capabilities.clear()
+
+        with mock.patch.object(utils, '_split_capabilities',
+                               wraps=utils._split_capabilities) as split:
+            report = validation.validate_nodes(nodes)
+
+        # NOTE: The nodes share 4 distinct capabilities strings
+        self.assertEqual(4, split.call_count)
+        self.assertEqual(200, len(report.invalid_nodes))
+        self.assertEqual(200, report.counts[
+            validation.MISSING_SERVER_HARDWARE_URI])
+
+    @mock.patch.object(manage, 'Facade')
+    def test_do_validate(self, mock_facade):
+        mock_facade().get_ironic_node_snapshot.return_value = [
+            _node(1), _node(2, capabilities='boot_mode')]
+
+        with mock.patch('sys.stdout', new=six.StringIO()) as stdout:
+            self.assertEqual(1, manage.do_validate(
+                mock.Mock(include_maintenance=False)))
+
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(2, report['nodes'])
+        self.assertEqual({'node-2': [validation.MALFORMED_CAPABILITIES]},
+                         report['invalid_nodes'])
+        mock_facade().get_ironic_node_snapshot.assert_called_once_with(
+            drivers=utils.SUPPORTED_DRIVERS, maintenance=False,
+            fields=validation.VALIDATION_FIELDS)
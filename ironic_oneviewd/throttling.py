@@ -0,0 +1,220 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Rate limiting and circuit breaking of the requests to each backend."""
+
+import threading
+import time
+
+from oslo_log import log as logging
+
+from ironic_oneviewd.conf import CONF
+from ironic_oneviewd import exceptions
+from ironic_oneviewd import metrics
+
+LOG = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+HALF_OPEN = 'half_open'
+OPEN = 'open'
+
+_throttles = {}
+_throttles_lock = threading.Lock()
+
+
+class TokenBucket(object):
+    """Token bucket letting rate requests per second, in bursts of burst.
+
+    A rate of 0 lets every request through.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(int(rate), 1)
+        self.tokens = float(self.burst)
+        self.updated_at = time.time()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token, possibly ahead of time.
+
+        :returns: How long to wait, in seconds, before using the token.
+        """
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.time()
+            self.tokens = min(
+                self.tokens + (now - self.updated_at) * self.rate,
+                self.burst)
+            self.updated_at = now
+            self.tokens -= 1
+            return max(-self.tokens / self.rate, 0.0)
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+
+class CircuitBreaker(object):
+    """Circuit breaker over the requests to a backend.
+
+    The circuit opens after failure_threshold requests failing in a row,
+    refusing requests for reset_timeout seconds. It then lets a single
+    request through, closing again if it succeeds. A failure threshold of
+    0 keeps the circuit closed.
+    """
+
+    def __init__(self, backend, failure_threshold, reset_timeout):
+        self.backend = backend
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._state = CLOSED
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._get_state()
+
+    def _get_state(self):
+        if (self._state == OPEN and
+                time.time() - self.opened_at >= self.reset_timeout):
+            self._set_state(HALF_OPEN)
+        return self._state
+
+    def _set_state(self, state):
+        self._state = state
+        self._probing = False
+        metrics.set_circuit_state(self.backend, state)
+        if state == OPEN:
+            self.opened_at = time.time()
+            self.times_opened += 1
+            LOG.warning("Circuit breaker of %(backend)s opened after "
+                        "%(failures)s failed requests, pausing its "
+                        "requests for %(timeout)s seconds." %
+                        {'backend': self.backend, 'failures': self.failures,
+                         'timeout': self.reset_timeout})
+        elif state == HALF_OPEN:
+            LOG.info("Circuit breaker of %(backend)s is half open, trying "
+                     "a request." % {'backend': self.backend})
+        else:
+            LOG.info("Circuit breaker of %(backend)s closed." %
+                     {'backend': self.backend})
+
+    def allow(self):
+        """Tell whether a request may be sent to the backend."""
+        with self._lock:
+            state = self._get_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def succeeded(self):
+        with self._lock:
+            self.failures = 0
+            if self._state != CLOSED:
+                self._set_state(CLOSED)
+
+    def failed(self):
+        with self._lock:
+            self.failures += 1
+            if not self.failure_threshold:
+                return
+            if (self._state == HALF_OPEN or
+                    (self._state == CLOSED and
+                     self.failures >= self.failure_threshold)):
+                self._set_state(OPEN)
+
+    def is_open(self):
+        return self.state == OPEN
+
+    def stats(self):
+        with self._lock:
+            return {'state': self._get_state(),
+                    'failures': self.failures,
+                    'times_opened': self.times_opened}
+
+
+class Throttle(object):
+    """Rate limiter and circuit breaker of a backend."""
+
+    def __init__(self, backend, rate, burst, failure_threshold,
+                 reset_timeout):
+        self.backend = backend
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(backend, failure_threshold,
+                                      reset_timeout)
+
+    def reserve(self):
+        """Reserve a request to the backend.
+
+        :returns: How long to wait, in seconds, before sending it.
+        :raises: CircuitOpenError if the circuit breaker is open.
+        """
+        if not self.breaker.allow():
+            raise exceptions.CircuitOpenError(self.backend)
+        return self.bucket.reserve()
+
+    def wait(self):
+        """Block until a request may be sent to the backend.
+
+        :raises: CircuitOpenError if the circuit breaker is open.
+        """
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    def record(self, status_code):
+        """Record the outcome of a request to the backend.
+
+        :param status_code: HTTP status of the response, or None if no
+                            response was received.
+        """
+        if status_code is None or status_code >= 500:
+            self.breaker.failed()
+        else:
+            self.breaker.succeeded()
+
+
+def get_throttle(backend):
+    """Get the throttle of the requests to a backend of this process.
+
+    :param backend: 'ironic' or 'oneview'.
+    """
+    throttle = _throttles.get(backend)
+    if throttle is not None:
+        return throttle
+    with _throttles_lock:
+        if backend not in _throttles:
+            if backend == 'ironic':
+                rate = CONF.openstack.ironic_rate_limit
+                burst = CONF.openstack.ironic_rate_burst
+            else:
+                rate = CONF.oneview.rate_limit
+                burst = CONF.oneview.rate_burst
+            _throttles[backend] = Throttle(
+                backend, rate, burst,
+                CONF.DEFAULT.circuit_breaker_threshold,
+                CONF.DEFAULT.circuit_breaker_reset_timeout)
+        return _throttles[backend]
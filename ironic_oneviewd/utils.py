@@ -14,17 +14,28 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import threading
+
+import requests
 import six
 
 from ironicclient import client as ironic_client
+from keystoneauth1 import session as ks_session
 from oslo_log import log as logging
 from oslo_utils import importutils
 
 from ironic_oneviewd.conf import CONF
 from ironic_oneviewd import exceptions
+from ironic_oneviewd import keystone_auth
+from ironic_oneviewd import metrics
+from ironic_oneviewd import throttling
 
 LOG = logging.getLogger(__name__)
 
+_parsed_capabilities = collections.OrderedDict()
+_parsed_capabilities_lock = threading.Lock()
+
 hpclient = importutils.try_import('hpOneView.oneview_client')
 oneview_exceptions = importutils.try_import('hpOneView.exceptions')
 
@@ -37,7 +48,11 @@ REQUIRED_ON_EXTRAS = {
     'server_hardware_uri': "Server Hardware URI. Required.",
 }
 
+# NOTE: Most nodes share a handful of capabilities strings
+CAPABILITIES_CACHE_SIZE = 1024
+
 IRONIC_API_VERSION = 1
+IRONIC_API_MICROVERSION = '1.32'
 
 SUPPORTED_CLASSIC_DRIVERS = [
     'agent_pxe_oneview',
@@ -48,38 +63,103 @@ SUPPORTED_HARDWARE_TYPES = ['oneview']
 SUPPORTED_DRIVERS = SUPPORTED_HARDWARE_TYPES + SUPPORTED_CLASSIC_DRIVERS
 
 
-def get_ironic_client():
+def get_keystone_session():
+    """Generate a Keystone session for the OpenStack clients.
+
+    The session caches its token, authenticating again shortly before it
+    expires, and keeps a pool of HTTP connections sized to the number of
+    worker threads sharing it.
+
+    :returns: an instance of the keystoneauth1 Session
+    """
+    auth = keystone_auth.CachedPassword(
+        token_cache_file=CONF.openstack.token_cache_file,
+        auth_url=CONF.openstack.auth_url,
+        username=CONF.openstack.username,
+        password=CONF.openstack.password,
+        project_id=CONF.openstack.project_id or CONF.openstack.tenant_id,
+        project_name=(CONF.openstack.project_name or
+                      CONF.openstack.tenant_name),
+        user_domain_id=CONF.openstack.user_domain_id,
+        user_domain_name=CONF.openstack.user_domain_name,
+        project_domain_id=CONF.openstack.project_domain_id,
+        project_domain_name=CONF.openstack.project_domain_name
+    )
+
+    if CONF.openstack.insecure:
+        verify = False
+    else:
+        verify = CONF.openstack.cacert or True
+
+    pool_size = CONF.DEFAULT.rpc_thread_pool_size
+    http_session = requests.Session()
+    adapter = ThrottledHTTPAdapter(pool_connections=pool_size,
+                                   pool_maxsize=pool_size)
+    http_session.mount('https://', adapter)
+    http_session.mount('http://', adapter)
+    http_session.hooks['response'].append(_observe_openstack_request)
+
+    return ks_session.Session(auth=auth, verify=verify,
+                              cert=CONF.openstack.cert,
+                              session=http_session)
+
+
+def _is_keystone_url(url):
+    auth_url = CONF.openstack.auth_url
+    return bool(auth_url) and url.startswith(auth_url)
+
+
+def _observe_openstack_request(response, *args, **kwargs):
+    backend = 'keystone' if _is_keystone_url(response.url) else 'ironic'
+    metrics.observe_request(backend, response.request.method,
+                            response.elapsed.total_seconds())
+
+
+class ThrottledHTTPAdapter(requests.adapters.HTTPAdapter):
+    """HTTP adapter rate limiting and circuit breaking Ironic requests."""
+
+    def send(self, request, *args, **kwargs):
+        if _is_keystone_url(request.url):
+            return super(ThrottledHTTPAdapter, self).send(
+                request, *args, **kwargs)
+
+        throttle = throttling.get_throttle('ironic')
+        throttle.wait()
+        try:
+            response = super(ThrottledHTTPAdapter, self).send(
+                request, *args, **kwargs)
+        except requests.exceptions.RequestException:
+            throttle.record(None)
+            raise
+        throttle.record(response.status_code)
+        return response
+
+
+def get_ironic_client(session=None):
     """Generate an instance of the Ironic client.
 
-    This method creates an instance of the Ironic client using the OpenStack
-    credentials from config file and the ironicclient library.
+    This method creates an instance of the Ironic client on a Keystone
+    session using the OpenStack credentials from config file and the
+    ironicclient library.
 
+    :param session: Keystone session, as returned by get_keystone_session.
+                    A new one is created when not given.
     :returns: an instance of the Ironic client
     """
+    # NOTE: Conflicts are not retried by the client, which would sleep in
+    # the worker thread; TransitionTracker schedules the retries instead.
     daemon_kwargs = {
-        'os_username': CONF.openstack.username,
-        'os_password': CONF.openstack.password,
-        'os_auth_url': CONF.openstack.auth_url,
-        'os_region_name': CONF.openstack.region_name,
-        'insecure': CONF.openstack.insecure,
-        'os_cacert': CONF.openstack.cacert,
-        'os_cert': CONF.openstack.cert,
-        'os_endpoint_type': CONF.openstack.endpoint_type,
-        'os_project_id': CONF.openstack.project_id,
-        'os_project_name': CONF.openstack.project_name,
-        'os_tenant_id': CONF.openstack.tenant_id,
-        'os_tenant_name': CONF.openstack.tenant_name,
-        'os_user_domain_id': CONF.openstack.user_domain_id,
-        'os_user_domain_name': CONF.openstack.user_domain_name,
-        'os_project_domain_id': CONF.openstack.project_domain_id,
-        'os_project_domain_name': CONF.openstack.project_domain_name,
-        'os_ironic_api_version': '1.32'
+        'session': session or get_keystone_session(),
+        'region_name': CONF.openstack.region_name,
+        'interface': CONF.openstack.endpoint_type.replace('URL', ''),
+        'os_ironic_api_version': IRONIC_API_MICROVERSION,
+        'max_retries': 0
     }
 
     try:
         client = ironic_client.get_client(IRONIC_API_VERSION, **daemon_kwargs)
     except Exception as exc:
-        LOG.error(exc.msg)
+        LOG.error(getattr(exc, 'msg', exc))
         raise exc
 
     return client
@@ -116,10 +196,7 @@ def get_hponeview_client():
 
     config = {
         "ip": CONF.oneview.manager_url,
-        "credentials": {
-            "userName": CONF.oneview.username,
-            "password": CONF.oneview.password
-        },
+        "credentials": get_oneview_credentials(),
         "ssl_certificate": ssl_certificate
     }
 
@@ -135,6 +212,13 @@ def get_hponeview_client():
     return client
 
 
+def get_oneview_credentials():
+    return {
+        "userName": CONF.oneview.username,
+        "password": CONF.oneview.password
+    }
+
+
 def arg(*args, **kwargs):
     """Decorator for CLI args.
 
@@ -165,8 +249,9 @@ def add_arg(func, *args, **kwargs):
 
 def verify_node_properties(node):
     properties = node.properties.get('capabilities', '')
+    capabilities = parse_capabilities(properties)
     for key in REQUIRED_ON_PROPERTIES:
-        if key not in properties:
+        if key not in capabilities:
             raise exceptions.MissingParameterValue(
                 ("Missing the following OneView data in node's "
                  "properties/capabilities: %s.") % key)
@@ -192,24 +277,57 @@ def capabilities_to_dict(capabilities):
     :raises: InvalidParameterValue if capabilities is not an string or has
              a malformed value
     """
+    return dict(parse_capabilities(capabilities))
+
+
+def parse_capabilities(capabilities):
+    """Parse the capabilities string, reusing the result for equal strings.
+
+    The parsed capabilities are kept in a bounded LRU cache keyed by the
+    capabilities string, so they are shared by every node with the same
+    capabilities and must not be modified.
+
+    :param capabilities: the node capabilities as a formatted string
+    :returns: the capabilities dictionary
+    :raises: InvalidParameterValue if capabilities is not an string or has
+             a malformed value
+    """
+    if not capabilities:
+        return {}
+    if not isinstance(capabilities, six.string_types):
+        raise exceptions.InvalidParameterValue(
+            "Value of 'capabilities' must be string. Got %s" %
+            type(capabilities))
+
+    with _parsed_capabilities_lock:
+        capabilities_dict = _parsed_capabilities.pop(capabilities, None)
+        if capabilities_dict is not None:
+            _parsed_capabilities[capabilities] = capabilities_dict
+            return capabilities_dict
+
+    capabilities_dict = _split_capabilities(capabilities)
+
+    with _parsed_capabilities_lock:
+        _parsed_capabilities[capabilities] = capabilities_dict
+        while len(_parsed_capabilities) > CAPABILITIES_CACHE_SIZE:
+            _parsed_capabilities.popitem(last=False)
+    return capabilities_dict
+
+
+def _split_capabilities(capabilities):
     capabilities_dict = {}
-    if capabilities:
-        if not isinstance(capabilities, six.string_types):
-            raise exceptions.InvalidParameterValue(
-                "Value of 'capabilities' must be string. Got %s" %
-                type(capabilities))
-        try:
-            for capability in capabilities.split(','):
-                key, value = capability.split(':')
-                capabilities_dict[key] = value
-        except ValueError:
-            raise exceptions.InvalidParameterValue(
-                "Malformed capabilities value: %s" % capability)
+    try:
+        for capability in capabilities.split(','):
+            key, value = capability.split(':')
+            capabilities_dict[key] = value
+    except ValueError:
+        raise exceptions.InvalidParameterValue(
+            "Malformed capabilities value: %s" % capability)
     return capabilities_dict
 
 
 def get_node_info_from_node(node):
-    capabilities_dict = capabilities_to_dict(
+    capabilities_dict = parse_capabilities(
         node.properties.get('capabilities', '')
     )
     driver_info = node.driver_info
@@ -236,7 +354,7 @@ def node_has_hardware_propeties(node):
 
 
 def server_profile_template_uri_from_node(node):
-    node_capabilities = capabilities_to_dict(
+    node_capabilities = parse_capabilities(
         node.properties.get('capabilities')
     )
     node_server_profile_template_uri = node_capabilities.get(
@@ -0,0 +1,136 @@
+# Copyright 2017 Hewlett Packard Enterprise Development LP
+# Copyright 2017 Universidade Federal de Campina Grande
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Validation of the OneView data of the Ironic nodes in bulk.
+
+A misconfigured node otherwise only shows up when one of its transitions
+fails. The whole node snapshot is checked in a single pass, in which the
+capabilities strings shared by many nodes are only parsed once.
+"""
+
+import time
+
+from oslo_log import log as logging
+
+from ironic_oneviewd import exceptions
+from ironic_oneviewd import utils
+
+LOG = logging.getLogger(__name__)
+
+MISSING_SERVER_HARDWARE_URI = 'missing_server_hardware_uri'
+MALFORMED_CAPABILITIES = 'malformed_capabilities'
+MISSING_CAPABILITIES = 'missing_capabilities'
+MISSING_HARDWARE_PROPERTIES = 'missing_hardware_properties'
+TEMPLATE_MISMATCH = 'template_mismatch'
+
+ISSUES = (MISSING_SERVER_HARDWARE_URI, MALFORMED_CAPABILITIES,
+          MISSING_CAPABILITIES, MISSING_HARDWARE_PROPERTIES,
+          TEMPLATE_MISMATCH)
+
+# NOTE: Hardware properties are only expected once nodes were inspected
+UNINSPECTED_STATES = ('enroll', 'verifying', 'manageable', 'inspecting',
+                      'inspect wait', 'inspect failed')
+
+VALIDATION_FIELDS = ['uuid', 'driver', 'maintenance', 'provision_state',
+                     'properties', 'driver_info', 'extra']
+
+
+class ValidationReport(object):
+    """Issues found on each node by a validation pass."""
+
+    def __init__(self):
+        self.nodes = 0
+        self.invalid_nodes = {}
+        self.counts = dict.fromkeys(ISSUES, 0)
+        self.duration = 0.0
+
+    def add(self, node, issues):
+        self.nodes += 1
+        if issues:
+            self.invalid_nodes[node.uuid] = issues
+            for issue in issues:
+                self.counts[issue] += 1
+
+    def to_dict(self):
+        return {'nodes': self.nodes,
+                'valid': self.nodes - len(self.invalid_nodes),
+                'invalid': len(self.invalid_nodes),
+                'issues': dict(self.counts),
+                'invalid_nodes': self.invalid_nodes,
+                'duration': round(self.duration, 3)}
+
+
+def validate_node(node):
+    """Check the OneView data of a node.
+
+    :param node: Ironic node, or NodeRecord, with the VALIDATION_FIELDS.
+    :returns: List of the issues found, empty if the node is valid.
+    """
+    issues = []
+    driver_info = node.driver_info or {}
+    extra = node.extra or {}
+    if not (driver_info.get('server_hardware_uri') or
+            extra.get('server_hardware_uri')):
+        issues.append(MISSING_SERVER_HARDWARE_URI)
+
+    try:
+        capabilities = utils.parse_capabilities(
+            node.properties.get('capabilities'))
+    except exceptions.InvalidParameterValue:
+        issues.append(MALFORMED_CAPABILITIES)
+    else:
+        if any(key not in capabilities
+               for key in utils.REQUIRED_ON_PROPERTIES):
+            issues.append(MISSING_CAPABILITIES)
+        template_uri = driver_info.get('server_profile_template_uri')
+        capabilities_template_uri = capabilities.get(
+            'server_profile_template_uri')
+        if (template_uri and capabilities_template_uri and
+                template_uri != capabilities_template_uri):
+            issues.append(TEMPLATE_MISMATCH)
+
+    if (node.provision_state not in UNINSPECTED_STATES and
+            not utils.node_has_hardware_propeties(node)):
+        issues.append(MISSING_HARDWARE_PROPERTIES)
+    return issues
+
+
+def validate_nodes(nodes):
+    """Check the OneView data of every node in one pass.
+
+    :param nodes: Iterable of Ironic nodes with the VALIDATION_FIELDS.
+    :returns: A ValidationReport.
+    """
+    started_at = time.time()
+    report = ValidationReport()
+    for node in nodes:
+        report.add(node, validate_node(node))
+    report.duration = time.time() - started_at
+    return report
+
+
+def log_report(report):
+    if not report.invalid_nodes:
+        LOG.info("Validated %(nodes)s Ironic nodes, none has issues." %
+                 {'nodes': report.nodes})
+        return
+    LOG.warning("Validated %(nodes)s Ironic nodes, %(invalid)s have "
+                "issues: %(counts)s" %
+                {'nodes': report.nodes, 'invalid': len(report.invalid_nodes),
+                 'counts': dict((issue, count) for issue, count
+                                in report.counts.items() if count)})
+    for node_uuid, issues in sorted(report.invalid_nodes.items()):
+        LOG.debug("Node %(node)s has issues: %(issues)s" %
+                  {'node': node_uuid, 'issues': ', '.join(issues)})